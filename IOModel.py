@@ -1,4 +1,4 @@
-from typing import List, Optional, Literal, Union
+from typing import Dict, List, Optional, Literal, Union
 from pydantic import BaseModel, validator, model_validator, Field
 
 class OutputModelMain(BaseModel):
@@ -50,6 +50,9 @@ class StatusDataModel(BaseModel):
     file_id: str
     file: str
     chunks: int
+    chunks_inserted: Optional[int] = None
+    chunks_deleted: Optional[int] = None
+    chunks_embedded: Optional[int] = None
     separator_type: str
     status: str
     timestamp: float
@@ -100,6 +103,7 @@ class OutputModelDelete(BaseModel):
 class SearchResultModel(BaseModel):
     score: float
     text: str
+    reranked: Optional[bool] = None
 
 class OutputModelSearch(BaseModel):
     timestamp: float
@@ -121,6 +125,27 @@ class OutputModelSearch(BaseModel):
             }
         }
 
+class OutputModelMetrics(BaseModel):
+    timestamp: float
+    metrics: dict
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "timestamp": 1730172634.3079963,
+                "metrics": {
+                    "http_server_seconds:/vectorize-query": {
+                        "type": "histogram",
+                        "count": 10,
+                        "sum": 0.21,
+                        "p50": 0.025,
+                        "p99": 0.05
+                    },
+                    # Additional metrics...
+                }
+            }
+        }
+
 class OutputModelError(BaseModel):
     detail: str
 
@@ -135,12 +160,17 @@ class InsertModel(BaseModel):
     client_id: str = Field(..., description="Client ID")  # Mandatory field
     project_id: str = Field(..., description="Project ID")  # Mandatory field
     collection_name: str = Field(..., description="Collection Name")  # Mandatory field
-    collection_index_type: Literal["IVF_FLAT", "HNSW"] = Field("IVF_FLAT", description="Collection Index Type")  # Default to IVF_FLAT
+    collection_index_type: Literal["IVF_FLAT", "HNSW", "IVF_SQ8", "IVF_PQ", "DISKANN", "SCANN"] = Field("IVF_FLAT", description="Collection Index Type")  # Default to IVF_FLAT, quantized (IVF_SQ8, IVF_PQ, SCANN) and on-disk (DISKANN) types save memory
+    index_params: Optional[Dict[str, Union[int, float, str]]] = Field(None, description="Index build params, used when the collection is created")  # Optional field, defaults per index type
+    search_params: Optional[Dict[str, Union[int, float, str]]] = Field(None, description="Search params stored with the collection")  # Optional field, defaults per index type
+    hybrid: Optional[bool] = Field(None, description="Add a sparse lexical vector field for hybrid search, used when the collection is created")  # Optional field, defaults to COLLECTION_HYBRID_SEARCH_ENABLED
+    hybrid_params: Optional[Dict[str, Union[int, float, str, List[float]]]] = Field(None, description="Fusion params of hybrid search (ranker rrf or weighted, rrf_k, weights)")  # Optional field
     files_path: List[str] = Field(..., description="List of file paths (only PDFs)")  # Mandatory field
     separator_type: Literal["SeparatorTextSplitter", "CharacterTextSplitter", "RecursiveCharacterTextSplitter", "IndoLegalTextSplitter"] = Field("CharacterTextSplitter", description="Separator Engine")  # Default to CharacterTextSplitter
     separator: Optional[Union[str, List[str]]] = Field(None, description="Information separator in documents")  # Optional field, can be str or list of strings
     chunk_size: Optional[int] = Field(None, description="Document's chunk size")  # Optional field
     chunk_overlap: Optional[int] = Field(None, description="Document's chunk overlap")  # Optional field
+    replace_file_ids: Optional[Dict[str, str]] = Field(None, description="file_id each file path replaces, only its changed chunks are inserted and removed ones deleted")  # Optional field, other files get a new file_id
 
     # Custom validator to check if files are PDFs
     @validator('files_path', each_item=True)
@@ -158,6 +188,15 @@ class InsertModel(BaseModel):
             raise ValueError("For 'RecursiveCharacterTextSplitter', 'separator' must be a list of strings.")
         return self
 
+    # Validator for replaced files, keys must be files of this insert
+    @model_validator(mode="after")
+    def validate_replace_file_ids(self):
+        if self.replace_file_ids:
+            unknown = set(self.replace_file_ids) - set(self.files_path)
+            if unknown:
+                raise ValueError(f"'replace_file_ids' keys {sorted(unknown)} are not in 'files_path'.")
+        return self
+
     # Validator for chunk size and overlap logic
     @model_validator(mode="after")
     def validate_chunk_size_and_overlap(self):
@@ -176,7 +215,18 @@ class SearchModel(BaseModel):
     client_id: str = Field(..., description="Client ID")  # Mandatory field
     project_id: str = Field(..., description="Project ID")  # Mandatory field
     collection_name: str = Field(..., description="Collection Name")  # Mandatory field
-    collection_index_type: Literal["IVF_FLAT", "HNSW"] = Field("IVF_FLAT", description="Collection Index Type")  # Default to IVF_FLAT, options are IVF_FLAT or HNSW
+    collection_index_type: Optional[Literal["IVF_FLAT", "HNSW", "IVF_SQ8", "IVF_PQ", "DISKANN", "SCANN"]] = Field(None, description="Collection Index Type")  # Optional field, read from the collection config when not given
     query: str = Field(..., description="Search Query")  # Mandatory field
     number_results: int = Field(..., description="Number of Results")  # Mandatory field
-    rerank: Optional[bool] = Field(False, description="Rerank Documents")  # Optional field
\ No newline at end of file
+    candidate_k: Optional[int] = Field(None, description="Candidates fetched from the vector search")  # Optional field, number_results * RERANK_CANDIDATE_FACTOR when reranking
+    final_k: Optional[int] = Field(None, description="Results returned after the rerank")  # Optional field, defaults to number_results
+    rerank_budget_ms: Optional[float] = Field(None, description="Reranker time slice, unscored candidates keep their vector order")  # Optional field, defaults to RERANK_BUDGET_MS
+    rerank: Optional[bool] = Field(False, description="Rerank Documents")  # Optional field
+    hybrid: Optional[bool] = Field(None, description="Fuse the sparse lexical search of hybrid collections")  # Optional field, False searches the dense vectors only
+
+    # Validator for candidate and final depth of the two-stage search
+    @model_validator(mode="after")
+    def validate_candidate_k(self):
+        if self.candidate_k is not None and self.candidate_k < (self.final_k or self.number_results):
+            raise ValueError("'candidate_k' must be greater than or equal to 'final_k'.")
+        return self
@@ -0,0 +1,327 @@
+import os
+import json
+import time
+import hashlib
+import threading
+import unicodedata
+from array import array
+from collections import OrderedDict
+from dotenv import load_dotenv
+load_dotenv()
+from ManageMetrics import get_metrics_registry
+from ManageIngestionRegistry import hash_chunk
+
+try:
+    import redis  # Optional shared cache backend
+    import redis.asyncio as redis_asyncio
+except ImportError:
+    redis = None
+    redis_asyncio = None
+
+def normalize_text(text):
+    """Normalize text for cache keys: unicode form, case and whitespace."""
+    return " ".join(unicodedata.normalize("NFKC", text).casefold().split())
+
+class LRUTTLCache:
+    """Thread-safe in-process LRU cache whose entries also expire after ttl seconds."""
+    def __init__(self, name, max_items=10000, ttl=3600):
+        self.name = name
+        self.max_items = max_items
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self._lock = threading.Lock()
+        metrics = get_metrics_registry()
+        self.hits = metrics.counter(f"{name}_hits", "Cache hits")
+        self.misses = metrics.counter(f"{name}_misses", "Cache misses")
+        self.evictions = metrics.counter(f"{name}_evictions", "Entries evicted by size limit")
+
+    def get(self, key):
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at > time.monotonic():
+                    self.entries.move_to_end(key)
+                    self.hits.inc()
+                    return value
+                del self.entries[key]
+        self.misses.inc()
+        return None
+
+    def set(self, key, value):
+        with self._lock:
+            self.entries[key] = (value, time.monotonic() + self.ttl)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_items:
+                self.entries.popitem(last=False)
+                self.evictions.inc()
+
+    def delete(self, key):
+        with self._lock:
+            self.entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self.entries.clear()
+
+    def __len__(self):
+        return len(self.entries)
+
+class EmbeddingCache:
+    """Query embedding cache keyed on model id and normalized text, with an optional shared Redis tier."""
+    def __init__(self, model_id, max_items=10000, ttl=86400, redis_url=None):
+        self.name = "EmbeddingCache"
+        self.model_id = model_id
+        self.ttl = ttl
+        self.local = LRUTTLCache("embedding_cache", max_items=max_items, ttl=ttl)
+        self.redis = None
+        if redis_url:
+            if redis_asyncio is None:
+                raise Exception("EMBEDDING_CACHE_REDIS_URL is set but the 'redis' package is not installed")
+            self.redis = redis_asyncio.from_url(redis_url)
+        metrics = get_metrics_registry()
+        self.shared_hits = metrics.counter("embedding_cache_shared_hits", "Hits served by the shared backend")
+        self.shared_errors = metrics.counter("embedding_cache_shared_errors", "Shared backend failures, treated as misses")
+
+    def make_key(self, text):
+        digest = hashlib.sha256(f"{self.model_id}\x00{normalize_text(text)}".encode("utf-8")).hexdigest()
+        return f"emb:{digest}"
+
+    async def get(self, text):
+        key = self.make_key(text)
+        vector = self.local.get(key)
+        if vector is not None or self.redis is None:
+            return vector
+        try:
+            raw = await self.redis.get(key)
+        except Exception:
+            self.shared_errors.inc()
+            return None
+        if raw is None:
+            return None
+        vector = array("f", raw).tolist()
+        self.local.set(key, vector)
+        self.shared_hits.inc()
+        return vector
+
+    async def set(self, text, vector):
+        key = self.make_key(text)
+        self.local.set(key, vector)
+        if self.redis is not None:
+            try:
+                await self.redis.set(key, array("f", vector).tobytes(), ex=int(self.ttl))
+            except Exception:
+                self.shared_errors.inc()
+
+embedding_cache = None
+embedding_cache_lock = threading.Lock()
+
+def get_embedding_cache():
+    """Return the global query embedding cache instance, or None when disabled."""
+    global embedding_cache
+    if os.getenv("EMBEDDING_CACHE_ENABLED", "true").lower() != "true":
+        return None
+    if embedding_cache is None:
+        with embedding_cache_lock:
+            if embedding_cache is None:
+                embedding_cache = EmbeddingCache(
+                    model_id=os.getenv("EMBEDDING_MODEL_ID", "onprem-multilingual-e5-small"),
+                    max_items=int(os.getenv("EMBEDDING_CACHE_MAX_ITEMS", 10000)),
+                    ttl=float(os.getenv("EMBEDDING_CACHE_TTL", 86400)),
+                    redis_url=os.getenv("EMBEDDING_CACHE_REDIS_URL")
+                )
+    return embedding_cache
+
+class RerankScoreCache:
+    """Cross-encoder pair score cache keyed on model id, normalized query and chunk content hash."""
+    def __init__(self, model_id, max_items=100000, ttl=86400):
+        self.name = "RerankScoreCache"
+        self.model_id = model_id
+        # Hit rate per pair: rerank_score_cache_hits / (hits + misses)
+        self.local = LRUTTLCache("rerank_score_cache", max_items=max_items, ttl=ttl)
+
+    def make_key(self, query, text):
+        return hashlib.sha256(f"{self.model_id}\x00{normalize_text(query)}\x00{hash_chunk(text)}".encode("utf-8")).hexdigest()
+
+    def get_many(self, query, texts):
+        """Cached score of each (query, text) pair, None for misses."""
+        return [self.local.get(self.make_key(query, text)) for text in texts]
+
+    def set_many(self, query, texts, scores):
+        # Pairs left unscored by a rerank budget are not cached
+        for text, score in zip(texts, scores):
+            if score is not None:
+                self.local.set(self.make_key(query, text), score)
+
+rerank_score_cache = None
+rerank_score_cache_lock = threading.Lock()
+
+def get_rerank_score_cache():
+    """Return the global rerank score cache instance, or None when disabled."""
+    global rerank_score_cache
+    if os.getenv("RERANK_CACHE_ENABLED", "true").lower() != "true":
+        return None
+    if rerank_score_cache is None:
+        with rerank_score_cache_lock:
+            if rerank_score_cache is None:
+                rerank_score_cache = RerankScoreCache(
+                    model_id=os.getenv("RERANK_MODEL_ID", "onprem-bge-reranker-base"),
+                    max_items=int(os.getenv("RERANK_CACHE_MAX_ITEMS", 100000)),
+                    ttl=float(os.getenv("RERANK_CACHE_TTL", 86400))
+                )
+    return rerank_score_cache
+
+class SearchResultCache:
+    """End-to-end /search result cache with a memory budget, TTL and invalidation per (client, project, collection) scope."""
+    def __init__(self, max_bytes=64 * 1024 * 1024, ttl=300, redis_url=None, pending_insert_max_age=3600):
+        self.name = "SearchResultCache"
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.pending_insert_max_age = pending_insert_max_age  # Seconds before a task whose result never lands stops holding its scope
+        self.entries = OrderedDict()  # key -> (value, size, expires_at, scope)
+        self.scope_keys = {}  # scope -> keys cached for it
+        self.scope_generations = {}  # Local generation, bumped on every invalidation
+        self.pending_inserts = {}  # scope -> {insert task id not finished yet: tracked at}
+        self.current_bytes = 0
+        self._lock = threading.Lock()
+        self.redis = None
+        if redis_url:
+            if redis_asyncio is None:
+                raise Exception("SEARCH_CACHE_REDIS_URL is set but the 'redis' package is not installed")
+            self.redis = redis_asyncio.from_url(redis_url)
+        metrics = get_metrics_registry()
+        self.hits = metrics.counter("search_cache_hits", "Cache hits")
+        self.misses = metrics.counter("search_cache_misses", "Cache misses")
+        self.evictions = metrics.counter("search_cache_evictions", "Entries evicted by memory limit")
+        self.invalidations = metrics.counter("search_cache_invalidations", "Scope invalidations")
+        self.shared_errors = metrics.counter("search_cache_shared_errors", "Shared backend failures, cache bypassed")
+
+    def scope_key(self, scope):
+        return "search-gen:" + ":".join(scope)
+
+    async def get_generation(self, scope):
+        generation = self.scope_generations.get(scope, 0)
+        if self.redis is not None:
+            # Shared generation lets the insert worker and other API workers invalidate this process
+            shared_generation = await self.redis.get(self.scope_key(scope))
+            generation = f"{generation}.{int(shared_generation or 0)}"
+        return generation
+
+    def make_key(self, scope, generation, params):
+        payload = json.dumps([list(scope), generation, params], sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def estimate_size(self, key, value):
+        return len(key) + sum(len(str(item.get("text", ""))) + 64 for item in value)
+
+    def _remove(self, key):
+        value, size, expires_at, scope = self.entries.pop(key)
+        self.current_bytes -= size
+        keys = self.scope_keys.get(scope)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self.scope_keys[scope]
+
+    def is_cacheable(self, scope):
+        # Results of a scope with a running insert would go stale as soon as the task finishes
+        return not self.pending_inserts.get(scope)
+
+    async def lookup(self, scope, params):
+        """Return (key, cached value), key is None when the scope must not be cached right now."""
+        if not self.is_cacheable(scope):
+            return None, None
+        try:
+            # The key pins the generation seen before the search, so a concurrent invalidation makes it unreachable
+            key = self.make_key(scope, await self.get_generation(scope), params)
+        except Exception:
+            self.shared_errors.inc()
+            return None, None
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                if entry[2] > time.monotonic():
+                    self.entries.move_to_end(key)
+                    self.hits.inc()
+                    return key, entry[0]
+                self._remove(key)
+        self.misses.inc()
+        return key, None
+
+    def store(self, key, scope, value):
+        if key is None or not self.is_cacheable(scope):
+            return
+        size = self.estimate_size(key, value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self.entries:
+                self._remove(key)
+            self.entries[key] = (value, size, time.monotonic() + self.ttl, scope)
+            self.scope_keys.setdefault(scope, set()).add(key)
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes:
+                self._remove(next(iter(self.entries)))
+                self.evictions.inc()
+
+    async def invalidate_scope(self, scope):
+        """Drop every cached result of a (client_id, project_id, collection_name) scope."""
+        with self._lock:
+            self.scope_generations[scope] = self.scope_generations.get(scope, 0) + 1
+            for key in list(self.scope_keys.get(scope, ())):
+                self._remove(key)
+        self.invalidations.inc()
+        if self.redis is not None:
+            try:
+                await self.redis.incr(self.scope_key(scope))
+            except Exception:
+                self.shared_errors.inc()
+
+    async def track_pending_insert(self, scope, task_id):
+        """Bypass the cache for a scope until its insert task is finished."""
+        self.pending_inserts.setdefault(scope, {})[task_id] = time.monotonic()
+        await self.invalidate_scope(scope)
+
+    def get_pending_inserts(self, scope):
+        """Return [(task_id, expired)], expired tasks are past pending_insert_max_age."""
+        now = time.monotonic()
+        return [(task_id, now - tracked_at > self.pending_insert_max_age) for task_id, tracked_at in list(self.pending_inserts.get(scope, {}).items())]
+
+    async def complete_pending_insert(self, scope, task_id):
+        tasks = self.pending_inserts.get(scope)
+        if tasks is not None and task_id in tasks:
+            del tasks[task_id]
+            if not tasks:
+                del self.pending_inserts[scope]
+            await self.invalidate_scope(scope)
+
+def invalidate_shared_search_scope(scope):
+    """Bump the shared generation of a scope from outside the API, e.g. the insert worker."""
+    redis_url = os.getenv("SEARCH_CACHE_REDIS_URL")
+    if not redis_url or redis is None:
+        return
+    client = redis.Redis.from_url(redis_url)
+    try:
+        client.incr("search-gen:" + ":".join(scope))
+    finally:
+        client.close()
+
+search_result_cache = None
+search_result_cache_lock = threading.Lock()
+
+def get_search_result_cache():
+    """Return the global search result cache instance, or None when disabled."""
+    global search_result_cache
+    # Without Redis a /delete only invalidates the API worker that handled it, so the cache is opt-in
+    if os.getenv("SEARCH_CACHE_ENABLED", "true" if os.getenv("SEARCH_CACHE_REDIS_URL") else "false").lower() != "true":
+        return None
+    if search_result_cache is None:
+        with search_result_cache_lock:
+            if search_result_cache is None:
+                search_result_cache = SearchResultCache(
+                    max_bytes=int(os.getenv("SEARCH_CACHE_MAX_BYTES", 64 * 1024 * 1024)),
+                    ttl=float(os.getenv("SEARCH_CACHE_TTL", 300)),
+                    redis_url=os.getenv("SEARCH_CACHE_REDIS_URL"),
+                    pending_insert_max_age=float(os.getenv("SEARCH_CACHE_PENDING_INSERT_MAX_AGE", 3600))
+                )
+    return search_result_cache
@@ -0,0 +1,180 @@
+import os
+import json
+import time
+import hashlib
+import sqlite3
+import threading
+from dotenv import load_dotenv
+load_dotenv()
+
+# Build and search params a collection gets when nothing else is configured
+DEFAULT_INDEX_PARAMS = {
+    "IVF_FLAT": {"nlist": 128},
+    "HNSW": {"M": 64, "efConstruction": 64},
+    "IVF_SQ8": {"nlist": 128},
+    "IVF_PQ": {"nlist": 128, "m": 48, "nbits": 8},  # m must divide the vector dim (384)
+    "DISKANN": {},
+    "SCANN": {"nlist": 128, "with_raw_data": True},
+}
+# refine_factor is applied by ManageVectorDB, not sent to Milvus: refine_factor * k candidates are re-scored on raw vectors
+DEFAULT_SEARCH_PARAMS = {
+    "IVF_FLAT": {"nprobe": 32},
+    "HNSW": {"ef": 64},
+    "IVF_SQ8": {"nprobe": 32, "refine_factor": 2},
+    "IVF_PQ": {"nprobe": 32, "refine_factor": 4},
+    "DISKANN": {"search_list": 100},
+    "SCANN": {"nprobe": 32, "reorder_k": 100},
+}
+
+# Fusion of the dense and sparse result lists of a hybrid search, weights are (dense, sparse)
+# and each list holds candidate_factor * k hits before fusion
+DEFAULT_HYBRID_PARAMS = {
+    "ranker": "rrf",
+    "rrf_k": 60,
+    "weights": [0.7, 0.3],
+    "candidate_factor": 2,
+    "drop_ratio_build": 0.2,
+    "drop_ratio_search": 0.2,
+}
+
+# Scalar indexes of the fields every search filter and delete expression matches on
+SCALAR_INDEX_TYPES = {
+    "client_id": "INVERTED",
+    "project_id": "INVERTED",
+    "file_id": "Trie",  # Unique per file, equality and prefix lookups
+    "tenant_key": "INVERTED",
+}
+
+TENANT_MODES = ("filter", "partition_key", "partitions")
+
+def get_tenant_key(client_id, project_id):
+    """Opaque composite tenant key, safe to embed in expressions whatever the ids contain."""
+    return hashlib.sha1(json.dumps([client_id, project_id]).encode("utf-8")).hexdigest()
+
+def get_tenant_partition(client_id, project_id):
+    # Partition names only allow letters, digits and underscores
+    return f"tenant_{get_tenant_key(client_id, project_id)[:32]}"
+
+class ManageCollectionConfig:
+    """SQLite store of the index type, build params and search params of each collection."""
+    def __init__(self, db_path=None, cache_ttl=30):
+        self.name = "ManageCollectionConfig"
+        self.db_path = db_path or os.getenv("COLLECTION_CONFIG_PATH", "collection_config.sqlite")
+        self.cache_ttl = cache_ttl
+        self._cache = {}
+        self._lock = threading.Lock()
+        with self.connect() as connection:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("""
+                CREATE TABLE IF NOT EXISTS collections (
+                    collection_name TEXT PRIMARY KEY,
+                    index_type TEXT NOT NULL,
+                    metric_type TEXT NOT NULL,
+                    index_params TEXT NOT NULL,
+                    search_params TEXT NOT NULL,
+                    updated_at REAL NOT NULL,
+                    tenancy TEXT NOT NULL DEFAULT '{"mode": "filter"}',
+                    hybrid TEXT NOT NULL DEFAULT '{"enabled": false}'
+                )
+            """)
+            # Config files written before tenancy existed
+            columns = [row[1] for row in connection.execute("PRAGMA table_info(collections)")]
+            if "tenancy" not in columns:
+                connection.execute("""ALTER TABLE collections ADD COLUMN tenancy TEXT NOT NULL DEFAULT '{"mode": "filter"}'""")
+            if "hybrid" not in columns:
+                connection.execute("""ALTER TABLE collections ADD COLUMN hybrid TEXT NOT NULL DEFAULT '{"enabled": false}'""")
+
+    def connect(self):
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def build_config(self, index_type, index_params=None, search_params=None, metric_type="COSINE", tenant_mode="filter", num_partitions=None, hybrid=False, hybrid_params=None):
+        if index_type not in DEFAULT_INDEX_PARAMS:
+            raise Exception(f"Unsupported index type: {index_type}")
+        if tenant_mode not in TENANT_MODES:
+            raise Exception(f"Unsupported tenant mode: {tenant_mode}")
+        tenancy = {"mode": tenant_mode}
+        if tenant_mode == "partition_key":
+            tenancy["num_partitions"] = num_partitions or 64
+        return {
+            "index_type": index_type,
+            "metric_type": metric_type,
+            "index_params": {**DEFAULT_INDEX_PARAMS[index_type], **(index_params or {})},
+            "search_params": {**DEFAULT_SEARCH_PARAMS[index_type], **(search_params or {})},
+            "tenancy": tenancy,
+            "hybrid": {"enabled": True, **DEFAULT_HYBRID_PARAMS, **(hybrid_params or {})} if hybrid else {"enabled": False},
+        }
+
+    def get(self, collection_name):
+        """Return the config of a collection or None, cached for cache_ttl seconds so tuned params reach every worker."""
+        entry = self._cache.get(collection_name)
+        if entry is not None and entry[1] > time.monotonic():
+            return entry[0]
+        with self.connect() as connection:
+            row = connection.execute(
+                "SELECT index_type, metric_type, index_params, search_params, tenancy, hybrid FROM collections WHERE collection_name = ?",
+                (collection_name,)
+            ).fetchone()
+        config = None
+        if row is not None:
+            config = {
+                "index_type": row[0],
+                "metric_type": row[1],
+                "index_params": json.loads(row[2]),
+                "search_params": json.loads(row[3]),
+                "tenancy": json.loads(row[4]),
+                "hybrid": json.loads(row[5]),
+            }
+        with self._lock:
+            self._cache[collection_name] = (config, time.monotonic() + self.cache_ttl)
+        return config
+
+    def save(self, collection_name, config):
+        with self.connect() as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO collections (collection_name, index_type, metric_type, index_params, search_params, updated_at, tenancy, hybrid) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (collection_name, config["index_type"], config["metric_type"], json.dumps(config["index_params"]), json.dumps(config["search_params"]), time.time(), json.dumps(config.get("tenancy", {"mode": "filter"})), json.dumps(config.get("hybrid", {"enabled": False})))
+            )
+        with self._lock:
+            self._cache.pop(collection_name, None)
+
+    def delete(self, collection_name):
+        with self.connect() as connection:
+            connection.execute("DELETE FROM collections WHERE collection_name = ?", (collection_name,))
+        with self._lock:
+            self._cache.pop(collection_name, None)
+
+    def rename(self, old_collection_name, new_collection_name):
+        with self.connect() as connection:
+            connection.execute("DELETE FROM collections WHERE collection_name = ?", (new_collection_name,))
+            connection.execute("UPDATE collections SET collection_name = ? WHERE collection_name = ?", (new_collection_name, old_collection_name))
+        with self._lock:
+            self._cache.pop(old_collection_name, None)
+            self._cache.pop(new_collection_name, None)
+
+    def get_refine_factor(self, config):
+        return int(config["search_params"].get("refine_factor", 1))
+
+    def get_search_params(self, config, number_results):
+        """Milvus search params for a search returning number_results candidates."""
+        params = dict(config["search_params"])
+        params.pop("refine_factor", None)
+        # Candidate lists must be at least as long as the requested results
+        if config["index_type"] == "HNSW":
+            params["ef"] = max(params.get("ef", 0), number_results)
+        elif config["index_type"] == "DISKANN":
+            params["search_list"] = max(params.get("search_list", 0), number_results)
+        elif config["index_type"] == "SCANN":
+            params["reorder_k"] = max(params.get("reorder_k", 0), number_results)
+        return params
+
+collection_config = None
+collection_config_lock = threading.Lock()
+
+def get_collection_config():
+    """Return the global collection config store instance."""
+    global collection_config
+    if collection_config is None:
+        with collection_config_lock:
+            if collection_config is None:
+                collection_config = ManageCollectionConfig(cache_ttl=float(os.getenv("COLLECTION_CONFIG_CACHE_TTL", 30)))
+    return collection_config
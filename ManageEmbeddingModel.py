@@ -1,14 +1,70 @@
-import torch
-from pymilvus import model
+import os
+import threading
+from dotenv import load_dotenv
+load_dotenv()
 
 model_path = "./models/onprem-multilingual-e5-small"
-device = 'cuda:0' if torch.cuda.is_available() else 'cpu'
-print(f"Embedding Model Device: {device}")
-sentence_transformers_model = model.dense.SentenceTransformerEmbeddingFunction(
-    model_name=model_path,
-    device=device
-)
+# Loaded on first use, importing this module does not import torch
+sentence_transformers_model = None
+sentence_transformers_model_lock = threading.Lock()
+
+def load_sentence_transformers_model():
+    # torch on CUDA or CPU, or onnx: ONNX Runtime on CPU with the files written by models/export_onnx_models.py
+    if os.getenv("INFERENCE_BACKEND", "torch") == "onnx":
+        from ManageOnnxModel import OnnxEmbeddingFunction
+        onnx_file = os.getenv("ONNX_EMBEDDING_MODEL_FILE", "onnx/model_int8.onnx")
+        print(f"Embedding Model Backend: onnx ({onnx_file})")
+        loaded_model = OnnxEmbeddingFunction(model_path, onnx_file)
+    else:
+        import torch
+        from pymilvus import model
+        device = 'cuda:0' if torch.cuda.is_available() else 'cpu'
+        print(f"Embedding Model Device: {device}")
+        loaded_model = model.dense.SentenceTransformerEmbeddingFunction(
+            model_name=model_path,
+            device=device
+        )
+    # Truncation length of document and query encodes
+    if os.getenv("VECTORIZE_MAX_SEQ_LENGTH"):
+        loaded_model.model.max_seq_length = int(os.getenv("VECTORIZE_MAX_SEQ_LENGTH"))
+    return loaded_model
 
 def get_sentence_transformers_model():
-    """Return the global model instance."""
-    return sentence_transformers_model
\ No newline at end of file
+    """Return the global model instance, loading it on the first call."""
+    global sentence_transformers_model
+    if sentence_transformers_model is None:
+        with sentence_transformers_model_lock:
+            if sentence_transformers_model is None:
+                sentence_transformers_model = load_sentence_transformers_model()
+    return sentence_transformers_model
+
+def build_length_buckets(token_lengths, max_bucket_size=32, bucket_token_budget=16384):
+    """Sort indexes by token length and cut them into buckets whose padded size stays within the token budget."""
+    buckets = []
+    current_bucket = []
+    for index in sorted(range(len(token_lengths)), key=lambda i: token_lengths[i]):
+        # Sorted ascending, so the padded length of the bucket is the length of the item being added
+        padded_tokens = (len(current_bucket) + 1) * token_lengths[index]
+        if current_bucket and (len(current_bucket) >= max_bucket_size or padded_tokens > bucket_token_budget):
+            buckets.append(current_bucket)
+            current_bucket = []
+        current_bucket.append(index)
+    if current_bucket:
+        buckets.append(current_bucket)
+    return buckets
+
+def encode_documents_bucketed(texts, max_bucket_size=32, bucket_token_budget=16384):
+    """Encode documents in length buckets so each forward pass pads to a tight length, returns (vectors, truncated) in input order."""
+    embedding_model = get_sentence_transformers_model()
+    transformer = embedding_model.model
+    max_seq_length = transformer.max_seq_length
+    token_lengths = [len(ids) for ids in transformer.tokenizer(texts, add_special_tokens=True, truncation=False)["input_ids"]]
+    truncated = sum(1 for length in token_lengths if length > max_seq_length)
+    token_lengths = [min(length, max_seq_length) for length in token_lengths]
+
+    vectors = [None] * len(texts)
+    for bucket in build_length_buckets(token_lengths, max_bucket_size, bucket_token_budget):
+        bucket_vectors = embedding_model.encode_documents([texts[index] for index in bucket])
+        for index, vector in zip(bucket, bucket_vectors):
+            vectors[index] = vector
+    return vectors, truncated
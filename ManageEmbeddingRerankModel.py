@@ -1,15 +1,55 @@
-import torch
-from pymilvus import model
+import os
+import threading
+from dotenv import load_dotenv
+load_dotenv()
+from ManageEmbeddingModel import build_length_buckets
 
 model_path = "./models/onprem-bge-reranker-base"
-device = 'cuda:0' if torch.cuda.is_available() else 'cpu'
-print(f"Reranker Model Device: {device}")
-reranker_model = model.reranker.BGERerankFunction(
-    model_name=model_path,
-    device=device,
-    use_fp16=True
-)
+# Loaded on first use, importing this module does not import torch
+reranker_model = None
+reranker_model_lock = threading.Lock()
+
+def load_reranker_model():
+    # Same backend choice as the embedding model
+    if os.getenv("INFERENCE_BACKEND", "torch") == "onnx":
+        from ManageOnnxModel import OnnxRerankFunction
+        onnx_file = os.getenv("ONNX_RERANK_MODEL_FILE", "onnx/model_int8.onnx")
+        print(f"Reranker Model Backend: onnx ({onnx_file})")
+        return OnnxRerankFunction(model_path, onnx_file)
+    import torch
+    from pymilvus import model
+    device = 'cuda:0' if torch.cuda.is_available() else 'cpu'
+    print(f"Reranker Model Device: {device}")
+    return model.reranker.BGERerankFunction(
+        model_name=model_path,
+        device=device,
+        use_fp16=device.startswith("cuda")  # fp16 only pays off on GPU
+    )
 
 def get_reranker_model_model():
-    """Return the global model instance."""
-    return reranker_model
\ No newline at end of file
+    """Return the global model instance, loading it on the first call."""
+    global reranker_model
+    if reranker_model is None:
+        with reranker_model_lock:
+            if reranker_model is None:
+                reranker_model = load_reranker_model()
+    return reranker_model
+
+def score_pairs(pairs):
+    """Reranker scores of (query, document) pairs in input order."""
+    reranker = get_reranker_model_model()
+    scores = reranker.reranker.compute_score([list(pair) for pair in pairs], normalize=reranker.normalize)
+    # A single pair comes back as a bare float
+    return [float(score) for score in scores] if isinstance(scores, list) else [float(scores)]
+
+def score_pairs_bucketed(pairs, max_bucket_size=32, bucket_token_budget=16384, max_length=512):
+    """Score a packed batch of pairs in length buckets so each cross-encoder pass pads to a tight length, returns scores in input order."""
+    tokenizer = get_reranker_model_model().reranker.tokenizer
+    token_lengths = [
+        len(ids) for ids in tokenizer([query for query, _ in pairs], [document for _, document in pairs], truncation=True, max_length=max_length)["input_ids"]
+    ]
+    scores = [None] * len(pairs)
+    for bucket in build_length_buckets(token_lengths, max_bucket_size, bucket_token_budget):
+        for index, score in zip(bucket, score_pairs([pairs[index] for index in bucket])):
+            scores[index] = score
+    return scores
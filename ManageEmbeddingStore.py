@@ -0,0 +1,143 @@
+import os
+import uuid
+import sqlite3
+import threading
+import numpy as np
+from pathlib import Path
+from dotenv import load_dotenv
+load_dotenv()
+
+class ManageEmbeddingStore:
+    """Local store of chunk vectors in contiguous memory-mapped .npy segments, indexed by chunk hash."""
+    def __init__(self, root_path, model_id, dtype="float32"):
+        self.name = "ManageEmbeddingStore"
+        if dtype not in ("float32", "float16"):
+            raise Exception(f"Unsupported embedding store dtype: {dtype}")
+        # Vectors only make sense for the model that produced them, each model gets its own directory
+        self.path = Path(root_path) / model_id
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.dtype = np.dtype(dtype)
+        self.index_path = self.path / "index.sqlite"
+        self._segments = {}
+        self._lock = threading.Lock()
+        with self.connect() as connection:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("""
+                CREATE TABLE IF NOT EXISTS vectors (
+                    chunk_hash TEXT PRIMARY KEY,
+                    segment TEXT NOT NULL,
+                    row INTEGER NOT NULL
+                )
+            """)
+
+    def connect(self):
+        return sqlite3.connect(self.index_path, timeout=30)
+
+    def get_segment(self, segment):
+        # Segments are immutable once written, their memory maps are opened once per process
+        array = self._segments.get(segment)
+        if array is None:
+            with self._lock:
+                array = self._segments.get(segment)
+                if array is None:
+                    array = np.load(self.path / segment, mmap_mode="r")
+                    self._segments[segment] = array
+        return array
+
+    def lookup(self, hashes):
+        """Return {chunk_hash: (segment, row)} of the stored hashes."""
+        locations = {}
+        hashes = list(set(hashes))
+        with self.connect() as connection:
+            for i in range(0, len(hashes), 500):
+                batch = hashes[i:i + 500]
+                rows = connection.execute(
+                    f"SELECT chunk_hash, segment, row FROM vectors WHERE chunk_hash IN ({','.join('?' * len(batch))})",
+                    batch
+                ).fetchall()
+                locations.update({chunk_hash: (segment, row) for chunk_hash, segment, row in rows})
+        return locations
+
+    def get(self, hashes):
+        """Return {chunk_hash: float32 vector} of the stored hashes, rows of a segment are read in one gather."""
+        by_segment = {}
+        for chunk_hash, (segment, row) in self.lookup(hashes).items():
+            by_segment.setdefault(segment, ([], []))
+            by_segment[segment][0].append(chunk_hash)
+            by_segment[segment][1].append(row)
+        vectors = {}
+        for segment, (chunk_hashes, rows) in by_segment.items():
+            order = np.argsort(rows)
+            block = np.asarray(self.get_segment(segment)[np.asarray(rows)[order]], dtype=np.float32)
+            vectors.update({chunk_hashes[i]: block[position] for position, i in enumerate(order)})
+        return vectors
+
+    def put(self, hashes, vectors):
+        """Append vectors of hashes not stored yet as one new segment, returns the number written."""
+        known = self.lookup(hashes)
+        rows = {}
+        for chunk_hash, vector in zip(hashes, vectors):
+            if chunk_hash not in known and chunk_hash not in rows:
+                rows[chunk_hash] = vector
+        if not rows:
+            return 0
+        segment = f"segment-{uuid.uuid4().hex}.npy"
+        array = np.asarray(list(rows.values()), dtype=self.dtype)
+        # Write then rename, readers never see a partial segment
+        temporary_path = self.path / f"{segment}.tmp"
+        with open(temporary_path, "wb") as file:
+            np.save(file, array)
+        os.replace(temporary_path, self.path / segment)
+        with self.connect() as connection:
+            connection.executemany(
+                "INSERT OR IGNORE INTO vectors VALUES (?, ?, ?)",
+                [(chunk_hash, segment, row) for row, chunk_hash in enumerate(rows)]
+            )
+        return len(rows)
+
+    def compact(self):
+        """Merge every segment into one contiguous segment and drop the old files, run it while no reindex is reading."""
+        with self.connect() as connection:
+            rows = connection.execute("SELECT chunk_hash, segment, row FROM vectors ORDER BY segment, row").fetchall()
+        if not rows:
+            return 0
+        segment = f"segment-{uuid.uuid4().hex}.npy"
+        array = np.lib.format.open_memmap(self.path / f"{segment}.tmp", mode="w+", dtype=self.dtype, shape=(len(rows), self.get_segment(rows[0][1]).shape[1]))
+        start = 0
+        while start < len(rows):
+            end = start
+            while end < len(rows) and rows[end][1] == rows[start][1]:
+                end += 1
+            array[start:end] = self.get_segment(rows[start][1])[[row for _, _, row in rows[start:end]]]
+            start = end
+        array.flush()
+        del array
+        os.replace(self.path / f"{segment}.tmp", self.path / segment)
+        old_segments = {row[1] for row in rows}
+        with self.connect() as connection:
+            # Only rows of the merged segments are replaced, writes made meanwhile keep their own segments
+            connection.executemany("DELETE FROM vectors WHERE segment = ?", [(old_segment,) for old_segment in old_segments])
+            connection.executemany("INSERT INTO vectors VALUES (?, ?, ?)", [(chunk_hash, segment, row) for row, (chunk_hash, _, _) in enumerate(rows)])
+        with self._lock:
+            self._segments.clear()
+        for old_segment in old_segments:
+            (self.path / old_segment).unlink(missing_ok=True)
+        return len(rows)
+
+embedding_store = None
+embedding_store_lock = threading.Lock()
+
+def get_embedding_store():
+    """Return the global embedding store instance, or None when disabled."""
+    global embedding_store
+    if os.getenv("EMBEDDING_STORE_ENABLED", "true").lower() != "true":
+        return None
+    if embedding_store is None:
+        with embedding_store_lock:
+            if embedding_store is None:
+                embedding_store = ManageEmbeddingStore(
+                    root_path=os.getenv("EMBEDDING_STORE_PATH", "embedding_store"),
+                    model_id=os.getenv("EMBEDDING_MODEL_ID", "onprem-multilingual-e5-small"),
+                    dtype=os.getenv("EMBEDDING_STORE_DTYPE", "float32")
+                )
+    return embedding_store
@@ -0,0 +1,119 @@
+import os
+import time
+import threading
+from urllib.parse import urlparse
+import httpx
+from dotenv import load_dotenv
+load_dotenv()
+from ManageMetrics import get_metrics_registry
+
+class ManageHttpClient:
+    """Long-lived httpx clients with keep-alive pools, shared by every call to the vectorizer service."""
+    def __init__(self):
+        self.name = "ManageHttpClient"
+        self.limits = httpx.Limits(
+            max_connections=int(os.getenv("HTTP_MAX_CONNECTIONS", 100)),
+            max_keepalive_connections=int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", 20)),
+            keepalive_expiry=float(os.getenv("HTTP_KEEPALIVE_EXPIRY", 30))
+        )
+        self.timeout = httpx.Timeout(
+            float(os.getenv("HTTP_TIMEOUT", 60)),
+            pool=float(os.getenv("HTTP_POOL_TIMEOUT", 10))
+        )
+        self.http2 = os.getenv("HTTP_HTTP2", "false").lower() == "true"  # Requires httpx[http2]
+        self.async_client = None
+        self.sync_client = None
+        self.metrics = get_metrics_registry()
+        self._lock = threading.Lock()
+
+    async def start(self):
+        if self.async_client is None:
+            self.async_client = httpx.AsyncClient(limits=self.limits, timeout=self.timeout, http2=self.http2)
+        return self.async_client
+
+    async def close(self):
+        if self.async_client is not None:
+            await self.async_client.aclose()
+            self.async_client = None
+        self.close_sync()
+
+    def get_async_client(self):
+        # Normally created by the FastAPI lifespan, lazily created for scripts and tests
+        if self.async_client is None:
+            self.async_client = httpx.AsyncClient(limits=self.limits, timeout=self.timeout, http2=self.http2)
+        return self.async_client
+
+    def get_sync_client(self):
+        if self.sync_client is None:
+            with self._lock:
+                if self.sync_client is None:
+                    self.sync_client = httpx.Client(limits=self.limits, timeout=self.timeout, http2=self.http2)
+        return self.sync_client
+
+    def close_sync(self):
+        if self.sync_client is not None:
+            self.sync_client.close()
+            self.sync_client = None
+
+    def _on_trace_event(self, timing, event_name):
+        now = time.perf_counter()
+        # The first connection event marks the moment a connection was acquired from the pool
+        timing.setdefault("acquired", now)
+        if event_name == "connection.connect_tcp.started":
+            timing["connect_started"] = now
+        elif event_name.endswith(".send_request_headers.started"):
+            timing.setdefault("connect_complete", now)
+            timing["request_started"] = now
+        elif event_name.endswith(".receive_response_headers.complete"):
+            timing["response_started"] = now
+
+    def _finish_timing(self, url, timing, start):
+        end = time.perf_counter()
+        acquired = timing.get("acquired", end)
+        request_started = timing.get("request_started", acquired)
+        result = {
+            "pool_wait": acquired - start,
+            "connect": timing["connect_complete"] - timing["connect_started"] if "connect_started" in timing and "connect_complete" in timing else 0.0,
+            "server": timing.get("response_started", end) - request_started,
+            "total": end - start
+        }
+        path = urlparse(str(url)).path
+        for key, value in result.items():
+            self.metrics.histogram(f"http_{key}_seconds:{path}").observe(value)
+        return result
+
+    async def post(self, url, json, timeout=None):
+        """POST with the shared async client, timing is attached as response.extensions["timing"]."""
+        timing = {}
+        async def trace(event_name, info):
+            self._on_trace_event(timing, event_name)
+        start = time.perf_counter()
+        response = await self.get_async_client().post(
+            url,
+            json=json,
+            timeout=timeout if timeout is not None else self.timeout,
+            extensions={"trace": trace}
+        )
+        response.extensions["timing"] = self._finish_timing(url, timing, start)
+        return response
+
+    def post_sync(self, url, json, timeout=None):
+        """POST with the shared sync client, timing is attached as response.extensions["timing"]."""
+        timing = {}
+        def trace(event_name, info):
+            self._on_trace_event(timing, event_name)
+        start = time.perf_counter()
+        response = self.get_sync_client().post(
+            url,
+            json=json,
+            timeout=timeout if timeout is not None else self.timeout,
+            extensions={"trace": trace}
+        )
+        response.extensions["timing"] = self._finish_timing(url, timing, start)
+        return response
+
+http_client = ManageHttpClient()
+
+def get_http_client():
+    """Return the global http client instance."""
+    return http_client
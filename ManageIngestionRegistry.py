@@ -0,0 +1,235 @@
+import os
+import re
+import json
+import time
+import uuid
+import socket
+import sqlite3
+import hashlib
+import threading
+from pathlib import Path
+from contextlib import contextmanager
+from dotenv import load_dotenv
+load_dotenv()
+
+# Upload route stores files as "<name>_<uuid4>.pdf", revisions of a document share "<name>"
+UPLOAD_SUFFIX_PATTERN = re.compile(r"_[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$")
+
+def hash_chunk(text):
+    """Content hash of one chunk."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+def hash_file(path, splitter_config):
+    """Content hash of a file together with the splitter settings that produced its chunks."""
+    digest = hashlib.sha256(json.dumps(splitter_config, sort_keys=True).encode("utf-8"))
+    with open(path, "rb") as file:
+        for block in iter(lambda: file.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def get_document_key(path):
+    return UPLOAD_SUFFIX_PATTERN.sub("", Path(path).stem)
+
+class CollectionFencedError(Exception):
+    """Raised when a write reaches a collection that a reindex or migration is copying."""
+
+class ManageIngestionRegistry:
+    """SQLite registry of ingested files and the content hash and Milvus id of each of their chunks."""
+    def __init__(self, db_path=None):
+        self.name = "ManageIngestionRegistry"
+        self.db_path = db_path or os.getenv("INGESTION_REGISTRY_PATH", "ingestion_registry.sqlite")
+        with self.connect() as connection:
+            connection.execute("PRAGMA journal_mode=WAL")
+            # Fences are transient, a table from before fence owners and expiries is recreated
+            fence_columns = [row[1] for row in connection.execute("PRAGMA table_info(write_fences)")]
+            if fence_columns and "expires_at" not in fence_columns:
+                connection.execute("DROP TABLE write_fences")
+            connection.executescript("""
+                CREATE TABLE IF NOT EXISTS files (
+                    file_id TEXT PRIMARY KEY,
+                    client_id TEXT NOT NULL,
+                    project_id TEXT NOT NULL,
+                    collection_name TEXT NOT NULL,
+                    document_key TEXT NOT NULL,
+                    file_hash TEXT NOT NULL,
+                    file_path TEXT NOT NULL,
+                    splitter_config TEXT NOT NULL,
+                    updated_at REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS files_document ON files (client_id, project_id, collection_name, document_key);
+                CREATE INDEX IF NOT EXISTS files_hash ON files (client_id, project_id, collection_name, file_hash);
+                CREATE TABLE IF NOT EXISTS chunks (
+                    file_id TEXT NOT NULL,
+                    position INTEGER NOT NULL,
+                    chunk_hash TEXT NOT NULL,
+                    milvus_id INTEGER NOT NULL,
+                    PRIMARY KEY (file_id, position)
+                );
+                CREATE INDEX IF NOT EXISTS chunks_hash ON chunks (chunk_hash);
+                CREATE TABLE IF NOT EXISTS write_fences (
+                    collection_name TEXT PRIMARY KEY,
+                    fence_id TEXT NOT NULL,
+                    owner TEXT NOT NULL,
+                    reason TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    expires_at REAL NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS write_leases (
+                    lease_id TEXT PRIMARY KEY,
+                    collection_name TEXT NOT NULL,
+                    created_at REAL NOT NULL
+                );
+            """)
+
+    def connect(self):
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def get_file(self, file_id):
+        with self.connect() as connection:
+            connection.row_factory = sqlite3.Row
+            row = connection.execute("SELECT * FROM files WHERE file_id = ?", (file_id,)).fetchone()
+        return dict(row) if row is not None else None
+
+    def find_file_by_hash(self, client_id, project_id, collection_name, file_hash):
+        """Latest file of the scope ingested with the same content and splitter settings, or None."""
+        with self.connect() as connection:
+            connection.row_factory = sqlite3.Row
+            row = connection.execute(
+                "SELECT * FROM files WHERE client_id = ? AND project_id = ? AND collection_name = ? AND file_hash = ? ORDER BY updated_at DESC LIMIT 1",
+                (client_id, project_id, collection_name, file_hash)
+            ).fetchone()
+        return dict(row) if row is not None else None
+
+    def list_files(self, collection_name):
+        with self.connect() as connection:
+            connection.row_factory = sqlite3.Row
+            rows = connection.execute("SELECT * FROM files WHERE collection_name = ? ORDER BY updated_at", (collection_name,)).fetchall()
+        return [dict(row) for row in rows]
+
+    def get_chunks(self, file_id):
+        """Return [(position, chunk_hash, milvus_id)] of a file ordered by position."""
+        with self.connect() as connection:
+            return connection.execute(
+                "SELECT position, chunk_hash, milvus_id FROM chunks WHERE file_id = ? ORDER BY position",
+                (file_id,)
+            ).fetchall()
+
+    def find_chunk_ids(self, collection_name, chunk_hashes):
+        """Return {chunk_hash: milvus_id} for chunks already stored anywhere in the collection."""
+        found = {}
+        chunk_hashes = list(set(chunk_hashes))
+        with self.connect() as connection:
+            for i in range(0, len(chunk_hashes), 500):
+                batch = chunk_hashes[i:i + 500]
+                rows = connection.execute(
+                    f"SELECT chunks.chunk_hash, chunks.milvus_id FROM chunks JOIN files ON files.file_id = chunks.file_id "
+                    f"WHERE files.collection_name = ? AND chunks.chunk_hash IN ({','.join('?' * len(batch))})",
+                    (collection_name, *batch)
+                ).fetchall()
+                found.update(dict(rows))
+        return found
+
+    def save_file(self, file_id, client_id, project_id, collection_name, document_key, file_hash, file_path, splitter_config, chunks):
+        """Replace the registry entry of a file, chunks is [(position, chunk_hash, milvus_id)]."""
+        with self.connect() as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (file_id, client_id, project_id, collection_name, document_key, file_hash, file_path, json.dumps(splitter_config, sort_keys=True), time.time())
+            )
+            connection.execute("DELETE FROM chunks WHERE file_id = ?", (file_id,))
+            connection.executemany("INSERT INTO chunks VALUES (?, ?, ?, ?)", [(file_id, *chunk) for chunk in chunks])
+
+    def delete_file(self, file_id):
+        with self.connect() as connection:
+            connection.execute("DELETE FROM chunks WHERE file_id = ?", (file_id,))
+            connection.execute("DELETE FROM files WHERE file_id = ?", (file_id,))
+
+    def remap_chunk_ids(self, collection_name, id_map):
+        """Point chunks of collection_name at the Milvus ids their rows got after a copy."""
+        with self.connect() as connection:
+            connection.executemany(
+                "UPDATE chunks SET milvus_id = ? WHERE milvus_id = ? AND file_id IN (SELECT file_id FROM files WHERE collection_name = ?)",
+                [(new_id, old_id, collection_name) for old_id, new_id in id_map.items()]
+            )
+
+    @contextmanager
+    def write_lease(self, collection_name):
+        """Hold a lease while inserting into or deleting from a collection, refused with CollectionFencedError while it is fenced."""
+        lease_id = str(uuid.uuid4())
+        with self.connect() as connection:
+            # Immediate transaction, a fence cannot be set between the check and the lease
+            connection.execute("BEGIN IMMEDIATE")
+            fence = connection.execute(
+                "SELECT reason FROM write_fences WHERE collection_name = ? AND expires_at > ?", (collection_name, time.time())
+            ).fetchone()
+            if fence is not None:
+                raise CollectionFencedError(f"Collection '{collection_name}' is fenced for {fence[0]}, retry once it is done")
+            connection.execute("INSERT INTO write_leases VALUES (?, ?, ?)", (lease_id, collection_name, time.time()))
+        try:
+            yield lease_id
+        finally:
+            with self.connect() as connection:
+                connection.execute("DELETE FROM write_leases WHERE lease_id = ?", (lease_id,))
+
+    @contextmanager
+    def write_fence(self, collection_name, reason, timeout=3600, lease_max_age=None, fence_ttl=None):
+        """Refuse new writes to a collection and wait for the running ones, renewed while held so it expires fence_ttl seconds after a crash."""
+        lease_max_age = lease_max_age or float(os.getenv("INGESTION_WRITE_LEASE_MAX_AGE", 21600))
+        fence_ttl = fence_ttl or float(os.getenv("INGESTION_WRITE_FENCE_TTL", 300))
+        fence_id = str(uuid.uuid4())
+        owner = f"{socket.gethostname()}:{os.getpid()}"
+        with self.connect() as connection:
+            connection.execute("BEGIN IMMEDIATE")
+            fence = connection.execute(
+                "SELECT reason, owner FROM write_fences WHERE collection_name = ? AND expires_at > ?", (collection_name, time.time())
+            ).fetchone()
+            if fence is not None:
+                raise Exception(f"Collection '{collection_name}' is already fenced for {fence[0]} by {fence[1]}")
+            # An expired fence of a crashed job is taken over
+            connection.execute(
+                "INSERT OR REPLACE INTO write_fences VALUES (?, ?, ?, ?, ?, ?)",
+                (collection_name, fence_id, owner, reason, time.time(), time.time() + fence_ttl)
+            )
+        released = threading.Event()
+
+        def renew():
+            # Renewed while the job runs, a fence stops being renewed only when its owner is gone
+            while not released.wait(fence_ttl / 3):
+                with self.connect() as connection:
+                    connection.execute(
+                        "UPDATE write_fences SET expires_at = ? WHERE fence_id = ?", (time.time() + fence_ttl, fence_id)
+                    )
+
+        renewer = threading.Thread(target=renew, name=f"fence-{collection_name}", daemon=True)
+        renewer.start()
+        try:
+            # Leases older than lease_max_age belong to crashed workers and are not waited for
+            deadline = time.monotonic() + timeout
+            while True:
+                with self.connect() as connection:
+                    running = connection.execute(
+                        "SELECT COUNT(*) FROM write_leases WHERE collection_name = ? AND created_at > ?",
+                        (collection_name, time.time() - lease_max_age)
+                    ).fetchone()[0]
+                if not running:
+                    break
+                if time.monotonic() > deadline:
+                    raise Exception(f"{running} writes to collection '{collection_name}' still running after {timeout} seconds")
+                time.sleep(2)
+            yield
+        finally:
+            released.set()
+            renewer.join()
+            with self.connect() as connection:
+                connection.execute("DELETE FROM write_fences WHERE fence_id = ?", (fence_id,))
+
+    def clear_fence(self, collection_name):
+        """Remove the fence of a collection whatever its owner, returns (reason, owner) of the removed fence or None."""
+        with self.connect() as connection:
+            fence = connection.execute("SELECT reason, owner FROM write_fences WHERE collection_name = ?", (collection_name,)).fetchone()
+            connection.execute("DELETE FROM write_fences WHERE collection_name = ?", (collection_name,))
+        return fence
+
+def get_ingestion_registry():
+    """Return a registry bound to the configured database file."""
+    return ManageIngestionRegistry()
@@ -0,0 +1,96 @@
+import threading
+from bisect import bisect_left
+
+# Default buckets (seconds) for latency histograms
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+class Counter:
+    def __init__(self, name, description=""):
+        self.name = name
+        self.description = description
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+    def snapshot(self):
+        return {"type": "counter", "description": self.description, "value": self.value}
+
+class Histogram:
+    def __init__(self, name, buckets=LATENCY_BUCKETS, description=""):
+        self.name = name
+        self.description = description
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)  # Last slot is the +Inf bucket
+        self.count = 0
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        with self._lock:
+            self.counts[bisect_left(self.buckets, value)] += 1
+            self.count += 1
+            self.sum += value
+
+    def quantile(self, q):
+        """Approximate quantile, returned as the upper bound of the bucket holding it."""
+        if self.count == 0:
+            return None
+        rank = q * self.count
+        cumulative = 0
+        for index, bucket_count in enumerate(self.counts):
+            cumulative += bucket_count
+            if cumulative >= rank:
+                return self.buckets[index] if index < len(self.buckets) else float("inf")
+        return float("inf")
+
+    def snapshot(self):
+        with self._lock:
+            cumulative = 0
+            buckets = {}
+            for bound, bucket_count in zip(list(self.buckets) + ["+Inf"], self.counts):
+                cumulative += bucket_count
+                buckets[str(bound)] = cumulative
+            return {
+                "type": "histogram",
+                "description": self.description,
+                "count": self.count,
+                "sum": self.sum,
+                "mean": self.sum / self.count if self.count else None,
+                "p50": self.quantile(0.5),
+                "p99": self.quantile(0.99),
+                "buckets": buckets
+            }
+
+class MetricsRegistry:
+    def __init__(self):
+        self.name = "MetricsRegistry"
+        self.metrics = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, name, factory):
+        metric = self.metrics.get(name)
+        if metric is None:
+            with self._lock:
+                metric = self.metrics.get(name)
+                if metric is None:
+                    metric = factory()
+                    self.metrics[name] = metric
+        return metric
+
+    def counter(self, name, description=""):
+        return self._get_or_create(name, lambda: Counter(name, description))
+
+    def histogram(self, name, buckets=LATENCY_BUCKETS, description=""):
+        return self._get_or_create(name, lambda: Histogram(name, buckets, description))
+
+    def snapshot(self):
+        return {name: metric.snapshot() for name, metric in sorted(self.metrics.items())}
+
+metrics_registry = MetricsRegistry()
+
+def get_metrics_registry():
+    """Return the global metrics registry instance."""
+    return metrics_registry
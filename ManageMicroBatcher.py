@@ -0,0 +1,143 @@
+import time
+import asyncio
+from collections import deque
+from ManageMetrics import get_metrics_registry
+
+# Buckets for batch size histograms
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+
+class BacklogFullError(Exception):
+    """Raised when a batcher already holds more pending items than its admission budget."""
+
+class MicroBatcher:
+    """Coalesces concurrent single-item requests into batched calls executed on worker threads, up to max_concurrency at a time."""
+    def __init__(self, name, batch_fn, executor, max_batch_size=32, max_wait_ms=5, max_pending=None, max_concurrency=1):
+        self.name = name
+        self.batch_fn = batch_fn  # Takes a list of items, returns a list of results in the same order
+        self.executor = executor
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.max_pending = max_pending  # None queues without bound
+        self.max_concurrency = max_concurrency  # Batches in flight, items keep gathering while every slot is busy
+        self.pending = deque()
+        self.available = None
+        self.slots = None
+        self.task = None
+        self.running = {}  # Batch tasks in flight and their entries
+        metrics = get_metrics_registry()
+        self.batch_size_histogram = metrics.histogram(f"{name}_batch_size", BATCH_SIZE_BUCKETS, "Items per batched call")
+        self.queue_wait_histogram = metrics.histogram(f"{name}_queue_wait_seconds", description="Time an item waited before its batch started")
+        self.batch_time_histogram = metrics.histogram(f"{name}_batch_seconds", description="Duration of one batched call")
+        self.rejected_counter = metrics.counter(f"{name}_rejected", "Requests rejected because the backlog was over max_pending")
+        self.expired_counter = metrics.counter(f"{name}_expired", "Items answered with None because their deadline passed in the queue")
+
+    async def start(self):
+        if self.task is None:
+            self.available = asyncio.Event()
+            self.slots = asyncio.Semaphore(self.max_concurrency)
+            self.task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+        for task, batch in list(self.running.items()):
+            task.cancel()
+            self.pending.extend(batch)
+        await asyncio.gather(*self.running, return_exceptions=True)
+        self.running = {}
+        while self.pending:
+            _, future, _, _ = self.pending.popleft()
+            if not future.done():
+                future.set_exception(Exception(f"{self.name} batcher stopped"))
+
+    async def submit(self, item):
+        """Queue one item and wait for its result."""
+        return (await self.submit_many([item]))[0]
+
+    async def submit_many(self, items, deadlines=None):
+        """Queue items of one request and wait for all their results, they share batches with the items of other requests.
+
+        An item still queued when its deadline (time.perf_counter() value) passes resolves to None instead of being computed.
+        """
+        if self.task is None:
+            await self.start()
+        # An empty backlog always admits the request, so one request larger than max_pending is not refused on an idle server
+        if self.max_pending is not None and self.pending and len(self.pending) + len(items) > self.max_pending:
+            self.rejected_counter.inc()
+            raise BacklogFullError(f"{self.name} backlog full: {len(self.pending)} pending, {len(items)} requested, max {self.max_pending}")
+        loop = asyncio.get_running_loop()
+        enqueued = time.perf_counter()
+        futures = []
+        for item, deadline in zip(items, deadlines or [None] * len(items)):
+            future = loop.create_future()
+            self.pending.append((item, future, enqueued, deadline))
+            futures.append(future)
+        self.available.set()
+        return await asyncio.gather(*futures)
+
+    async def _collect(self):
+        # Wait for the first item, then keep gathering until the batch is full or max_wait elapsed
+        while not self.pending:
+            self.available.clear()
+            await self.available.wait()
+        deadline = time.perf_counter() + self.max_wait
+        while len(self.pending) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            self.available.clear()
+            try:
+                await asyncio.wait_for(self.available.wait(), remaining)
+            except asyncio.TimeoutError:
+                break
+        batch = []
+        while self.pending and len(batch) < self.max_batch_size:
+            batch.append(self.pending.popleft())
+        return batch
+
+    async def _run(self):
+        while True:
+            # A free slot first, so items arriving while every batch is in flight join the next batch
+            await self.slots.acquire()
+            try:
+                batch = await self._collect()
+            except BaseException:
+                self.slots.release()
+                raise
+            # Drop items whose caller already went away, answer the ones past their deadline without computing them
+            started = time.perf_counter()
+            for _, future, _, deadline in batch:
+                if deadline is not None and deadline <= started and not future.done():
+                    future.set_result(None)
+                    self.expired_counter.inc()
+            batch = [entry for entry in batch if not entry[1].done()]
+            if not batch:
+                self.slots.release()
+                continue
+            for _, _, enqueued, _ in batch:
+                self.queue_wait_histogram.observe(started - enqueued)
+            self.batch_size_histogram.observe(len(batch))
+            task = asyncio.create_task(self._execute(batch, started))
+            self.running[task] = batch
+
+    async def _execute(self, batch, started):
+        loop = asyncio.get_running_loop()
+        try:
+            results = await loop.run_in_executor(self.executor, self.batch_fn, [item for item, _, _, _ in batch])
+        except Exception as e:
+            for _, future, _, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        finally:
+            self.batch_time_histogram.observe(time.perf_counter() - started)
+            self.running.pop(asyncio.current_task(), None)
+            self.slots.release()
+        for (_, future, _, _), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
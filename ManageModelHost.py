@@ -0,0 +1,202 @@
+import os
+import gc
+import sys
+import time
+import signal
+import logging
+import multiprocessing
+from multiprocessing.connection import Listener, Client, wait
+from dotenv import load_dotenv
+load_dotenv()
+
+# Logging Settings
+logging.basicConfig(level=logging.INFO)
+log = logging.getLogger(__name__)
+
+# Calls a model host process accepts and the model each one needs
+MODEL_HOST_METHODS = {
+    "encode_queries": "embedding",
+    "encode_documents_bucketed": "embedding",
+    "score_pairs_bucketed": "reranker",
+    "warm_up": None
+}
+
+def get_served_models():
+    """Models of this deployment from VECTORIZER_MODELS: embedding, reranker or both."""
+    served = tuple(model.strip() for model in os.getenv("VECTORIZER_MODELS", "embedding,reranker").split(",") if model.strip())
+    unknown = set(served) - {"embedding", "reranker"}
+    if unknown:
+        raise Exception(f"Failed to read VECTORIZER_MODELS: unknown models {sorted(unknown)}")
+    return served
+
+class LocalModels:
+    """Embedding and reranker models of this process, the batch calls app_vectorizer makes."""
+    def __init__(self, served=None):
+        self.name = "LocalModels"
+        self.served = served or get_served_models()
+
+    def load(self):
+        # Model modules only load torch and the weights on first use, so only the served models are loaded
+        if "embedding" in self.served:
+            from ManageEmbeddingModel import get_sentence_transformers_model
+            get_sentence_transformers_model()
+        if "reranker" in self.served:
+            from ManageEmbeddingRerankModel import get_reranker_model_model
+            get_reranker_model_model()
+
+    def warm_up(self):
+        """Load the served models and run one small batch each, so the first request pays no lazy initialization."""
+        self.load()
+        if "embedding" in self.served:
+            self.encode_queries(["warm up"])
+        if "reranker" in self.served:
+            self.score_pairs_bucketed([("warm up", "warm up")], 1, 16384)
+
+    def encode_queries(self, texts):
+        from ManageEmbeddingModel import get_sentence_transformers_model
+        return get_sentence_transformers_model().encode_queries(texts)
+
+    def encode_documents_bucketed(self, texts, max_bucket_size, bucket_token_budget):
+        from ManageEmbeddingModel import encode_documents_bucketed
+        return encode_documents_bucketed(texts, max_bucket_size, bucket_token_budget)
+
+    def score_pairs_bucketed(self, pairs, max_bucket_size, bucket_token_budget):
+        from ManageEmbeddingRerankModel import score_pairs_bucketed
+        return score_pairs_bucketed(pairs, max_bucket_size, bucket_token_budget)
+
+class ModelHostClient:
+    """Sends batches to the model host, one short-lived connection per batch so whichever host process is idle accepts it."""
+    def __init__(self, address, authkey=None, served=None):
+        self.name = "ModelHostClient"
+        self.address = address
+        self.authkey = authkey
+        self.served = served or get_served_models()
+
+    def call(self, method, *args):
+        with Client(self.address, authkey=self.authkey) as connection:
+            connection.send((method, args))
+            status, result = connection.recv()
+        if status != "ok":
+            raise Exception(f"Model host failed to run {method}: {result}")
+        return result
+
+    def load(self):
+        pass
+
+    def warm_up(self):
+        # One round trip, answered once the accepting host process has warmed up its models
+        return self.call("warm_up")
+
+    def encode_queries(self, texts):
+        return self.call("encode_queries", texts)
+
+    def encode_documents_bucketed(self, texts, max_bucket_size, bucket_token_budget):
+        return self.call("encode_documents_bucketed", texts, max_bucket_size, bucket_token_budget)
+
+    def score_pairs_bucketed(self, pairs, max_bucket_size, bucket_token_budget):
+        return self.call("score_pairs_bucketed", pairs, max_bucket_size, bucket_token_budget)
+
+def parse_address(address):
+    # host:port is TCP, anything else a Unix socket path
+    host, _, port = address.rpartition(":")
+    return (host, int(port)) if host and port.isdigit() else address
+
+def get_model_host_authkey():
+    authkey = os.getenv("MODEL_HOST_AUTHKEY")
+    return authkey.encode("utf-8") if authkey else None
+
+def get_model_backend():
+    """Models of this process, or a client of the model host when MODEL_HOST_ADDRESS is set."""
+    if os.getenv("MODEL_HOST_ADDRESS"):
+        return ModelHostClient(parse_address(os.getenv("MODEL_HOST_ADDRESS")), get_model_host_authkey())
+    return LocalModels()
+
+def run_host_process(listener, models, threads):
+    """Serve batches accepted on the shared listening socket until the host stops."""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    if os.getenv("INFERENCE_BACKEND", "torch") == "onnx":
+        # ONNX Runtime thread pools do not survive a fork, each process opens its own sessions
+        os.environ.setdefault("ONNX_INTRA_OP_THREADS", str(threads))
+    else:
+        import torch
+        torch.set_num_threads(threads)
+    models.warm_up()
+    while True:
+        try:
+            connection = listener.accept()
+        except Exception as e:
+            log.warning(f"Model host {os.getpid()}: accept failed: {e}")
+            continue
+        with connection:
+            # A client gone away only loses its own call, the process keeps serving
+            try:
+                method, args = connection.recv()
+            except Exception as e:
+                log.warning(f"Model host {os.getpid()}: request not received: {e}")
+                continue
+            try:
+                if method not in MODEL_HOST_METHODS:
+                    raise Exception(f"Unknown method {method}")
+                if MODEL_HOST_METHODS[method] not in (None, *models.served):
+                    raise Exception(f"{MODEL_HOST_METHODS[method]} model not served by this host")
+                reply = ("ok", getattr(models, method)(*args))
+            except Exception as e:
+                reply = ("error", str(e))
+            try:
+                connection.send(reply)
+            except Exception as e:
+                log.warning(f"Model host {os.getpid()}: reply to {method} not sent: {e}")
+
+def serve(address, processes, threads, authkey=None):
+    """Load the models once, then fork processes sharing the weights copy-on-write and one listening socket."""
+    if isinstance(address, tuple) and authkey is None:
+        # Requests are pickled, an open TCP port without a key would run anything sent to it
+        raise Exception("Failed to start model host: MODEL_HOST_AUTHKEY is required on a TCP address")
+    models = LocalModels()
+    if os.getenv("INFERENCE_BACKEND", "torch") != "onnx":
+        # Loaded before the fork, warm-up inference runs in the processes so no thread pool is forked mid-use
+        models.load()
+    if isinstance(address, str) and os.path.exists(address):
+        os.unlink(address)
+    listener = Listener(address, authkey=authkey, backlog=1024)
+    # Objects alive now are never collected, so the collector does not touch (and copy) their pages in the children
+    gc.freeze()
+    context = multiprocessing.get_context("fork")
+
+    def start_process():
+        child = context.Process(target=run_host_process, args=(listener, models, threads), daemon=True)
+        child.start()
+        return child, time.monotonic()
+
+    children = [start_process() for _ in range(processes)]
+    # Stopping the host stops its processes too
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    log.info(f"Model host listening on {address}: {processes} processes x {threads} threads")
+    try:
+        # Supervise: a process that died is forked again from the loaded models, the pool keeps its size
+        while True:
+            wait([child.sentinel for child, _ in children])
+            for position, (child, started) in enumerate(children):
+                if child.is_alive():
+                    continue
+                child.join()
+                log.warning(f"Model host process {child.pid} exited with code {child.exitcode}, restarting it")
+                if time.monotonic() - started < 5:
+                    # Crashing right after start (e.g. during warm-up), back off instead of forking in a loop
+                    time.sleep(5)
+                children[position] = start_process()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for child, _ in children:
+            child.terminate()
+        listener.close()
+
+if __name__ == "__main__":
+    processes = int(os.getenv("MODEL_HOST_PROCESSES", os.cpu_count() or 1))
+    serve(
+        parse_address(os.getenv("MODEL_HOST_ADDRESS", "model_host.sock")),
+        processes,
+        int(os.getenv("MODEL_HOST_THREADS", max(1, (os.cpu_count() or 1) // processes))),
+        get_model_host_authkey()
+    )
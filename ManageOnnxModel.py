@@ -0,0 +1,86 @@
+import os
+import json
+import numpy as np
+from dotenv import load_dotenv
+load_dotenv()
+# Optional dependencies, only needed with INFERENCE_BACKEND=onnx: pip install onnxruntime transformers
+import onnxruntime
+from transformers import AutoTokenizer
+
+def create_session(path):
+    """CPU inference session with every graph optimization (constant folding, attention and layer norm fusion)."""
+    options = onnxruntime.SessionOptions()
+    options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+    if os.getenv("ONNX_INTRA_OP_THREADS"):
+        options.intra_op_num_threads = int(os.getenv("ONNX_INTRA_OP_THREADS"))
+    return onnxruntime.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+
+class OnnxSentenceEncoder:
+    """Mean-pooled, normalized sentence embeddings of an exported transformer, the SentenceTransformer attributes used here."""
+    def __init__(self, model_path, onnx_file, batch_size=32):
+        self.name = "OnnxSentenceEncoder"
+        self.tokenizer = AutoTokenizer.from_pretrained(model_path)
+        self.batch_size = batch_size
+        # Same truncation as the SentenceTransformer config of the model
+        self.max_seq_length = 512
+        config_path = os.path.join(model_path, "sentence_bert_config.json")
+        if os.path.exists(config_path):
+            with open(config_path, encoding="utf-8") as file:
+                self.max_seq_length = json.load(file).get("max_seq_length", 512)
+        self.session = create_session(os.path.join(model_path, onnx_file))
+        self.input_names = [node.name for node in self.session.get_inputs()]
+
+    def encode(self, texts):
+        vectors = []
+        for start in range(0, len(texts), self.batch_size):
+            inputs = self.tokenizer(texts[start:start + self.batch_size], padding=True, truncation=True, max_length=self.max_seq_length, return_tensors="np")
+            hidden = self.session.run(None, {name: inputs[name].astype(np.int64) for name in self.input_names})[0]
+            mask = inputs["attention_mask"][..., None].astype(np.float32)
+            pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+            vectors.append(pooled / np.linalg.norm(pooled, axis=1, keepdims=True))
+        return np.concatenate(vectors) if vectors else np.zeros((0, 0), dtype=np.float32)
+
+class OnnxEmbeddingFunction:
+    """ONNX Runtime counterpart of SentenceTransformerEmbeddingFunction: encode_queries / encode_documents and .model."""
+    def __init__(self, model_path, onnx_file):
+        self.name = "OnnxEmbeddingFunction"
+        self.model = OnnxSentenceEncoder(model_path, onnx_file)
+
+    def encode_queries(self, queries):
+        return list(self.model.encode(queries))
+
+    def encode_documents(self, documents):
+        return list(self.model.encode(documents))
+
+class OnnxCrossEncoder:
+    """Exported sequence classification model scoring (query, document) pairs, the FlagReranker attributes used here."""
+    def __init__(self, model_path, onnx_file, batch_size=32):
+        self.name = "OnnxCrossEncoder"
+        self.tokenizer = AutoTokenizer.from_pretrained(model_path)
+        self.batch_size = batch_size
+        self.session = create_session(os.path.join(model_path, onnx_file))
+        self.input_names = [node.name for node in self.session.get_inputs()]
+
+    def compute_score(self, pairs, normalize=False, max_length=512):
+        scores = []
+        for start in range(0, len(pairs), self.batch_size):
+            batch = pairs[start:start + self.batch_size]
+            inputs = self.tokenizer(
+                [query for query, _ in batch],
+                [document for _, document in batch],
+                padding=True,
+                truncation=True,
+                max_length=max_length,
+                return_tensors="np"
+            )
+            scores.extend(self.session.run(None, {name: inputs[name].astype(np.int64) for name in self.input_names})[0].reshape(-1).tolist())
+        if normalize:
+            scores = [float(1 / (1 + np.exp(-score))) for score in scores]
+        return scores
+
+class OnnxRerankFunction:
+    """ONNX Runtime counterpart of BGERerankFunction: .reranker and .normalize."""
+    def __init__(self, model_path, onnx_file, normalize=True):
+        self.name = "OnnxRerankFunction"
+        self.reranker = OnnxCrossEncoder(model_path, onnx_file)
+        self.normalize = normalize
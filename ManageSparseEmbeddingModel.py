@@ -0,0 +1,50 @@
+import os
+import re
+import zlib
+from collections import Counter
+
+# Function words that carry no lexical signal in Indonesian legal text
+STOPWORDS = {
+    "yang", "dan", "di", "ke", "dari", "untuk", "dengan", "pada", "dalam", "atau", "ini", "itu", "adalah",
+    "oleh", "sebagai", "tidak", "akan", "dapat", "tersebut", "sebagaimana", "dimaksud", "bagi", "serta",
+    "juga", "telah", "harus", "secara", "atas", "terhadap", "karena", "apabila", "jika", "the", "of", "and",
+}
+TOKEN_PATTERN = re.compile(r"\w+")
+
+class SparseLexicalModel:
+    """Hashed lexical sparse vectors, unigrams and bigrams weighted with BM25 term-frequency saturation.
+
+    Bigrams keep exact references such as "pasal 27" or "ayat 2" as single terms the dense model blurs.
+    """
+    def __init__(self, dimension=2 ** 31, k1=1.2, b=0.75, avg_doc_length=200):
+        self.name = "SparseLexicalModel"
+        self.dimension = dimension
+        self.k1 = k1
+        self.b = b
+        self.avg_doc_length = avg_doc_length
+
+    def tokenize(self, text):
+        words = [word for word in TOKEN_PATTERN.findall(text.lower()) if word not in STOPWORDS]
+        return words + [f"{first} {second}" for first, second in zip(words, words[1:])]
+
+    def term_index(self, term):
+        # Stable across processes, unlike hash()
+        return zlib.crc32(term.encode("utf-8")) % self.dimension
+
+    def encode_document(self, text):
+        terms = Counter(self.term_index(term) for term in self.tokenize(text))
+        length_norm = 1 - self.b + self.b * sum(terms.values()) / self.avg_doc_length
+        return {index: count * (self.k1 + 1) / (count + self.k1 * length_norm) for index, count in terms.items()}
+
+    def encode_documents(self, texts):
+        return [self.encode_document(text) for text in texts]
+
+    def encode_queries(self, texts):
+        # Every query term weighs the same, the document side carries the term-frequency weighting
+        return [{self.term_index(term): 1.0 for term in self.tokenize(text)} for text in texts]
+
+sparse_model = SparseLexicalModel(avg_doc_length=float(os.getenv("SPARSE_AVG_DOC_LENGTH", 200)))
+
+def get_sparse_model():
+    """Return the global sparse model instance."""
+    return sparse_model
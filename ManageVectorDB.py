@@ -1,29 +1,198 @@
 import os
+import time
+import asyncio
+import threading
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor
 from pymilvus import connections
 from pymilvus import utility
 from pymilvus import FieldSchema, CollectionSchema, DataType, Collection
+from pymilvus import BulkInsertState
+from pymilvus import AnnSearchRequest, RRFRanker, WeightedRanker
+from pymilvus.exceptions import MilvusException, MilvusUnavailableException, ConnectionNotExistException
+from pymilvus.client.types import Status
+import grpc
+import numpy as np
 from dotenv import load_dotenv
 load_dotenv()
+from ManageCollectionConfig import get_collection_config, get_tenant_key, get_tenant_partition, SCALAR_INDEX_TYPES
+from ManageSparseEmbeddingModel import get_sparse_model
+
+class MilvusConnectionPool:
+    """Process-wide Milvus connections, one alias per worker process, reused across requests."""
+    def __init__(self, db_uri, db_token, health_check_interval=30, collection_cache_ttl=30):
+        self.name = "MilvusConnectionPool"
+        self.db_uri = db_uri
+        self.db_token = db_token
+        self.health_check_interval = health_check_interval
+        self.collection_cache_ttl = collection_cache_ttl
+        self._lock = threading.Lock()
+        self._last_health_check = {}
+        self._collections = {}
+        self._generation = 0  # Incremented on every (re)connect
+
+    def get_alias(self):
+        # Alias is bound to the process id so forked workers never share a gRPC channel
+        return f"pool-{os.getpid()}"
+
+    def _connect(self, alias):
+        connections.connect(alias=alias, uri=self.db_uri, token=self.db_token)
+        self._last_health_check[alias] = time.monotonic()
+        self._generation += 1
+
+    def _drop_alias(self, alias):
+        self._collections = {key: value for key, value in self._collections.items() if key[0] != alias}
+        self._last_health_check.pop(alias, None)
+        try:
+            connections.disconnect(alias)
+        except Exception:
+            pass
+
+    def get_connection(self):
+        alias = self.get_alias()
+        with self._lock:
+            if not connections.has_connection(alias):
+                self._connect(alias)
+            elif time.monotonic() - self._last_health_check.get(alias, 0) > self.health_check_interval:
+                # Health check idle connections, reconnect if the server dropped them
+                try:
+                    utility.get_server_version(using=alias)
+                    self._last_health_check[alias] = time.monotonic()
+                except Exception:
+                    self._drop_alias(alias)
+                    self._connect(alias)
+        return alias
+
+    def get_collection(self, collection_name):
+        # Handles carry the schema, they expire so a collection migrated or reindexed by another process is described again
+        alias = self.get_connection()
+        key = (alias, collection_name)
+        entry = self._collections.get(key)
+        if entry is None or entry[1] < time.monotonic():
+            with self._lock:
+                entry = self._collections.get(key)
+                if entry is None or entry[1] < time.monotonic():
+                    forget_partitions(collection_name)
+                    entry = (Collection(name=collection_name, using=alias), time.monotonic() + self.collection_cache_ttl)
+                    self._collections[key] = entry
+        return entry[0]
+
+    def invalidate_collection(self, collection_name):
+        """Forget cached collection handles and known partitions, e.g. after a drop or schema change."""
+        with self._lock:
+            self._collections = {key: value for key, value in self._collections.items() if key[1] != collection_name}
+            forget_partitions(collection_name)
+
+    def get_generation(self):
+        return self._generation
+
+    def reset(self, generation=None):
+        """Drop the current process connection and every cached collection handle.
+
+        With a generation, only when no other request reconnected since, so concurrent failures on one broken channel reset it once.
+        """
+        with self._lock:
+            if generation is None or generation == self._generation:
+                self._drop_alias(self.get_alias())
+
+def is_connection_error(error):
+    """True when the channel itself failed (server unreachable, connection gone), not the request (unknown collection, bad expression)."""
+    while error is not None:
+        if isinstance(error, (MilvusUnavailableException, ConnectionNotExistException)):
+            return True
+        if isinstance(error, MilvusException) and error.code == Status.CONNECT_FAILED:
+            return True
+        if isinstance(error, grpc.RpcError) and error.code() in (grpc.StatusCode.UNAVAILABLE, grpc.StatusCode.CANCELLED):
+            return True
+        if isinstance(error, ValueError) and "closed channel" in str(error):
+            return True
+        error = error.__cause__
+    return False
+
+connection_pool = MilvusConnectionPool(
+    db_uri=os.getenv("MILVUS_URI"),
+    db_token=os.getenv("MILVUS_TOKEN"),
+    health_check_interval=float(os.getenv("MILVUS_HEALTH_CHECK_INTERVAL", 30)),
+    collection_cache_ttl=float(os.getenv("MILVUS_COLLECTION_CACHE_TTL", 30))
+)
+
+def get_connection_pool():
+    """Return the global connection pool instance."""
+    return connection_pool
+
+# (alias, collection, partition) of explicit tenant partitions known to exist
+# Shared by search threads, every read and write holds known_partitions_lock
+known_partitions = set()
+known_partitions_lock = threading.Lock()
+
+def forget_partitions(collection_name):
+    with known_partitions_lock:
+        known_partitions.difference_update([key for key in known_partitions if key[1] == collection_name])
+
+# Bounded executor so blocking Milvus searches never run on the event loop
+search_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("MILVUS_SEARCH_CONCURRENCY", 16)),
+    thread_name_prefix="milvus-search"
+)
+
+class RefinedHit:
+    """Search hit re-scored on its raw vector, exposes the attributes the result formatters read."""
+    def __init__(self, id, distance, fields):
+        self.id = id
+        self.distance = distance
+        self.fields = fields
+
+class TenantMutationResult:
+    """Insert spread over several tenant partitions, or delete in a partition that does not exist, exposes the MutationResult attributes read here."""
+    def __init__(self, primary_keys=None, delete_count=0):
+        self.primary_keys = primary_keys or []
+        self.insert_count = len(self.primary_keys)
+        self.delete_count = delete_count
 
 class ManageVectorDB:
     def __init__(self):
         self.name = "ManageVectorDB"
         self.db_uri = os.getenv("MILVUS_URI")
         self.db_token = os.getenv("MILVUS_TOKEN")
+        self.pool = get_connection_pool()
+        self.collection_config = get_collection_config()
+        self.insert_max_batch_bytes = int(os.getenv("MILVUS_INSERT_MAX_BATCH_BYTES", 32 * 1024 * 1024))
+
+    def _run(self, operation, retry=True):
+        # Retry read operations once on a fresh connection when a pooled channel turned out to be broken,
+        # operations fetch their collection handle inside so the retry uses the new connection
+        generation = self.pool.get_generation()
+        try:
+            return operation()
+        except Exception as e:
+            # Request errors propagate, the connection shared with concurrent operations stays up
+            if not is_connection_error(e):
+                raise
+            self.pool.reset(generation)
+            if not retry:
+                raise
+            return operation()
 
     def check_collection_exists(self, collection_name):
         try:
-            connections.connect(alias="default", uri=self.db_uri, token=self.db_token)
-            is_exist = utility.has_collection(collection_name, "default")
+            is_exist = self._run(lambda: utility.has_collection(collection_name, using=self.pool.get_connection()))
             return is_exist
         except Exception as e:            
             raise Exception(f"Failed to check collections: {e}")
-        finally:
-            if connections:
-                connections.disconnect("default")  # Ensure the connection is closed properly
     
-    def create_collection(self, collection_name, collection_index_type):
+    def create_collection(self, collection_name, collection_index_type, index_params=None, search_params=None, tenant_mode=None, num_partitions=None, scalar_indexes=True, hybrid=None, hybrid_params=None):
         try:
+            # Index, search and tenancy params are part of the collection config, defaults fill what is not given
+            config = self.collection_config.build_config(
+                collection_index_type,
+                index_params,
+                search_params,
+                tenant_mode=tenant_mode or os.getenv("COLLECTION_TENANT_MODE", "partition_key"),
+                num_partitions=num_partitions or int(os.getenv("COLLECTION_NUM_PARTITIONS", 64)),
+                hybrid=hybrid if hybrid is not None else os.getenv("COLLECTION_HYBRID_SEARCH_ENABLED", "false").lower() == "true",
+                hybrid_params=hybrid_params
+            )
+
             # Define collection schema with additional fields
             fields = [
                 FieldSchema(name="id", dtype=DataType.INT64, is_primary=True, auto_id=True),
@@ -37,104 +206,492 @@ class ManageVectorDB:
                 FieldSchema(name="project_id", dtype=DataType.VARCHAR, max_length=256),  # Text field for project ID
                 FieldSchema(name="file_id", dtype=DataType.VARCHAR, max_length=256)  # Text field for file ID
             ]
+            collection_options = {}
+            if config["tenancy"]["mode"] == "partition_key":
+                # Rows of a (client_id, project_id) tenant are hashed to one partition, searches only scan that partition
+                fields.append(FieldSchema(name="tenant_key", dtype=DataType.VARCHAR, max_length=64, is_partition_key=True))
+                collection_options["num_partitions"] = config["tenancy"]["num_partitions"]
+            if config["hybrid"]["enabled"]:
+                # Lexical vector of the chunk text, searched next to the dense vector and fused
+                fields.append(FieldSchema(name="sparse_vector", dtype=DataType.SPARSE_FLOAT_VECTOR))
             schema = CollectionSchema(fields=fields, description="Collection for information storage")
 
-            # Use the connection directly within this method
-            connections.connect(alias="default", uri=self.db_uri, token=self.db_token)
+            # Use the pooled connection of this worker
+            alias = self.pool.get_connection()
             # Create the collection
             collection = Collection(
                 name=collection_name, 
                 schema=schema, 
                 description="Embedding collection with metadata fields", 
-                using="default", 
-                consistency_level="Strong"
+                using=alias, 
+                consistency_level="Strong",
+                **collection_options
             )
             
-            # Select params for IVF_FLAT or HNSW Index
-            if collection_index_type == "IVF_FLAT":
-                params = {
-                    "nlist": 128
-                }
-            elif collection_index_type == "HNSW": 
-                params = {
-                    "M": 64,
-                    "efConstruction": 64
-                }
-            
             # Create Collection
             collection.create_index(field_name="vector", index_params={
-                "metric_type": "COSINE", 
-                "index_type": collection_index_type, 
-                "params": params
+                "metric_type": config["metric_type"], 
+                "index_type": config["index_type"], 
+                "params": config["index_params"]
             })
+            if config["hybrid"]["enabled"]:
+                collection.create_index(field_name="sparse_vector", index_params={
+                    "metric_type": "IP",
+                    "index_type": "SPARSE_INVERTED_INDEX",
+                    "params": {"drop_ratio_build": config["hybrid"]["drop_ratio_build"]}
+                }, index_name="sparse_vector_index")
+            if scalar_indexes:
+                self.create_scalar_indexes(collection)
 
             # Load Collection
             collection.load()
+            self.collection_config.save(collection_name, config)
+            self.pool.invalidate_collection(collection_name)
         except Exception as e:
             raise Exception(f"Failed to create collections: {e}")
-        finally:
-            if connections:
-                connections.disconnect("default")  # Ensure the connection is closed properly
+
+    def get_collection_config(self, collection_name, collection_index_type=None):
+        """Stored config of a collection, collections created before configs existed are read from their Milvus index."""
+        config = self.collection_config.get(collection_name)
+        if config is not None:
+            return config
+        if collection_index_type is not None:
+            return self.collection_config.build_config(collection_index_type)
+        indexes = [index for index in self._run(lambda: self.pool.get_collection(collection_name).indexes) if index.field_name == "vector"]
+        if not indexes:
+            raise Exception(f"Collection '{collection_name}' has no index")
+        index_params = indexes[0].params.get("params")
+        schema = self._run(lambda: self.pool.get_collection(collection_name).schema)
+        config = self.collection_config.build_config(
+            indexes[0].params["index_type"],
+            index_params=index_params if isinstance(index_params, dict) else None,
+            tenant_mode="partition_key" if any(field.is_partition_key for field in schema.fields) else "filter",
+            num_partitions=self._run(lambda: len(self.pool.get_collection(collection_name).partitions)),
+            hybrid=any(field.name == "sparse_vector" for field in schema.fields)
+        )
+        # Remember it, the next searches skip the describe call
+        self.collection_config.save(collection_name, config)
+        return config
+
+    def get_tenant_route(self, config, client_id, project_id, expr=None):
+        """Return (filter expression, partition name or None) restricting an operation to one tenant."""
+        mode = config.get("tenancy", {}).get("mode", "filter")
+        if mode == "partition_key":
+            tenant_filter = f"tenant_key == '{get_tenant_key(client_id, project_id)}'"
+            partition_name = None
+        elif mode == "partitions":
+            tenant_filter = None
+            partition_name = get_tenant_partition(client_id, project_id)
+        else:
+            tenant_filter = f"client_id == '{client_id}' && project_id == '{project_id}'"
+            partition_name = None
+        return " && ".join(part for part in (tenant_filter, expr) if part), partition_name
+
+    def has_partition(self, collection_name, partition_name, create=False):
+        # Partitions only disappear with their collection, known ones are remembered per process
+        key = (self.pool.get_alias(), collection_name, partition_name)
+        with known_partitions_lock:
+            if key in known_partitions:
+                return True
+        if not self._run(lambda: self.pool.get_collection(collection_name).has_partition(partition_name)):
+            if not create:
+                return False
+            collection = self.pool.get_collection(collection_name)
+            try:
+                collection.create_partition(partition_name)
+            except Exception:
+                # Another worker created it first
+                if not collection.has_partition(partition_name):
+                    raise
+        with known_partitions_lock:
+            known_partitions.add(key)
+        return True
+
+    def split_by_tenant(self, config, columns, row_count):
+        """Group row indexes by the partition they are routed to, None when the collection has no explicit partitions."""
+        if config.get("tenancy", {}).get("mode") != "partitions":
+            return {None: list(range(row_count))}
+        groups = {}
+        for i in range(row_count):
+            groups.setdefault(get_tenant_partition(columns["client_id"][i], columns["project_id"][i]), []).append(i)
+        return groups
+
+    def create_scalar_indexes(self, collection):
+        """Index the filter fields of a collection that have no index yet, returns the newly indexed fields."""
+        indexed_fields = {index.field_name for index in collection.indexes}
+        created = []
+        for field in collection.schema.fields:
+            if field.name in SCALAR_INDEX_TYPES and field.name not in indexed_fields:
+                collection.create_index(field_name=field.name, index_params={"index_type": SCALAR_INDEX_TYPES[field.name]}, index_name=f"{field.name}_index")
+                created.append(field.name)
+        return created
+
+    def add_scalar_indexes(self, collection_name):
+        """Build the missing scalar indexes of an existing collection, searches are unavailable until it is loaded again."""
+        try:
+            collection = self.pool.get_collection(collection_name)
+            collection.release()
+            created = self.create_scalar_indexes(collection)
+            for field_name in created:
+                utility.wait_for_index_building_complete(collection_name, index_name=f"{field_name}_index", using=self.pool.get_connection())
+            collection.load()
+            return created
+        except Exception as e:
+            raise Exception(f"Failed to add scalar indexes: {e}")
+
+    def rebuild_index(self, collection_name, config):
+        """Replace the vector index with new build params, the collection is unavailable until it is loaded again."""
+        try:
+            collection = self.pool.get_collection(collection_name)
+            collection.release()
+            # Scalar indexes stay, only the vector index is replaced
+            for index in collection.indexes:
+                if index.field_name == "vector":
+                    collection.drop_index(index_name=index.index_name)
+            collection.create_index(field_name="vector", index_params={
+                "metric_type": config["metric_type"],
+                "index_type": config["index_type"],
+                "params": config["index_params"]
+            })
+            collection.load()
+            self.collection_config.save(collection_name, config)
+        except Exception as e:
+            raise Exception(f"Failed to rebuild index: {e}")
+
+    def drop_collection(self, collection_name):
+        try:
+            self._run(lambda: utility.drop_collection(collection_name, using=self.pool.get_connection()))
+            self.collection_config.delete(collection_name)
+            self.pool.invalidate_collection(collection_name)
+        except Exception as e:
+            raise Exception(f"Failed to drop collections: {e}")
+
+    def rename_collection(self, old_collection_name, new_collection_name):
+        try:
+            self._run(lambda: utility.rename_collection(old_collection_name, new_collection_name, using=self.pool.get_connection()))
+            self.collection_config.rename(old_collection_name, new_collection_name)
+            self.pool.invalidate_collection(old_collection_name)
+            self.pool.invalidate_collection(new_collection_name)
+        except Exception as e:
+            raise Exception(f"Failed to rename collections: {e}")
+
+    def add_derived_columns(self, collection, columns):
+        """Fill the fields computed from other columns: the tenant key of partition key collections, the sparse vector of hybrid ones."""
+        field_names = {field.name for field in collection.schema.fields}
+        columns = dict(columns)
+        if "tenant_key" in field_names and "tenant_key" not in columns:
+            columns["tenant_key"] = [get_tenant_key(client_id, project_id) for client_id, project_id in zip(columns["client_id"], columns["project_id"])]
+        if "sparse_vector" in field_names and "sparse_vector" not in columns:
+            columns["sparse_vector"] = get_sparse_model().encode_documents(columns["text"])
+        return columns
 
     def insert_into_collection(self, collection_name, data):
         try:
-            # Use the connection directly within this method
-            connections.connect(alias="default", uri=self.db_uri, token=self.db_token)
-            # Get the collection object
-            collection = Collection(name=collection_name, using="default")    
-            # Insert the data into the collection
-            insert_info = collection.insert(data)
-            return insert_info  # Optionally return the insert_info if needed
+            # Insert the data into the pooled collection object
+            collection = self.pool.get_collection(collection_name)
+            if not data:
+                return self._run(lambda: collection.insert(data), retry=False)
+            columns = self.add_derived_columns(collection, {key: [row[key] for row in data] for key in data[0]})
+            data = [dict(zip(columns, values)) for values in zip(*columns.values())]
+            # Rows may mix tenants (e.g. a reindex copy), each goes to the partition of its own tenant
+            groups = self.split_by_tenant(self.get_collection_config(collection_name), columns, len(data))
+            if len(groups) == 1 and None in groups:
+                return self._run(lambda: collection.insert(data), retry=False)  # Optionally return the insert_info if needed
+            primary_keys = [None] * len(data)
+            for partition_name, indexes in groups.items():
+                self.has_partition(collection_name, partition_name, create=True)
+                insert_info = self._run(lambda: collection.insert([data[i] for i in indexes], partition_name=partition_name), retry=False)
+                for i, primary_key in zip(indexes, insert_info.primary_keys):
+                    primary_keys[i] = primary_key
+            return TenantMutationResult(primary_keys=primary_keys)
         except Exception as e:
+            # The handle may carry the schema of a collection replaced since, the next insert describes it again
+            self.pool.invalidate_collection(collection_name)
             raise Exception(f"Failed to insert data into collection '{collection_name}': {e}")
-        finally:
-            if connections:
-                connections.disconnect("default")  # Ensure the connection is closed properly
     
+    def insert_columns_into_collection(self, collection_name, columns, max_batch_bytes=None):
+        """Column-oriented insert split into slices below max_batch_bytes, returns the primary keys in row order."""
+        try:
+            max_batch_bytes = max_batch_bytes or self.insert_max_batch_bytes
+            collection = self.pool.get_collection(collection_name)
+            config = self.get_collection_config(collection_name)
+            field_names = [field.name for field in collection.schema.fields if not field.auto_id]
+            vectors = np.asarray(columns["vector"], dtype=np.float32)
+            if not len(vectors):
+                return []
+            columns = self.add_derived_columns(collection, columns)
+            string_fields = [name for name in field_names if name != "vector" and isinstance(columns[name][0], str)]
+            primary_keys = [None] * len(vectors)
+            for partition_name, indexes in self.split_by_tenant(config, columns, len(vectors)).items():
+                if partition_name is not None:
+                    self.has_partition(collection_name, partition_name, create=True)
+                start = 0
+                while start < len(indexes):
+                    # Grow the slice until the estimated message size reaches the limit, at least one row per slice
+                    end = start
+                    batch_bytes = 0
+                    while end < len(indexes):
+                        row_bytes = vectors.shape[1] * 4 + 64 + sum(len((columns[name][indexes[end]] or "").encode("utf-8")) for name in string_fields)
+                        if end > start and batch_bytes + row_bytes > max_batch_bytes:
+                            break
+                        batch_bytes += row_bytes
+                        end += 1
+                    batch = indexes[start:end]
+                    data = [vectors[batch] if name == "vector" else [columns[name][i] for i in batch] for name in field_names]
+                    insert_info = self._run(lambda: collection.insert(data, partition_name=partition_name), retry=False)
+                    for i, primary_key in zip(batch, insert_info.primary_keys):
+                        primary_keys[i] = primary_key
+                    start = end
+            return primary_keys
+        except Exception as e:
+            self.pool.invalidate_collection(collection_name)
+            raise Exception(f"Failed to insert columns into collection '{collection_name}': {e}")
+
+    def bulk_import_into_collection(self, collection_name, columns, timeout=3600):
+        """Write columns to Parquet/NumPy files on the Milvus object storage and import them with bulk insert."""
+        try:
+            # Optional dependency, only needed for bulk imports: pip install "pymilvus[bulk_writer]"
+            from pymilvus.bulk_writer import RemoteBulkWriter, BulkFileType
+            collection = self.pool.get_collection(collection_name)
+            config = self.get_collection_config(collection_name)
+            field_names = [field.name for field in collection.schema.fields if not field.auto_id]
+            connect_param = RemoteBulkWriter.S3ConnectParam(
+                endpoint=os.getenv("MILVUS_BULK_S3_ENDPOINT", "localhost:9000"),
+                access_key=os.getenv("MILVUS_BULK_S3_ACCESS_KEY", "minioadmin"),
+                secret_key=os.getenv("MILVUS_BULK_S3_SECRET_KEY", "minioadmin"),
+                bucket_name=os.getenv("MILVUS_BULK_S3_BUCKET", "a-bucket"),
+                secure=os.getenv("MILVUS_BULK_S3_SECURE", "false").lower() == "true"
+            )
+            file_type = BulkFileType.NUMPY if os.getenv("MILVUS_BULK_FILE_TYPE", "parquet") == "numpy" else BulkFileType.PARQUET
+            vectors = np.asarray(columns["vector"], dtype=np.float32)
+            columns = self.add_derived_columns(collection, columns) if len(vectors) else columns
+            alias = self.pool.get_connection()
+            task_ids = []
+            # Explicit tenant partitions get their own files, one import per partition
+            for partition_name, indexes in self.split_by_tenant(config, columns, len(vectors)).items():
+                if partition_name is not None:
+                    self.has_partition(collection_name, partition_name, create=True)
+                with RemoteBulkWriter(schema=collection.schema, remote_path="bulk_import", connect_param=connect_param, file_type=file_type) as writer:
+                    for i in indexes:
+                        writer.append_row({name: vectors[i] if name == "vector" else columns[name][i] for name in field_names})
+                    writer.commit()
+                    batch_files = writer.batch_files
+                task_ids.extend(
+                    utility.do_bulk_insert(collection_name=collection_name, files=files, partition_name=partition_name, using=alias)
+                    for files in batch_files
+                )
+
+            deadline = time.monotonic() + timeout
+            for task_id in task_ids:
+                while True:
+                    state = utility.get_bulk_insert_state(task_id=task_id, using=alias)
+                    if state.state == BulkInsertState.ImportCompleted:
+                        break
+                    if state.state in (BulkInsertState.ImportFailed, BulkInsertState.ImportFailedAndCleaned):
+                        raise Exception(f"Bulk insert task {task_id} failed: {state.failed_reason}")
+                    if time.monotonic() > deadline:
+                        raise Exception(f"Bulk insert task {task_id} did not complete in {timeout} seconds")
+                    time.sleep(2)
+            return len(vectors)
+        except Exception as e:
+            self.pool.invalidate_collection(collection_name)
+            raise Exception(f"Failed to bulk import into collection '{collection_name}': {e}")
+
+    def query_file_rows(self, collection_name, file_id, output_fields):
+        try:
+            # Iterator pages through files larger than the query result window
+            iterator = self._run(lambda: self.pool.get_collection(collection_name).query_iterator(
+                batch_size=1000,
+                expr=f"file_id == '{file_id}'",
+                output_fields=output_fields
+            ))
+            rows = []
+            while True:
+                batch = iterator.next()
+                if not batch:
+                    iterator.close()
+                    return rows
+                rows.extend(batch)
+        except Exception as e:
+            raise Exception(f"Failed to query file rows in collections: {e}")
+
     def delete_in_collection(self, client_id, project_id, collection_name, file_id):
         try:
-            # Use the connection directly within this method
-            connections.connect(alias="default", uri=self.db_uri, token=self.db_token)
-            # Get the collection object
-            collection = Collection(name=collection_name, using="default")
-            # Delete
-            delete_response = collection.delete(expr=f"client_id == '{client_id}' && project_id == '{project_id}' && file_id == '{file_id}'")
+            # Delete from the pooled collection object, only the tenant's partition is touched
+            config = self.get_collection_config(collection_name)
+            expr, partition_name = self.get_tenant_route(config, client_id, project_id, f"file_id == '{file_id}'")
+            if partition_name is not None and not self.has_partition(collection_name, partition_name):
+                # Tenant without a partition has nothing to delete
+                return TenantMutationResult(delete_count=0)
+            delete_response = self._run(lambda: self.pool.get_collection(collection_name).delete(expr=expr, partition_name=partition_name))
             return delete_response
         except Exception as e:
             raise Exception(f"Failed to delete in collections: {e}")
-        finally:
-            if connections:
-                connections.disconnect("default")  # Ensure the connection is closed properly
 
-    def search_in_collection(self, client_id, project_id, collection_name, collection_index_type, vector_query, number_results):
+    def delete_ids_in_collection(self, collection_name, ids):
         try:
-            # Use the connection directly within this method
-            connections.connect(alias="default", uri=self.db_uri, token=self.db_token)
-            # Get the collection object
-            collection = Collection(name=collection_name, using="default")
-            
-            # Select params for IVF_FLAT or HNSW Index
-            if collection_index_type == "IVF_FLAT":
-                params = {
-                    "nprobe": 32
-                }
-            elif collection_index_type == "HNSW": 
-                params = {
-                    "ef": 64
-                }
-            
-            # Search
-            results = collection.search(
+            # Delete rows by primary key, used to drop single chunks of a re-ingested file
+            ids = list(ids)
+            for i in range(0, len(ids), 1000):
+                expr = f"id in {[int(id) for id in ids[i:i + 1000]]}"
+                self._run(lambda: self.pool.get_collection(collection_name).delete(expr=expr))
+        except Exception as e:
+            raise Exception(f"Failed to delete ids in collections: {e}")
+
+    def query_vectors_by_ids(self, collection_name, ids):
+        try:
+            # Stored vectors of existing rows, keyed by primary key
+            vectors = {}
+            ids = list(ids)
+            for i in range(0, len(ids), 1000):
+                expr = f"id in {[int(id) for id in ids[i:i + 1000]]}"
+                rows = self._run(lambda: self.pool.get_collection(collection_name).query(expr=expr, output_fields=["id", "vector"]))
+                vectors.update({row["id"]: [float(value) for value in row["vector"]] for row in rows})
+            return vectors
+        except Exception as e:
+            raise Exception(f"Failed to query vectors in collections: {e}")
+
+    def count_rows(self, collection_name):
+        try:
+            # Strong consistency, rows inserted just before the count are included
+            rows = self._run(lambda: self.pool.get_collection(collection_name).query(
+                expr="",
+                output_fields=["count(*)"],
+                consistency_level="Strong"
+            ))
+            return rows[0]["count(*)"] if rows else 0
+        except Exception as e:
+            raise Exception(f"Failed to count rows in collections: {e}")
+
+    def count_file_in_collection(self, client_id, project_id, collection_name, file_id):
+        try:
+            config = self.get_collection_config(collection_name)
+            expr, partition_name = self.get_tenant_route(config, client_id, project_id, f"file_id == '{file_id}'")
+            if partition_name is not None and not self.has_partition(collection_name, partition_name):
+                return 0
+            rows = self._run(lambda: self.pool.get_collection(collection_name).query(
+                expr=expr,
+                output_fields=["count(*)"],
+                partition_names=[partition_name] if partition_name is not None else None
+            ))
+            return rows[0]["count(*)"] if rows else 0
+        except Exception as e:
+            raise Exception(f"Failed to count file in collections: {e}")
+
+    def search_vectors(self, collection_name, config, vector_query, number_results, filter, output_fields, partition_name=None):
+        """ANN search with the params of config, quantized indexes re-score refine_factor * k candidates on raw vectors."""
+        if partition_name is not None and not self.has_partition(collection_name, partition_name):
+            # Tenant without data yet
+            return [[] for _ in vector_query]
+        refine_factor = self.collection_config.get_refine_factor(config)
+        limit = number_results * refine_factor if refine_factor > 1 else number_results
+        params = self.collection_config.get_search_params(config, limit)
+        results = self._run(lambda: self.pool.get_collection(collection_name).search(
+            data=vector_query,
+            anns_field="vector",
+            output_fields=output_fields + ["vector"] if refine_factor > 1 else output_fields,
+            limit=limit,
+            filter=filter,
+            # pymilvus only forwards what is nested under "params"
+            param={"metric_type": config["metric_type"], "params": params},
+            partition_names=[partition_name] if partition_name is not None else None
+        ))
+        if refine_factor <= 1:
+            return results
+        refined = []
+        for query, hits in zip(vector_query, results):
+            hits = list(hits)
+            if not hits:
+                refined.append([])
+                continue
+            # Exact cosine on the stored full-precision vectors
+            query = np.asarray(query, dtype=np.float32)
+            query /= np.linalg.norm(query)
+            vectors = np.asarray([hit.fields["vector"] for hit in hits], dtype=np.float32)
+            scores = vectors @ query / np.linalg.norm(vectors, axis=1)
+            order = np.argsort(-scores)[:number_results]
+            refined.append([
+                RefinedHit(hits[i].id, float(scores[i]), {field: hits[i].fields.get(field) for field in output_fields})
+                for i in order
+            ])
+        return refined
+
+    def hybrid_search_vectors(self, collection_name, config, vector_query, sparse_query, number_results, filter, output_fields, partition_name=None):
+        """Dense and sparse searches run side by side by Milvus, their result lists fused with RRF or weighted scores."""
+        if partition_name is not None and not self.has_partition(collection_name, partition_name):
+            return [[] for _ in vector_query]
+        hybrid = config["hybrid"]
+        # Fusion works on deeper lists than the final top-k
+        limit = number_results * int(hybrid["candidate_factor"])
+        requests = [
+            AnnSearchRequest(
                 data=vector_query,
                 anns_field="vector",
+                param={"metric_type": config["metric_type"], "params": self.collection_config.get_search_params(config, limit)},
+                limit=limit,
+                expr=filter or None
+            ),
+            AnnSearchRequest(
+                data=sparse_query,
+                anns_field="sparse_vector",
+                param={"metric_type": "IP", "params": {"drop_ratio_search": hybrid["drop_ratio_search"]}},
+                limit=limit,
+                expr=filter or None
+            ),
+        ]
+        ranker = WeightedRanker(*hybrid["weights"]) if hybrid["ranker"] == "weighted" else RRFRanker(int(hybrid["rrf_k"]))
+        return self._run(lambda: self.pool.get_collection(collection_name).hybrid_search(
+            requests,
+            ranker,
+            limit=number_results,
+            partition_names=[partition_name] if partition_name is not None else None,
+            output_fields=output_fields
+        ))
+
+    def search_in_collection(self, client_id, project_id, collection_name, collection_index_type, vector_query, number_results, sparse_query=None):
+        try:
+            # Search params come from the collection config, the client no longer has to send the index type
+            config = self.get_collection_config(collection_name, collection_index_type)
+            # Partition key and explicit partitions only scan the tenant's data, filter mode post-filters the whole collection
+            filter, partition_name = self.get_tenant_route(config, client_id, project_id)
+            
+            # Hybrid collections fuse a lexical search in, unless the query has no searchable term
+            if sparse_query and all(sparse_query) and config.get("hybrid", {}).get("enabled"):
+                return self.hybrid_search_vectors(
+                    collection_name,
+                    config,
+                    vector_query,
+                    sparse_query,
+                    number_results,
+                    filter=filter,
+                    output_fields=["text"],
+                    partition_name=partition_name
+                )
+
+            # Search on the pooled collection object
+            results = self.search_vectors(
+                collection_name,
+                config,
+                vector_query,
+                number_results,
+                filter=filter,
                 output_fields=["text"],
-                limit=number_results,
-                filter=f"client_id == '{client_id}' AND project_id == '{project_id}'",
-                param=params
+                partition_name=partition_name
             )
             return results
         except Exception as e:
             raise Exception(f"Failed to search in collections: {e}")
-        finally:
-            if connections:
-                connections.disconnect("default")  # Ensure the connection is closed properly
\ No newline at end of file
+
+    async def async_search_in_collection(self, client_id, project_id, collection_name, collection_index_type, vector_query, number_results, sparse_query=None):
+        """Run search_in_collection on the bounded search executor without blocking the event loop."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(search_executor, partial(
+            self.search_in_collection,
+            client_id,
+            project_id,
+            collection_name,
+            collection_index_type,
+            vector_query,
+            number_results,
+            sparse_query
+        ))
@@ -1,4 +1,6 @@
+import os
 from ManageVectorDB import ManageVectorDB
+from ManageIngestionRegistry import get_ingestion_registry
 
 class DeleteInformation:
     def __init__(self):
@@ -6,5 +8,11 @@ class DeleteInformation:
     
     async def delete_information(self, client_id, project_id, collection_name, file_id):
         db_engine = ManageVectorDB()
-        delete_result = db_engine.delete_in_collection(client_id, project_id, collection_name, file_id)
+        registry = get_ingestion_registry()
+        # Refused with CollectionFencedError while a reindex or migration copies the collection
+        with registry.write_lease(collection_name):
+            delete_result = db_engine.delete_in_collection(client_id, project_id, collection_name, file_id)
+            # Forget the chunk hashes too, so the next upload of the document is ingested in full
+            if os.getenv("INGESTION_DEDUP_ENABLED", "true").lower() == "true":
+                registry.delete_file(file_id)
         return delete_result
\ No newline at end of file
@@ -0,0 +1,119 @@
+import re
+
+# Patterns are compiled once and shared by every split
+FOOTER_PATTERN = re.compile(r"([^\n]+?(?:\.\s*\.\s*\.\s*|…))")
+FOOTER_DOTS_PATTERN = re.compile(r"(?=(\.\s*\.\s*\.\s*|…))")  # Every position a footer "..." starts at
+BAB_ANCHOR_PATTERN = re.compile(r"BAB [IVXLCDM]+")
+BAB_HEADER_PATTERN = re.compile(r"BAB [IVXLCDM]+[\s\n]*[A-Z\s]+")
+BAB_SEGMENT_PATTERN = re.compile(r"(BAB [IVXLCDM]+[\s\n]*[A-Z\s]+)(.*?)(?=BAB [IVXLCDM]+|$)", re.DOTALL)
+PASAL_PATTERN = re.compile(r"(?:\n{1,2})P(?:\\n|)asal \d+(?:\s*\n{1,2})")
+
+class IndoLegalTextSplitter:
+    """Splits Indonesian legal documents into BAB / Pasal chunks in one forward pass over the text."""
+    def __init__(self, window_pages=8):
+        self.name = "IndoLegalTextSplitter"
+        self.window_pages = window_pages
+
+    def remove_footer(self, document_text):
+        """Same result as FOOTER_PATTERN.sub("", text), without rescanning a line from every start position."""
+        # A match starts at the earliest position on the line of the next "..." and ends after that "..."
+        pieces = []
+        kept_from = 0
+        position = 0
+        for dots in FOOTER_DOTS_PATTERN.finditer(document_text):
+            dots_start = dots.start()
+            if dots_start < position + 1:
+                continue
+            newline = document_text.rfind("\n", position, dots_start)
+            match_start = position if newline < 0 else newline + 1
+            if match_start >= dots_start:
+                # "..." opens its line, the lazy prefix needs one character so the next "..." decides
+                position = dots_start
+                continue
+            pieces.append(document_text[kept_from:match_start])
+            kept_from = position = dots.end(1)
+        pieces.append(document_text[kept_from:])
+        return "".join(pieces)
+
+    def split_pasal(self, segment, bab_header):
+        # Pasal chunks of one BAB segment, each one carries the BAB header unless it already mentions a BAB
+        chunks = []
+        position = 0
+        pasal_header = None
+        for match in PASAL_PATTERN.finditer(segment):
+            chunks.append(self.build_chunk(pasal_header, segment[position:match.start()], bab_header))
+            pasal_header = match.group(0)
+            position = match.end()
+        chunks.append(self.build_chunk(pasal_header, segment[position:], bab_header))
+        return chunks
+
+    def build_chunk(self, pasal_header, content, bab_header):
+        if pasal_header is None:
+            chunk = content.strip()
+        else:
+            chunk = f"{pasal_header.strip()}\n{content.strip()}"
+        if BAB_HEADER_PATTERN.search(chunk) is None:
+            chunk = f"{bab_header}\n{chunk}"
+        return chunk
+
+    def split_segments(self, document_text, final=True):
+        """Split footer-free text, returns (chunks, consumed), the last BAB stays unconsumed when final is False."""
+        chunks = []
+        matches = BAB_SEGMENT_PATTERN.finditer(document_text)
+        previous_match = next(matches, None)
+        if previous_match is None and not final:
+            return chunks, 0
+
+        # Content before the first "BAB"
+        anchor = BAB_ANCHOR_PATTERN.search(document_text)
+        pre_bab_content = (document_text[:anchor.start()] if anchor else document_text).strip()
+        if pre_bab_content:
+            chunks.append(pre_bab_content)
+
+        # BAB segments, one behind the scan so the open one can be held back
+        while previous_match is not None:
+            match = next(matches, None)
+            if match is None and not final:
+                return chunks, previous_match.start()
+            segment = f"{previous_match.group(1).strip()}\n{previous_match.group(2).strip()}"
+            bab_header = BAB_HEADER_PATTERN.search(segment)
+            if bab_header is not None:
+                chunks.extend(self.split_pasal(segment, bab_header.group(0)))
+            else:
+                chunks.append(segment)
+            previous_match = match
+        return chunks, len(document_text)
+
+    def split(self, document_text):
+        chunks, consumed = self.split_segments(self.remove_footer(document_text))
+        return chunks
+
+    def find_footer_cut(self, buffer):
+        # A footer match never spans a newline followed by a character other than whitespace or "."
+        position = len(buffer)
+        while True:
+            position = buffer.rfind("\n", 0, position)
+            if position < 0:
+                return 0
+            if position + 1 < len(buffer) and not buffer[position + 1].isspace() and buffer[position + 1] != ".":
+                return position + 1
+
+    def split_stream(self, pages):
+        """Split an iterable of page texts, chunks are yielded as soon as their BAB is closed by the next one."""
+        raw_buffer = ""
+        clean_buffer = ""
+        for page_number, page in enumerate(pages, start=1):
+            raw_buffer += page
+            if page_number % self.window_pages:
+                continue
+            footer_cut = self.find_footer_cut(raw_buffer)
+            if footer_cut > 0:
+                clean_buffer += self.remove_footer(raw_buffer[:footer_cut])
+                raw_buffer = raw_buffer[footer_cut:]
+            chunks, consumed = self.split_segments(clean_buffer, final=False)
+            if consumed > 0:
+                yield from chunks
+                clean_buffer = clean_buffer[consumed:]
+        clean_buffer += self.remove_footer(raw_buffer)
+        chunks, consumed = self.split_segments(clean_buffer)
+        yield from chunks
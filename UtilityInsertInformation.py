@@ -3,23 +3,46 @@ from dotenv import load_dotenv
 load_dotenv()
 import time
 import re
-import httpx
 import uuid
-from typing import List, Optional, Union
-from langchain.schema.document import Document
-from langchain_community.document_loaders import PyMuPDFLoader
-from langchain.text_splitter import CharacterTextSplitter
-from langchain.text_splitter import RecursiveCharacterTextSplitter
+import sys
+import random
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait, as_completed, FIRST_COMPLETED
+from typing import List, Dict, Optional, Union, TYPE_CHECKING
 from ManageVectorDB import ManageVectorDB
+from UtilityIndoLegalTextSplitter import IndoLegalTextSplitter
+from ManageHttpClient import get_http_client
+from ManageIngestionRegistry import get_ingestion_registry, get_document_key, hash_chunk, hash_file
+from ManageEmbeddingStore import get_embedding_store
+if TYPE_CHECKING:
+    from langchain.schema.document import Document
+
+# Process-wide window of vectorize requests in flight, shared by every file of every insert task
+vectorize_window = threading.BoundedSemaphore(int(os.getenv("VECTORIZE_MAX_IN_FLIGHT", 4)))
 
 class InsertInformation:
     def __init__(self):
         self.name = "InsertInformation"
         self.vectorize_url = os.getenv("VECTOR_DOCS_URI")
+        self.http_client = get_http_client()
+        # In-process parsing by default, a process pool is opt-in where the worker pool allows one
+        self.parse_workers = int(os.getenv("INSERT_PARSE_WORKERS", 1))
+        self.vectorize_workers = int(os.getenv("INSERT_VECTORIZE_WORKERS", 4))
+        self.insert_batch_rows = int(os.getenv("INSERT_BATCH_ROWS", 1000))
+        self.insert_mode = os.getenv("MILVUS_INSERT_MODE", "columns")  # "columns" or "rows"
+        self.pdf_loader_mode = os.getenv("PDF_LOADER_MODE", "stream")  # "stream" or "full"
+        self.stream_window_pages = int(os.getenv("PDF_STREAM_WINDOW_PAGES", 8))
+        self.legal_text_splitter = IndoLegalTextSplitter(window_pages=self.stream_window_pages)
+        self.vectorize_batch_size = int(os.getenv("VECTORIZE_MAX_BATCH_SIZE", 64))
+        self.vectorize_token_budget = int(os.getenv("VECTORIZE_TOKEN_BUDGET", 8192))
+        self.vectorize_max_in_flight = int(os.getenv("VECTORIZE_MAX_IN_FLIGHT", 4))
+        self.dedup_enabled = os.getenv("INGESTION_DEDUP_ENABLED", "true").lower() == "true"
+        self.embedding_store = get_embedding_store()
 
     def merge_pdf_pages(
         self,
-        pages: List[Document],
+        pages: List["Document"],
         client_id: str,
         project_id: str,
         file_id: str):
@@ -38,44 +61,92 @@ class InsertInformation:
         except Exception as e:
             raise Exception(f"Failed to merge pages: {e}")
 
-    def batch_vectorize_documents(self, texts, batch_size=10, timeout=60, retries=3, delay=5):
-        all_vectors = []
-        # Initialize a synchronous client
-        with httpx.Client(timeout=timeout) as client:
-            for i in range(0, len(texts), batch_size):
-                batch = texts[i:i + batch_size]
-                for attempt in range(retries):
-                    try:
-                        # Send the request to vectorize the current batch
-                        response = client.post(self.vectorize_url, json={"texts": batch})
-                        if response.status_code == 200:
-                            vectors = response.json().get("vectors", [])
-                            all_vectors.extend(vectors)
-                            break  # Break out of the retry loop if successful
-                        else:
-                            raise Exception(f"Failed to vectorize batch: {response.text}")
-                    except Exception as e:
-                        # print(f"Attempt {attempt + 1} for batch {i // batch_size + 1} failed: {e}")
-                        if attempt < retries - 1:
-                            time.sleep(delay)  # Wait before retrying
-                        else:
-                            raise Exception("All retry attempts failed for batch {i // batch_size + 1}.")
+    def estimate_tokens(self, text, max_tokens=512):
+        # Rough subword estimate (~4 characters per token), the embedding model truncates at max_tokens
+        return min(len(text) // 4 + 1, max_tokens)
+
+    def build_vectorize_batches(self, texts, batch_size, token_budget):
+        """Group text indexes into batches bounded by item count and an approximate token budget."""
+        batches = []
+        current_batch = []
+        current_tokens = 0
+        for index, text in enumerate(texts):
+            tokens = self.estimate_tokens(text)
+            if current_batch and (len(current_batch) >= batch_size or current_tokens + tokens > token_budget):
+                batches.append(current_batch)
+                current_batch = []
+                current_tokens = 0
+            current_batch.append(index)
+            current_tokens += tokens
+        if current_batch:
+            batches.append(current_batch)
+        return batches
+
+    def vectorize_batch(self, batch, timeout, retries, delay, max_delay=60):
+        for attempt in range(retries):
+            try:
+                # Send the request to vectorize the current batch, the window bounds in-flight requests of this worker
+                with vectorize_window:
+                    response = self.http_client.post_sync(self.vectorize_url, json={"texts": batch}, timeout=timeout)
+                if response.status_code == 200:
+                    vectors = response.json().get("vectors", [])
+                    if len(vectors) != len(batch):
+                        raise Exception(f"Expected {len(batch)} vectors, got {len(vectors)}")
+                    return vectors
+                else:
+                    raise Exception(f"Failed to vectorize batch: {response.text}")
+            except Exception as e:
+                if attempt < retries - 1:
+                    # Jittered exponential backoff before retrying only this batch
+                    time.sleep(min(max_delay, delay * (2 ** attempt)) * random.uniform(0.5, 1.5))
+                else:
+                    raise Exception(f"All retry attempts failed for batch: {e}")
+
+    def batch_vectorize_documents(self, texts, batch_size=None, timeout=60, retries=3, delay=1, token_budget=None, max_in_flight=None):
+        batch_size = batch_size or self.vectorize_batch_size
+        token_budget = token_budget or self.vectorize_token_budget
+        max_in_flight = max_in_flight or self.vectorize_max_in_flight
+        batches = self.build_vectorize_batches(texts, batch_size, token_budget)
+        all_vectors = [None] * len(texts)
+        # Submit batches concurrently, completed batches are kept when another one is retried
+        with ThreadPoolExecutor(max_workers=max_in_flight) as executor:
+            futures = {
+                executor.submit(self.vectorize_batch, [texts[i] for i in batch], timeout, retries, delay): batch
+                for batch in batches
+            }
+            try:
+                for future in as_completed(futures):
+                    for index, vector in zip(futures[future], future.result()):
+                        all_vectors[index] = vector
+            except Exception:
+                for future in futures:
+                    future.cancel()
+                raise
         return all_vectors
 
     def separator_text_splitter(self, document_text, separator):
         informations = document_text.split(separator)
         return informations
 
-    def character_text_splitter(self, document_text, separator, chunk_size, chunk_overlap):
+    def character_text_splitter(self, document_text, separator, chunk_size, chunk_overlap, with_start_index=False):
+        # LangChain is imported on first use, workers start without it
+        from langchain.schema.document import Document
+        from langchain.text_splitter import CharacterTextSplitter
         langchain_text_splitter = CharacterTextSplitter(
             separator=separator,
             chunk_size=chunk_size,
-            chunk_overlap=chunk_overlap
+            chunk_overlap=chunk_overlap,
+            add_start_index=with_start_index
         )
-        informations = [chunk.page_content for chunk in langchain_text_splitter.split_documents([Document(page_content=document_text)])]
+        chunks = langchain_text_splitter.split_documents([Document(page_content=document_text)])
+        if with_start_index:
+            return [(chunk.page_content, chunk.metadata["start_index"]) for chunk in chunks]
+        informations = [chunk.page_content for chunk in chunks]
         return informations
     
     def recursive_character_text_splitter(self, document_text, separator, chunk_size, chunk_overlap):
+        from langchain.schema.document import Document
+        from langchain.text_splitter import RecursiveCharacterTextSplitter
         langchain_text_splitter = RecursiveCharacterTextSplitter(
             separator=separator,
             chunk_size=chunk_size,
@@ -87,51 +158,180 @@ class InsertInformation:
         return informations
     
     def indonesia_legal_text_splitter(self, document_text):
-        # 0. Clearing Footer with "..." --------------------------------------------------------------------------------------
-        document_text = re.sub(r"([^\n]+?(?:\.\s*\.\s*\.\s*|…))", "", document_text)
-
-        # 1. Find BAB Header and Use as Separator ----------------------------------------------------------------------------
-        bab_split_pattern = r'(BAB [IVXLCDM]+[\s\n]*[A-Z\s]+)(.*?)(?=BAB [IVXLCDM]+|$)'
-        # Find all matches
-        matches = re.findall(bab_split_pattern, document_text, re.DOTALL)
-        # Extract content before the first "BAB"
-        pre_bab_content = re.split(r'BAB [IVXLCDM]+', document_text, maxsplit=1)[0].strip()
-        # Combine pre-BAB content and "BAB" segments
-        segments = [pre_bab_content] if pre_bab_content else []
-        segments.extend([f"{match[0].strip()}\n{match[1].strip()}" for match in matches])
-
-        # 2. Proses Pasal in Each Bab ----------------------------------------------------------------------------------------
-        segments_2 = []
-        for i, segment in enumerate(segments, start=1):
-            # Regular expression to match "BAB" headers
-            bab_pattern = r'BAB [IVXLCDM]+[\s\n]*[A-Z\s]+'
-            bab_header = re.findall(bab_pattern, segment)
-            if bab_header != []:
-                # Regular expression to match "Pasal" headers
-                pasal_pattern = r'(?:\n{1,2})P(?:\\n|)asal \d+(?:\s*\n{1,2})'
-                # Split the text at "Pasal" headers
-                split_segments = re.split(pasal_pattern, segment)
-                # Capture the headers themselves
-                headers = re.findall(pasal_pattern, segment)
-                # Combine headers and their respective content
-                results = []
-                for i, segment in enumerate(split_segments):
-                    # Add content before the first "Pasal"
-                    if i == 0 and segment.strip():
-                        processed_segment = f"{segment.strip()}"
-                    elif i > 0:
-                        header = headers[i - 1]  # Match the corresponding "Pasal" header
-                        processed_segment = f"{header.strip()}\n{segment.strip()}"
-                    # Add "BAB" header if not exist
-                    if re.findall(bab_pattern, processed_segment) == [] and True:
-                        processed_segment = f"{bab_header[0]}\n{processed_segment}"
-                    # Append to Result
-                    results.append(processed_segment)
-                # Append to Final Segment
-                segments_2.extend(results)
+        return self.legal_text_splitter.split(document_text)
+
+    def split_informations(self, document_text, separator_type, separator, chunk_size, chunk_overlap):
+        if separator_type == "SeparatorTextSplitter":
+            informations = self.separator_text_splitter(document_text, separator)
+        elif separator_type == "CharacterTextSplitter":
+            informations = self.character_text_splitter(document_text, separator, chunk_size, chunk_overlap)
+        elif separator_type == "RecursiveCharacterTextSplitter":
+            informations = self.recursive_character_text_splitter(document_text, separator, chunk_size, chunk_overlap)
+        elif separator_type == "IndoLegalTextSplitter":
+            informations = self.indonesia_legal_text_splitter(document_text)
+        return informations
+
+    def stream_pdf_pages(self, path):
+        """Open a PDF and return its metadata plus a generator yielding the text of each page lazily."""
+        import pymupdf
+        document = pymupdf.open(path)
+        metadata = {
+            "file_path": path,
+            "title": document.metadata.get("title"),
+            "total_pages": document.page_count,
+            "format": document.metadata.get("format"),
+        }
+        def pages():
+            try:
+                for page in document:
+                    yield page.get_text()
+            finally:
+                document.close()
+        return metadata, pages()
+
+    def find_separator_cut(self, buffer, separator):
+        # Returns (head end, tail start) of the last complete separator split, or None
+        if separator is None:
+            # str.split(None) splits on whitespace runs, any whitespace is a safe boundary
+            for position in range(len(buffer) - 1, -1, -1):
+                if buffer[position].isspace():
+                    return position, position
+            return None
+        position = buffer.rfind(separator)
+        if position < 0:
+            return None
+        return position, position + len(separator)
+
+    def stream_informations(self, pages, separator_type, separator, chunk_size, chunk_overlap):
+        """Split a stream of page texts incrementally, chunks are yielded once a window of pages is complete."""
+        if separator_type == "IndoLegalTextSplitter":
+            yield from self.legal_text_splitter.split_stream(pages)
+            return
+        if separator_type == "SeparatorTextSplitter":
+            window_separator = separator
+        elif isinstance(separator, list):
+            window_separator = separator[0] if separator else "\n\n"
+        else:
+            window_separator = separator or "\n\n"
+        buffer = ""
+        for page_number, page in enumerate(pages, start=1):
+            buffer += page
+            if page_number % self.stream_window_pages:
+                continue
+            if separator_type == "CharacterTextSplitter":
+                # Keep the last chunks open, they are re-split together with the next pages
+                chunks = self.character_text_splitter(buffer, separator, chunk_size, chunk_overlap, with_start_index=True)
+                if len(chunks) > 2 and chunks[-2][1] > 0:
+                    yield from (information for information, start_index in chunks[:-2])
+                    buffer = buffer[chunks[-2][1]:]
+                continue
+            # Other splitters are cut at their first separator, LangChain chunks may then differ at window edges
+            cut = self.find_separator_cut(buffer, window_separator)
+            if cut is not None:
+                yield from self.split_informations(buffer[:cut[0]], separator_type, separator, chunk_size, chunk_overlap)
+                buffer = buffer[cut[1]:]
+        yield from self.split_informations(buffer, separator_type, separator, chunk_size, chunk_overlap)
+
+    def parse_document(self, path, client_id, project_id, file_id, separator_type, separator, chunk_size, chunk_overlap):
+        """Load, merge and split one PDF into informations and their shared metadata."""
+        if self.pdf_loader_mode == "stream":
+            # Pages are read lazily and split per window, so the whole document is never held as pages plus merged text
+            metadata, pages = self.stream_pdf_pages(path)
+            informations = list(self.stream_informations(pages, separator_type, separator, chunk_size, chunk_overlap))
+            metadata.update({"client_id": client_id, "project_id": project_id, "file_id": file_id})
+            return informations, metadata
+
+        # Load PDF by File Name
+        from langchain_community.document_loaders import PyMuPDFLoader
+        loader = PyMuPDFLoader(path)
+        pages = loader.load()
+
+        # Merge Pages
+        merged_pages = self.merge_pdf_pages(
+            pages=pages,
+            client_id=client_id,
+            project_id=project_id,
+            file_id=file_id
+        )
+
+        # Get Informations
+        informations = self.split_informations(merged_pages.get("text"), separator_type, separator, chunk_size, chunk_overlap)
+        # Get Metadata
+        metadata = {key: value for key, value in merged_pages.items() if key != "text"}
+        return informations, metadata
+
+    def append_columns(self, columns, texts, vectors, metadata):
+        # Column-oriented pending batch, file metadata is repeated once per chunk
+        columns.setdefault("vector", []).extend(vectors)
+        columns.setdefault("text", []).extend(texts)
+        for key, value in metadata.items():
+            columns.setdefault(key, []).extend([value] * len(texts))
+
+    def insert_columns(self, db_engine, collection_name, columns):
+        """Insert pending columns with the configured mode, returns the primary keys in row order."""
+        if not columns.get("vector"):
+            return []
+        if self.insert_mode == "rows":
+            rows = [dict(zip(columns, values)) for values in zip(*columns.values())]
+            return list(db_engine.insert_into_collection(collection_name, rows).primary_keys)
+        return db_engine.insert_columns_into_collection(collection_name, columns)
+
+    def check_registered_file(self, registry, db_engine, path, client_id, project_id, collection_name, splitter_config, replace_file_id=None):
+        """Return (document_key, file_hash, revision replaced by this file or identical file already stored or None, its chunks)."""
+        document_key = get_document_key(path)
+        file_hash = hash_file(path, splitter_config)
+        if replace_file_id is None:
+            # The same content uploaded again keeps the file_id it got the first time, a file with the same name only is a new document
+            registered_file = registry.find_file_by_hash(client_id, project_id, collection_name, file_hash)
+            chunks = registry.get_chunks(registered_file["file_id"]) if registered_file is not None else []
+            if not chunks or db_engine.count_file_in_collection(client_id, project_id, collection_name, registered_file["file_id"]) != len(chunks):
+                return document_key, file_hash, None, []
+            return document_key, file_hash, registered_file, chunks
+        # Only an explicitly replaced file_id is diffed against
+        registered_file = registry.get_file(replace_file_id)
+        if registered_file is None:
+            return document_key, file_hash, None, []
+        if (registered_file["client_id"], registered_file["project_id"], registered_file["collection_name"]) != (client_id, project_id, collection_name):
+            raise Exception(f"File '{replace_file_id}' to replace belongs to another client, project or collection")
+        chunks = registry.get_chunks(registered_file["file_id"])
+        if db_engine.count_file_in_collection(client_id, project_id, collection_name, registered_file["file_id"]) != len(chunks):
+            # Registry and collection disagree (e.g. an interrupted insert), the file is rebuilt under the same file_id
+            db_engine.delete_in_collection(client_id, project_id, collection_name, registered_file["file_id"])
+            chunks = []
+        return document_key, file_hash, registered_file, chunks
+
+    def diff_chunks(self, hashes, registered_chunks):
+        """Match new chunk hashes with stored chunks, returns (kept {position: milvus_id}, positions to insert, stale milvus ids)."""
+        stored_ids = {}
+        for position, chunk_hash, milvus_id in registered_chunks:
+            stored_ids.setdefault(chunk_hash, []).append(milvus_id)
+        kept = {}
+        insert_positions = []
+        for position, chunk_hash in enumerate(hashes):
+            if stored_ids.get(chunk_hash):
+                kept[position] = stored_ids[chunk_hash].pop(0)
             else:
-                segments_2.append(segment)
-        return segments_2
+                insert_positions.append(position)
+        stale_ids = [milvus_id for ids in stored_ids.values() for milvus_id in ids]
+        return kept, insert_positions, stale_ids
+
+    def prepare_vectors(self, db_engine, collection_name, texts, hashes, reuse_ids):
+        """Return (vectors, embedded count), vectors of known chunks come from the embedding store or Milvus and each new text is embedded once."""
+        vectors_by_hash = self.embedding_store.get(hashes) if self.embedding_store is not None else {}
+        reuse_ids = {chunk_hash: milvus_id for chunk_hash, milvus_id in reuse_ids.items() if chunk_hash not in vectors_by_hash}
+        stored_vectors = db_engine.query_vectors_by_ids(collection_name, set(reuse_ids.values())) if reuse_ids else {}
+        vectors_by_hash.update({chunk_hash: stored_vectors[milvus_id] for chunk_hash, milvus_id in reuse_ids.items() if milvus_id in stored_vectors})
+        missing = {}
+        for text, chunk_hash in zip(texts, hashes):
+            if chunk_hash not in vectors_by_hash:
+                missing.setdefault(chunk_hash, text)
+        if missing:
+            vectors = self.batch_vectorize_documents(list(missing.values()), timeout=60, retries=3, delay=1)
+            vectors_by_hash.update(zip(missing.keys(), vectors))
+        if self.embedding_store is not None:
+            # Keep every vector on disk, reindex and rebuild jobs load them instead of embedding again
+            self.embedding_store.put(hashes, [vectors_by_hash[chunk_hash] for chunk_hash in hashes])
+        return [list(map(float, vectors_by_hash[chunk_hash])) for chunk_hash in hashes], len(missing)
 
     def insert_information(
         self, 
@@ -143,62 +343,180 @@ class InsertInformation:
         separator_type: str,
         separator: Optional[Union[str, List[str]]] = None,
         chunk_size: int = 512,
-        chunk_overlap: int = 512):
-
-        try:         
-            status = []
-            for path in files_path:
-                file_id = str(uuid.uuid4())
-                
-                # Load PDF by File Name
-                loader = PyMuPDFLoader(path)
-                pages = loader.load()
-
-                # Merge Pages
-                merged_pages = self.merge_pdf_pages(
-                    pages=pages,
-                    client_id=client_id,
-                    project_id=project_id,
-                    file_id=file_id
-                )
+        chunk_overlap: int = 512,
+        replace_file_ids: Optional[Dict[str, str]] = None):
+        # Writes hold a lease, a reindex or migration of the collection waits for them and refuses new ones (CollectionFencedError)
+        with get_ingestion_registry().write_lease(collection_name):
+            return self.insert_files(
+                client_id, project_id, collection_name, collection_index_type, files_path,
+                separator_type, separator, chunk_size, chunk_overlap, replace_file_ids
+            )
 
-                # Get Informations
-                if separator_type == "SeparatorTextSplitter":
-                    informations = self.separator_text_splitter(merged_pages.get("text"), separator)
-                elif separator_type == "CharacterTextSplitter":
-                    informations = self.character_text_splitter(merged_pages.get("text"), separator, chunk_size, chunk_overlap)
-                elif separator_type == "RecursiveCharacterTextSplitter":
-                    informations = self.recursive_character_text_splitter(merged_pages.get("text"), separator, chunk_size, chunk_overlap)
-                elif separator_type == "IndoLegalTextSplitter":
-                    informations = self.indonesia_legal_text_splitter(merged_pages.get("text"))
-                # Get Metadata
-                metadata = {key: value for key, value in merged_pages.items() if key != "text"}
-
-                # Vectorized Informations
-                vectors = self.batch_vectorize_documents(informations, batch_size=10, timeout=60, retries=3, delay=5)
-
-                # Prepare to Milvus Format and Add Metadata
-                data = [
-                    {"vector": vectors[i], "text": informations[i], **metadata}
-                    for i in range(len(vectors))
-                ]
-                
-                # Insert to Milvus Collection
-                db_engine = ManageVectorDB()
-                insert_info = db_engine.insert_into_collection(collection_name, data)
+    def insert_files(self, client_id, project_id, collection_name, collection_index_type, files_path, separator_type, separator, chunk_size, chunk_overlap, replace_file_ids):
+        # Staged pipeline: parse (optionally in a process pool), vectorize several files at once, insert in coalesced batches
+        parse_workers = min(self.parse_workers, len(files_path))
+        if parse_workers > 1 and process_pool_supported():
+            # Spawned, not forked: the gRPC channel of this process is already open
+            parse_executor = ProcessPoolExecutor(max_workers=parse_workers, mp_context=multiprocessing.get_context("spawn"))
+        else:
+            parse_executor = ThreadPoolExecutor(max_workers=1)
+        vectorize_executor = ThreadPoolExecutor(max_workers=self.vectorize_workers)
+        db_engine = ManageVectorDB()
+        # Registry of ingested files, replaced documents only insert their new or changed chunks
+        replace_file_ids = replace_file_ids or {}
+        registry = get_ingestion_registry() if self.dedup_enabled else None
+        splitter_config = {
+            "separator_type": separator_type,
+            "separator": separator,
+            "chunk_size": chunk_size,
+            "chunk_overlap": chunk_overlap,
+            "pdf_loader_mode": self.pdf_loader_mode,
+            "stream_window_pages": self.stream_window_pages
+        }
+        try:
+            files = {}
+            status = {}
+            pending_columns = {}
+            pending_files = []
 
-                status.append({
+            def file_status(index, file_id, chunks, inserted, deleted, embedded):
+                return {
                     "client_id": client_id,
                     "project_id": project_id,
                     "collection_name": collection_name,
                     "collection_index_type": collection_index_type,
                     "file_id": file_id,
-                    "file": path,
-                    "chunks": len(data),
+                    "file": files_path[index],
+                    "chunks": chunks,
+                    "chunks_inserted": inserted,
+                    "chunks_deleted": deleted,
+                    "chunks_embedded": embedded,
                     "separator_type": separator_type,
                     "status": "success",
                     "timestamp": time.time()
-                })
+                }
+
+            def flush():
+                # Insert to Milvus Collection
+                primary_keys = self.insert_columns(db_engine, collection_name, pending_columns)
+                offset = 0
+                for index in pending_files:
+                    file = files.pop(index)
+                    chunk_ids = dict(file["kept"])
+                    chunk_ids.update(zip(file["insert_positions"], primary_keys[offset:offset + len(file["insert_positions"])]))
+                    offset += len(file["insert_positions"])
+                    # Removed chunks are deleted only once the new revision is stored
+                    if file["stale_ids"]:
+                        db_engine.delete_ids_in_collection(collection_name, file["stale_ids"])
+                    if registry is not None:
+                        registry.save_file(
+                            file_id=file["file_id"],
+                            client_id=client_id,
+                            project_id=project_id,
+                            collection_name=collection_name,
+                            document_key=file["document_key"],
+                            file_hash=file["file_hash"],
+                            file_path=files_path[index],
+                            splitter_config=splitter_config,
+                            chunks=[(position, chunk_hash, chunk_ids[position]) for position, chunk_hash in enumerate(file["hashes"])]
+                        )
+                    status[index] = file_status(index, file["file_id"], len(file["hashes"]), len(file["insert_positions"]), len(file["stale_ids"]), file["embedded"])
+                pending_columns.clear()
+                pending_files.clear()
+
+            running = {}
+            for index, path in enumerate(files_path):
+                file = {"file_id": replace_file_ids.get(path) or str(uuid.uuid4()), "document_key": None, "file_hash": None, "registered_chunks": []}
+                registered_file = None
+                if registry is not None:
+                    document_key, file_hash, registered_file, registered_chunks = self.check_registered_file(
+                        registry, db_engine, path, client_id, project_id, collection_name, splitter_config, replace_file_ids.get(path)
+                    )
+                    file.update({"document_key": document_key, "file_hash": file_hash, "registered_chunks": registered_chunks})
+                    if registered_file is not None and registered_file["file_hash"] == file_hash and registered_chunks:
+                        # Same content and splitter settings, nothing to parse, embed or insert
+                        status[index] = file_status(index, registered_file["file_id"], len(registered_chunks), 0, 0, 0)
+                        continue
+                if path in replace_file_ids and registered_file is None:
+                    # Replaced file without registry entry, its rows are deleted and it is inserted again under the same file_id
+                    db_engine.delete_in_collection(client_id, project_id, collection_name, file["file_id"])
+                files[index] = file
+                future = parse_executor.submit(
+                    parse_document_worker,
+                    path=path,
+                    client_id=client_id,
+                    project_id=project_id,
+                    file_id=file["file_id"],
+                    separator_type=separator_type,
+                    separator=separator,
+                    chunk_size=chunk_size,
+                    chunk_overlap=chunk_overlap
+                )
+                running[future] = ("parse", index)
+
+            while running:
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    stage, index = running.pop(future)
+                    file = files[index]
+                    if stage == "parse":
+                        # Diff chunk hashes against the last revision, only new or changed chunks are vectorized
+                        informations, metadata = future.result()
+                        hashes = [hash_chunk(information) for information in informations]
+                        kept, insert_positions, stale_ids = self.diff_chunks(hashes, file.pop("registered_chunks"))
+                        insert_hashes = [hashes[position] for position in insert_positions]
+                        reuse_ids = registry.find_chunk_ids(collection_name, insert_hashes) if registry is not None and insert_hashes else {}
+                        file.update({
+                            "informations": informations,
+                            "metadata": metadata,
+                            "hashes": hashes,
+                            "kept": kept,
+                            "insert_positions": insert_positions,
+                            "stale_ids": stale_ids
+                        })
+                        # Vectorized Informations, batches of several files are in flight together
+                        vectorize_future = vectorize_executor.submit(
+                            self.prepare_vectors,
+                            db_engine,
+                            collection_name,
+                            [informations[position] for position in insert_positions],
+                            insert_hashes,
+                            reuse_ids
+                        )
+                        running[vectorize_future] = ("vectorize", index)
+                    else:
+                        vectors, file["embedded"] = future.result()
+                        informations = file.pop("informations")
+                        metadata = file.pop("metadata")
+
+                        # Prepare to Milvus Format and Add Metadata
+                        self.append_columns(
+                            pending_columns,
+                            [informations[position] for position in file["insert_positions"]],
+                            vectors,
+                            metadata
+                        )
+                        pending_files.append(index)
+                        if len(pending_columns.get("vector", [])) >= self.insert_batch_rows:
+                            flush()
+            flush()
         except Exception as e:
             raise Exception(f"Failed to insert documents: {e}")
-        return status
\ No newline at end of file
+        finally:
+            parse_executor.shutdown(wait=True, cancel_futures=True)
+            vectorize_executor.shutdown(wait=True, cancel_futures=True)
+        return [status[index] for index in range(len(files_path))]
+
+def process_pool_supported():
+    """False in daemonic (Celery prefork) workers and under eventlet/gevent monkey-patching, where child processes cannot be started."""
+    if multiprocessing.current_process().daemon:
+        return False
+    if "eventlet.patcher" in sys.modules and sys.modules["eventlet.patcher"].is_monkey_patched("os"):
+        return False
+    if "gevent.monkey" in sys.modules and sys.modules["gevent.monkey"].is_module_patched("os"):
+        return False
+    return True
+
+def parse_document_worker(**kwargs):
+    """Process pool entry point, InsertInformation itself holds unpicklable clients."""
+    return InsertInformation().parse_document(**kwargs)
@@ -0,0 +1,75 @@
+import argparse
+from ManageVectorDB import ManageVectorDB
+from ManageIngestionRegistry import get_ingestion_registry
+from ManageCollectionConfig import TENANT_MODES
+
+class MigrateCollection:
+    """Moves existing collections to a new layout by copying their rows, vectors included, into a fresh collection."""
+    def __init__(self, batch_rows=1000):
+        self.name = "MigrateCollection"
+        self.db_engine = ManageVectorDB()
+        self.registry = get_ingestion_registry()
+        self.batch_rows = batch_rows
+
+    def copy_rows(self, collection_name, target_collection_name):
+        """Copy every row of collection_name into target_collection_name, returns {old id: new id}."""
+        collection = self.db_engine.pool.get_collection(collection_name)
+        # tenant_key and sparse_vector are recomputed by the insert for the target layout
+        field_names = [field.name for field in collection.schema.fields if field.name not in ("tenant_key", "sparse_vector")]
+        iterator = collection.query_iterator(batch_size=self.batch_rows, expr="id >= 0", output_fields=field_names)
+        id_map = {}
+        while True:
+            batch = iterator.next()
+            if not batch:
+                iterator.close()
+                return id_map
+            columns = {name: [row[name] for row in batch] for name in field_names if name != "id"}
+            primary_keys = self.db_engine.insert_columns_into_collection(target_collection_name, columns)
+            id_map.update(zip((row["id"] for row in batch), primary_keys))
+
+    def verify_copy(self, collection_name, target_collection_name):
+        """Refuse the swap unless the target holds as many rows as the collection it replaces."""
+        source_rows = self.db_engine.count_rows(collection_name)
+        target_rows = self.db_engine.count_rows(target_collection_name)
+        if source_rows != target_rows:
+            raise Exception(f"Failed to copy '{collection_name}': {source_rows} rows, {target_rows} copied into '{target_collection_name}', the collection was kept")
+
+    def migrate_tenancy(self, collection_name, tenant_mode, num_partitions=None):
+        """Re-create a collection under another tenant mode, the old one serves searches until the swap, writes are fenced."""
+        with self.registry.write_fence(collection_name, "tenancy migration"):
+            config = self.db_engine.get_collection_config(collection_name)
+            staging_collection_name = f"{collection_name}_migrate"
+            if self.db_engine.check_collection_exists(staging_collection_name):
+                self.db_engine.drop_collection(staging_collection_name)
+            # Same index, tuned search params and hybrid fields, only the tenancy changes
+            self.db_engine.create_collection(
+                staging_collection_name,
+                config["index_type"],
+                config["index_params"],
+                config["search_params"],
+                tenant_mode=tenant_mode,
+                num_partitions=num_partitions,
+                hybrid=config["hybrid"]["enabled"],
+                hybrid_params=config["hybrid"]
+            )
+            id_map = self.copy_rows(collection_name, staging_collection_name)
+            self.verify_copy(collection_name, staging_collection_name)
+            self.db_engine.drop_collection(collection_name)
+            self.db_engine.rename_collection(staging_collection_name, collection_name)
+            # Milvus ids changed with the copy, the registry follows only once the swap is done
+            self.registry.remap_chunk_ids(collection_name, id_map)
+        return len(id_map)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Migrate an existing collection to a new layout")
+    parser.add_argument("action", choices=["tenancy", "scalar-indexes"])
+    parser.add_argument("--collection-name", required=True)
+    parser.add_argument("--tenant-mode", default="partition_key", choices=list(TENANT_MODES))
+    parser.add_argument("--num-partitions", type=int, help="Partitions of a partition_key collection, 64 by default")
+    args = parser.parse_args()
+
+    if args.action == "scalar-indexes":
+        created = MigrateCollection().db_engine.add_scalar_indexes(args.collection_name)
+        print(f"Indexed {', '.join(created) or 'nothing, every filter field already has an index'}")
+    else:
+        print(f"Migrated {MigrateCollection().migrate_tenancy(args.collection_name, args.tenant_mode, args.num_partitions)} rows")
@@ -0,0 +1,138 @@
+import os
+import json
+import argparse
+from ManageVectorDB import ManageVectorDB
+from ManageIngestionRegistry import get_ingestion_registry, hash_chunk
+from ManageEmbeddingStore import get_embedding_store
+from ManageCollectionConfig import DEFAULT_INDEX_PARAMS
+from UtilityInsertInformation import InsertInformation
+from UtilityMigrateCollection import MigrateCollection
+
+class ReindexInformation:
+    """Rebuilds collections from the ingestion registry, chunk vectors are bulk-loaded from the embedding store."""
+    def __init__(self, bulk=False):
+        self.name = "ReindexInformation"
+        self.db_engine = ManageVectorDB()
+        self.registry = get_ingestion_registry()
+        self.insert_engine = InsertInformation()
+        # Bulk mode writes Parquet/NumPy files and imports them server side, for very large backfills
+        self.bulk = bulk
+        self.batch_rows = int(os.getenv("MILVUS_BULK_BATCH_ROWS", 100000)) if bulk else self.insert_engine.insert_batch_rows
+
+    def copy_files(self, collection_name, target_collection_name):
+        """Insert every registered file of collection_name into target_collection_name, returns the registry updates."""
+        registry_updates = []
+        columns = {}
+        pending = []
+
+        def flush():
+            if self.bulk and columns:
+                self.db_engine.bulk_import_into_collection(target_collection_name, columns)
+            else:
+                primary_keys = self.insert_engine.insert_columns(self.db_engine, target_collection_name, columns)
+            offset = 0
+            for file, hashes in pending:
+                if self.bulk:
+                    chunk_ids = self.resolve_chunk_ids(target_collection_name, file["file_id"], hashes)
+                else:
+                    chunk_ids = primary_keys[offset:offset + len(hashes)]
+                    offset += len(hashes)
+                registry_updates.append({
+                    **file,
+                    "chunks": [(position, chunk_hash, chunk_ids[position]) for position, chunk_hash in enumerate(hashes)]
+                })
+            columns.clear()
+            pending.clear()
+
+        for file in self.registry.list_files(collection_name):
+            splitter_config = json.loads(file["splitter_config"])
+            # Text is re-split from the uploaded file, only chunks missing from the store reach the vectorizer
+            informations, metadata = self.insert_engine.parse_document(
+                path=file["file_path"],
+                client_id=file["client_id"],
+                project_id=file["project_id"],
+                file_id=file["file_id"],
+                separator_type=splitter_config["separator_type"],
+                separator=splitter_config["separator"],
+                chunk_size=splitter_config["chunk_size"],
+                chunk_overlap=splitter_config["chunk_overlap"]
+            )
+            hashes = [hash_chunk(information) for information in informations]
+            vectors, embedded = self.insert_engine.prepare_vectors(self.db_engine, collection_name, informations, hashes, {})
+            self.insert_engine.append_columns(columns, informations, vectors, metadata)
+            pending.append(({
+                "file_id": file["file_id"],
+                "client_id": file["client_id"],
+                "project_id": file["project_id"],
+                "collection_name": collection_name,
+                "document_key": file["document_key"],
+                "file_hash": file["file_hash"],
+                "file_path": file["file_path"],
+                "splitter_config": splitter_config
+            }, hashes))
+            if len(columns.get("vector", [])) >= self.batch_rows:
+                flush()
+        flush()
+        return registry_updates
+
+    def resolve_chunk_ids(self, collection_name, file_id, hashes):
+        # Bulk insert returns no primary keys, rows of the file are matched back to chunks by text hash
+        ids_by_hash = {}
+        for row in self.db_engine.query_file_rows(collection_name, file_id, ["id", "text"]):
+            ids_by_hash.setdefault(hash_chunk(row["text"]), []).append(row["id"])
+        return [ids_by_hash[chunk_hash].pop() for chunk_hash in hashes]
+
+    def rebuild_collection(self, collection_name, collection_index_type):
+        """Recreate a dropped collection from its registered files."""
+        if self.db_engine.check_collection_exists(collection_name):
+            raise Exception(f"Collection '{collection_name}' still exists, drop it first or reindex it")
+        with self.registry.write_fence(collection_name, "rebuild"):
+            self.db_engine.create_collection(collection_name, collection_index_type)
+            registry_updates = self.copy_files(collection_name, collection_name)
+            for registry_update in registry_updates:
+                self.registry.save_file(**registry_update)
+        return len(registry_updates)
+
+    def reindex_collection(self, collection_name, collection_index_type):
+        """Copy every row, registered or not, into a collection under another index type, the old one serves searches until the swap."""
+        migrate_engine = MigrateCollection(self.insert_engine.insert_batch_rows)
+        with self.registry.write_fence(collection_name, "reindex"):
+            staging_collection_name = f"{collection_name}_reindex"
+            if self.db_engine.check_collection_exists(staging_collection_name):
+                self.db_engine.drop_collection(staging_collection_name)
+            # Only the index type changes, the tenancy and hybrid fields of the collection are kept
+            config = self.db_engine.get_collection_config(collection_name)
+            self.db_engine.create_collection(
+                staging_collection_name,
+                collection_index_type,
+                tenant_mode=config["tenancy"]["mode"],
+                num_partitions=config["tenancy"].get("num_partitions"),
+                hybrid=config["hybrid"]["enabled"],
+                hybrid_params=config["hybrid"]
+            )
+            id_map = migrate_engine.copy_rows(collection_name, staging_collection_name)
+            migrate_engine.verify_copy(collection_name, staging_collection_name)
+            self.db_engine.drop_collection(collection_name)
+            self.db_engine.rename_collection(staging_collection_name, collection_name)
+            # Milvus ids changed with the copy, the registry follows only once the swap is done
+            self.registry.remap_chunk_ids(collection_name, id_map)
+        return len(id_map)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Reindex or rebuild a collection from the embedding store")
+    parser.add_argument("action", choices=["reindex", "rebuild", "compact-store", "clear-fence"])
+    parser.add_argument("--collection-name")
+    parser.add_argument("--collection-index-type", default="HNSW", choices=list(DEFAULT_INDEX_PARAMS))
+    parser.add_argument("--bulk", action="store_true", help="Rebuild through Milvus bulk insert instead of insert calls")
+    args = parser.parse_args()
+
+    if args.action == "compact-store":
+        print(f"Compacted {get_embedding_store().compact()} vectors")
+    elif args.action == "clear-fence":
+        # Writes to the collection are accepted again, only for a fence left by a job that is no longer running
+        fence = get_ingestion_registry().clear_fence(args.collection_name)
+        print(f"Cleared the {fence[0]} fence of {fence[1]}" if fence else f"Collection '{args.collection_name}' is not fenced")
+    elif args.action == "reindex":
+        print(f"Reindexed {ReindexInformation().reindex_collection(args.collection_name, args.collection_index_type)} rows")
+    else:
+        print(f"Rebuilt {ReindexInformation(bulk=args.bulk).rebuild_collection(args.collection_name, args.collection_index_type)} files")
@@ -1,37 +1,56 @@
 import os
 from dotenv import load_dotenv
 load_dotenv()
-import httpx
 from ManageVectorDB import ManageVectorDB
+from ManageHttpClient import get_http_client
+from ManageCache import get_embedding_cache
+from ManageSparseEmbeddingModel import get_sparse_model
 
 class SearchInformation:
     def __init__(self):
         self.name = "InsertInformation"
         self.vectorize_url = os.getenv("VECTOR_QUERY_URI")
         self.reranker_url = os.getenv("RERANK_DOCS_URI")
+        self.vectorize_timeout = float(os.getenv("VECTOR_QUERY_TIMEOUT", 10))
+        self.reranker_timeout = float(os.getenv("RERANK_DOCS_TIMEOUT", 60))
+        # Candidates fetched per returned result when reranking and candidate_k is not given
+        self.rerank_candidate_factor = int(os.getenv("RERANK_CANDIDATE_FACTOR", 4))
+        self.rerank_budget_ms = float(os.getenv("RERANK_BUDGET_MS", 0)) or None
+        self.http_client = get_http_client()
+        self.embedding_cache = get_embedding_cache()
 
     async def vectorize_query(self, query):
-        """Send async request to vectorize the query."""
-        async with httpx.AsyncClient() as client:
-            response = await client.post(self.vectorize_url, json={"text": query})
-            if response.status_code != 200:
-                raise Exception(f"Failed to vectorize query: {response.text}")
-            vector_query = response.json().get("vector")
+        """Send async request to vectorize the query, repeated queries are served from the embedding cache."""
+        if self.embedding_cache is not None:
+            cached_vector = await self.embedding_cache.get(query)
+            if cached_vector is not None:
+                return [cached_vector]
+        response = await self.http_client.post(self.vectorize_url, json={"text": query}, timeout=self.vectorize_timeout)
+        if response.status_code != 200:
+            raise Exception(f"Failed to vectorize query: {response.text}")
+        vector_query = response.json().get("vector")
         if not vector_query:
             raise Exception("No vector returned from vectorization service")
+        if self.embedding_cache is not None:
+            await self.embedding_cache.set(query, vector_query[0])
         return vector_query
 
-    async def rerank_documents(self, query, documents, top_k):
-        """Send async request to rerank documents."""
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                self.reranker_url,
-                json={"query": query, "documents": documents, "top_k": top_k}
-            )
-            if response.status_code != 200:
-                raise Exception(f"Failed to rerank documents: {response.text}")
-            reranked_documents = response.json().get("reranked-documents")
-        if not reranked_documents:
+    async def rerank_documents(self, query, documents, top_k, budget_ms=None):
+        """Send async request to rerank documents, within budget_ms of scoring when given."""
+        if not documents:
+            return []
+        response = await self.http_client.post(
+            self.reranker_url,
+            json={"query": query, "documents": documents, "top_k": top_k, "budget_ms": budget_ms},
+            timeout=self.reranker_timeout
+        )
+        if response.status_code == 429:
+            # Reranker backlog full, the candidates keep their vector order
+            return [{"text": document, "score": None, "index": index} for index, document in enumerate(documents[:top_k])]
+        if response.status_code != 200:
+            raise Exception(f"Failed to rerank documents: {response.text}")
+        reranked_documents = response.json().get("reranked-documents")
+        if reranked_documents is None:
             raise Exception("No documents returned from reranker service")
         return reranked_documents
 
@@ -42,24 +61,42 @@ class SearchInformation:
                 result_dicts.append(item.fields.get("text"))
         return result_dicts
 
-    async def search_information(self, client_id, project_id, collection_name, collection_index_type, query, number_results, rerank):
-        # Vectorize the query
+    async def merge_rerank_results(self, search_result, reranked_documents):
+        # Documents the reranker had no time for keep their vector score, after every scored one
+        hits = [hit for data in search_result for hit in data]
+        return [
+            {
+                "score": document["score"] if document["score"] is not None else hits[document["index"]].distance,
+                "text": document["text"],
+                "reranked": document["score"] is not None
+            }
+            for document in reranked_documents
+        ]
+
+    async def search_information(self, client_id, project_id, collection_name, collection_index_type, query, number_results, rerank, hybrid=None, candidate_k=None, final_k=None, rerank_budget_ms=None):
+        # Two stages: candidate_k hits from Milvus, final_k of them returned after the optional rerank
+        final_k = final_k or number_results
+        candidate_k = candidate_k or (final_k * self.rerank_candidate_factor if rerank else final_k)
+        # Vectorize the query, the lexical sparse vector is cheap and computed locally
         vector_query = await self.vectorize_query(query)
+        sparse_query = get_sparse_model().encode_queries([query]) if hybrid is not False else None
         # Perform the search with the vectorized query
         db_engine = ManageVectorDB()
-        search_result = db_engine.search_in_collection(
+        search_result = await db_engine.async_search_in_collection(
             client_id,
             project_id,
             collection_name,
             collection_index_type,
             vector_query,
-            number_results
+            candidate_k,
+            sparse_query
         )
         # Rerank if needed
         if rerank:
             reranker_formated_documents = await self.format_rerank_results(search_result)
-            search_result = await self.rerank_documents(query, reranker_formated_documents, number_results)
-        return search_result
+            reranked_documents = await self.rerank_documents(query, reranker_formated_documents, final_k, rerank_budget_ms or self.rerank_budget_ms)
+            return await self.merge_rerank_results(search_result, reranked_documents)
+        return [data[:final_k] for data in search_result]
 
     async def format_search_results(self, results):
         try:
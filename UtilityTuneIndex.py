@@ -0,0 +1,189 @@
+import os
+import time
+import argparse
+import numpy as np
+from dotenv import load_dotenv
+load_dotenv()
+from ManageVectorDB import ManageVectorDB
+from ManageHttpClient import get_http_client
+
+# Candidate params swept per index type
+SEARCH_SWEEP = {
+    "IVF_FLAT": [{"nprobe": nprobe} for nprobe in (1, 2, 4, 8, 16, 32, 64, 128)],
+    "HNSW": [{"ef": ef} for ef in (16, 32, 64, 128, 256, 512)],
+    "IVF_SQ8": [{"nprobe": nprobe, "refine_factor": refine_factor} for nprobe in (4, 8, 16, 32, 64, 128) for refine_factor in (1, 2, 4)],
+    "IVF_PQ": [{"nprobe": nprobe, "refine_factor": refine_factor} for nprobe in (4, 8, 16, 32, 64, 128) for refine_factor in (1, 4, 8)],
+    "DISKANN": [{"search_list": search_list} for search_list in (16, 32, 64, 100, 200, 400)],
+    "SCANN": [{"nprobe": nprobe, "reorder_k": reorder_k} for nprobe in (8, 16, 32, 64, 128) for reorder_k in (50, 100, 200)],
+}
+BUILD_SWEEP = {
+    "IVF_FLAT": [{"nlist": nlist} for nlist in (64, 128, 256, 512, 1024)],
+    "HNSW": [{"M": M, "efConstruction": efConstruction} for M, efConstruction in ((16, 64), (32, 128), (64, 64), (64, 256))],
+    "IVF_SQ8": [{"nlist": nlist} for nlist in (64, 128, 256, 512, 1024)],
+    "IVF_PQ": [{"nlist": nlist, "m": m, "nbits": 8} for nlist in (128, 512) for m in (24, 48, 96)],
+    "DISKANN": [{}],
+    "SCANN": [{"nlist": nlist, "with_raw_data": True} for nlist in (64, 128, 256, 512, 1024)],
+}
+
+def pareto_front(results):
+    """Settings no other setting beats on both recall and p50 latency, ordered by latency."""
+    front = []
+    for result in sorted(results, key=lambda result: (result["p50_ms"], -result["recall"])):
+        if not front or result["recall"] > front[-1]["recall"]:
+            front.append(result)
+    return front
+
+def recommend(front, target_recall):
+    # Fastest setting reaching the target recall, otherwise the most accurate one
+    for result in front:
+        if result["recall"] >= target_recall:
+            return result
+    return front[-1]
+
+class TuneIndex:
+    """Sweeps index build and search params of a collection, measuring recall@k against brute force and latency."""
+    def __init__(self, collection_name, k=10, client_id=None, project_id=None):
+        self.name = "TuneIndex"
+        self.collection_name = collection_name
+        self.k = k
+        self.db_engine = ManageVectorDB()
+        self.config = self.db_engine.get_collection_config(collection_name)
+        self.built_index_params = self.config["index_params"]
+        # Measured on the tenant's partition when a tenant is given, like the searches of that tenant
+        self.filter, self.partition_name = self.db_engine.get_tenant_route(self.config, client_id, project_id) if client_id and project_id else ("", None)
+
+    def load_corpus(self):
+        # Every vector in scope, normalized so a dot product is the COSINE score used by the index
+        collection = self.db_engine.pool.get_collection(self.collection_name)
+        iterator = collection.query_iterator(
+            batch_size=1000,
+            expr=self.filter or "id >= 0",
+            output_fields=["id", "vector"],
+            partition_names=[self.partition_name] if self.partition_name is not None else None
+        )
+        ids = []
+        vectors = []
+        while True:
+            batch = iterator.next()
+            if not batch:
+                iterator.close()
+                break
+            ids.extend(row["id"] for row in batch)
+            vectors.extend(row["vector"] for row in batch)
+        self.ids = np.asarray(ids)
+        self.vectors = np.asarray(vectors, dtype=np.float32)
+        self.vectors /= np.linalg.norm(self.vectors, axis=1, keepdims=True)
+
+    def load_queries(self, queries_file=None, sample_queries=200, seed=0):
+        """Held-out queries: texts vectorized by the vectorizer, or stored chunks whose own row is excluded from the results."""
+        if queries_file:
+            http_client = get_http_client()
+            with open(queries_file, encoding="utf-8") as file:
+                texts = [line.strip() for line in file if line.strip()]
+            vectors = []
+            for text in texts:
+                response = http_client.post_sync(os.getenv("VECTOR_QUERY_URI"), json={"text": text}, timeout=60)
+                if response.status_code != 200:
+                    raise Exception(f"Failed to vectorize query: {response.text}")
+                vectors.append(response.json()["vector"][0])
+            self.queries = np.asarray(vectors, dtype=np.float32)
+            self.query_ids = [None] * len(texts)
+        else:
+            sample = np.random.default_rng(seed).choice(len(self.ids), size=min(sample_queries, len(self.ids)), replace=False)
+            self.queries = self.vectors[sample]
+            self.query_ids = [int(self.ids[i]) for i in sample]
+        self.queries /= np.linalg.norm(self.queries, axis=1, keepdims=True)
+        self.ground_truth = self.brute_force()
+
+    def brute_force(self):
+        ground_truth = []
+        for query, query_id in zip(self.queries, self.query_ids):
+            scores = self.vectors @ query
+            top = np.argpartition(-scores, min(self.k + 1, len(scores) - 1))[:self.k + 1]
+            top = top[np.argsort(-scores[top])]
+            ground_truth.append([int(self.ids[i]) for i in top if int(self.ids[i]) != query_id][:self.k])
+        return ground_truth
+
+    def measure(self, search_params):
+        config = {**self.config, "search_params": search_params}
+        latencies = []
+        recalls = []
+        for query, query_id, expected in zip(self.queries, self.query_ids, self.ground_truth):
+            start_time = time.perf_counter()
+            results = self.db_engine.search_vectors(self.collection_name, config, [query.tolist()], self.k + 1, self.filter, [], self.partition_name)
+            latencies.append((time.perf_counter() - start_time) * 1000)
+            found = [hit.id for hit in results[0] if hit.id != query_id][:self.k]
+            recalls.append(len(set(found) & set(expected)) / max(len(expected), 1))
+        return {
+            "index_params": self.config["index_params"],
+            "search_params": search_params,
+            "recall": float(np.mean(recalls)),
+            "p50_ms": float(np.percentile(latencies, 50)),
+            "p99_ms": float(np.percentile(latencies, 99)),
+        }
+
+    def sweep(self, sweep_build=False):
+        """Measure every candidate, build candidates rebuild the index of the collection in place."""
+        index_type = self.config["index_type"]
+        search_candidates = SEARCH_SWEEP[index_type]
+        if "nlist" in self.config["index_params"]:
+            search_candidates = [params for params in search_candidates if params["nprobe"] <= self.config["index_params"]["nlist"]]
+        if not sweep_build:
+            return [self.measure(search_params) for search_params in search_candidates]
+
+        original_config = self.config
+        results = []
+        for index_params in BUILD_SWEEP[index_type]:
+            self.config = {**original_config, "index_params": index_params}
+            self.db_engine.rebuild_index(self.collection_name, self.config)
+            self.built_index_params = index_params
+            candidates = SEARCH_SWEEP[index_type]
+            if "nlist" in index_params:
+                candidates = [params for params in candidates if params["nprobe"] <= index_params["nlist"]]
+            results.extend(self.measure(search_params) for search_params in candidates)
+        self.config = original_config
+        return results
+
+    def apply(self, result):
+        """Store the chosen params, the index is rebuilt when its build params differ from the built ones."""
+        config = {**self.config, "index_params": result["index_params"], "search_params": result["search_params"]}
+        if result["index_params"] != self.built_index_params:
+            self.db_engine.rebuild_index(self.collection_name, config)
+            self.built_index_params = result["index_params"]
+        else:
+            self.db_engine.collection_config.save(self.collection_name, config)
+        self.config = config
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Tune index and search params of a collection on the recall/latency Pareto front")
+    parser.add_argument("--collection-name", required=True)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--queries-file", help="Held-out queries, one per line, vectorized through VECTOR_QUERY_URI")
+    parser.add_argument("--sample-queries", type=int, default=200, help="Stored chunks used as queries when no queries file is given")
+    parser.add_argument("--client-id")
+    parser.add_argument("--project-id")
+    parser.add_argument("--sweep-build", action="store_true", help="Also sweep build params (nlist, M/efConstruction, PQ m), rebuilds the index in place")
+    parser.add_argument("--target-recall", type=float, default=0.95)
+    parser.add_argument("--apply", action="store_true", help="Store the recommended settings in the collection config")
+    args = parser.parse_args()
+
+    tuner = TuneIndex(args.collection_name, args.k, args.client_id, args.project_id)
+    original_config = tuner.config
+    tuner.load_corpus()
+    tuner.load_queries(args.queries_file, args.sample_queries)
+    results = tuner.sweep(args.sweep_build)
+    front = pareto_front(results)
+    best = recommend(front, args.target_recall)
+
+    print(f"{tuner.config['index_type']} on {len(tuner.ids)} vectors, {len(tuner.queries)} queries, recall@{args.k}")
+    for result in results:
+        marker = "*" if result is best else ("p" if result in front else " ")
+        print(f"{marker} build={result['index_params']} search={result['search_params']} recall={result['recall']:.4f} p50={result['p50_ms']:.2f}ms p99={result['p99_ms']:.2f}ms")
+    print(f"Recommended (target recall {args.target_recall}): build={best['index_params']} search={best['search_params']}")
+
+    if args.apply:
+        tuner.apply(best)
+        print("Applied to the collection config")
+    elif tuner.built_index_params != original_config["index_params"]:
+        # The sweep left the last candidate built, put the original index back
+        tuner.db_engine.rebuild_index(args.collection_name, original_config)
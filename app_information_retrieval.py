@@ -1,11 +1,13 @@
 from project_docs import project_info
 import os
 import time
+import asyncio
 import uuid
 import datetime
 import uvicorn
 import logging
 from pathlib import Path
+from contextlib import asynccontextmanager
 
 from fastapi import FastAPI, HTTPException, status, UploadFile, File
 from fastapi.responses import JSONResponse, StreamingResponse
@@ -19,10 +21,15 @@ from IOModel import (
     OutputModelInsert,
     OutputModelInsertStatus,
     OutputModelDelete,
-    OutputModelSearch
+    OutputModelSearch,
+    OutputModelMetrics
 )
 
 from ManageVectorDB import ManageVectorDB
+from ManageHttpClient import get_http_client
+from ManageMetrics import get_metrics_registry
+from ManageCache import get_search_result_cache
+from ManageIngestionRegistry import CollectionFencedError
 
 from app_worker import insert_app, insert_information_worker
 from celery.result import AsyncResult
@@ -36,8 +43,16 @@ log = logging.getLogger(__name__)
 # Working Dir Settings
 current_dir = os.getcwd()
 
+# App Lifespan: Shared Keep-Alive HTTP Client to Vectorizer Service
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    http_client = get_http_client()
+    await http_client.start()
+    yield
+    await http_client.close()
+
 # FastApi App Settings
-app = FastAPI(**project_info.project_info())
+app = FastAPI(**project_info.project_info(), lifespan=lifespan)
 app.add_middleware(
     CORSMiddleware,
     allow_credentials=True,
@@ -50,6 +65,17 @@ app_response_message = {
     405: {"model": OutputModelError}, # Method not Allowed Response Template
 }
 
+# Search Result Cache Settings
+search_cache = get_search_result_cache()
+
+async def refresh_pending_inserts(scope):
+    # Invalidate a scope once its insert tasks are finished, the result backend is queried off the event loop
+    loop = asyncio.get_running_loop()
+    for task_id, expired in search_cache.get_pending_inserts(scope):
+        # A task whose result never lands (worker crash, result expiry) stops holding the scope after its max age
+        if expired or await loop.run_in_executor(None, AsyncResult(task_id, app=insert_app).ready):
+            await search_cache.complete_pending_insert(scope, task_id)
+
 # Apps Start Log Information
 log.info(f'''\n
 [APP START] ********************************************************************
@@ -70,6 +96,19 @@ async def main():
     )
     return response
 
+# Metrics Route --------------------------------------------------------------------------------------------------------------------------------------------------------------
+@app.get(
+    "/metrics",
+    response_model=OutputModelMetrics, # Swagger for Metrics Output Template
+    responses=app_response_message # Swagger for Error Template
+)
+async def metrics():
+    response = OutputModelMetrics(
+        timestamp=time.time(),
+        metrics=get_metrics_registry().snapshot()
+    )
+    return response
+
 # Upload File Route ----------------------------------------------------------------------------------------------------------------------------------------------------------
 @app.post(
     "/upload",
@@ -125,10 +164,24 @@ async def insert_document(request_insert: InsertModel):
         db_engine = ManageVectorDB()
         if not db_engine.check_collection_exists(request_insert.collection_name):
             # If collection not exist then create collection
-            collection_creation_status = db_engine.create_collection(request_insert.collection_name, request_insert.collection_index_type)
+            collection_creation_status = db_engine.create_collection(
+                request_insert.collection_name,
+                request_insert.collection_index_type,
+                request_insert.index_params,
+                request_insert.search_params,
+                hybrid=request_insert.hybrid,
+                hybrid_params=request_insert.hybrid_params
+            )
         
         # Push each file path to the Celery queue for processing
-        task = insert_information_worker.delay(request_insert.dict())
+        task = insert_information_worker.delay(request_insert.dict(exclude={"index_params", "search_params", "hybrid", "hybrid_params"}))
+
+        # Stop serving cached results for this scope until the task is finished
+        if search_cache is not None:
+            await search_cache.track_pending_insert(
+                (request_insert.client_id, request_insert.project_id, request_insert.collection_name),
+                task.id
+            )
         
         # Define response 
         response = OutputModelInsert(
@@ -197,6 +250,10 @@ async def delete_document(request_delete: DeleteModel):
         # Delete information
         delete_engine = DeleteInformation()
         delete_result = await delete_engine.delete_information(**request_delete.dict())
+
+        # Drop cached search results of this scope
+        if search_cache is not None:
+            await search_cache.invalidate_scope((request_delete.client_id, request_delete.project_id, request_delete.collection_name))
         
         # Define response
         response = OutputModelDelete(
@@ -206,6 +263,10 @@ async def delete_document(request_delete: DeleteModel):
 
         log.info(f"{datetime.datetime.now()}  \033[94m[D] Delete {request_id}:\033[0m {repr(response)}")
         return response
+    except CollectionFencedError as e:
+        # Collection is being reindexed or migrated, the delete can be sent again once it is swapped
+        log.warning(f"{datetime.datetime.now()} \033[93m[W] Delete Fenced {request_id}:\033[0m {str(e)}")
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e), headers={"Retry-After": "30"})
     except Exception as e:
         # Error Handling Block: General Error Information
         log.error(f"{datetime.datetime.now()} \033[93m[E] Delete Error Exception {request_id}:\033[0m {str(e)}")
@@ -225,12 +286,22 @@ async def search_document(request_search: SearchModel):
         # Log start time to calculate execution time
         start_time = time.time()
         
-        # Search
-        search_engine = SearchInformation()
-        search_result = await search_engine.search_information(**request_search.dict())
-        
-        # Formatting result
-        format_result = await search_engine.format_search_results(search_result)
+        # Check cached result of identical search
+        scope = (request_search.client_id, request_search.project_id, request_search.collection_name)
+        cache_key, format_result = None, None
+        if search_cache is not None:
+            await refresh_pending_inserts(scope)
+            cache_key, format_result = await search_cache.lookup(scope, request_search.dict())
+
+        if format_result is None:
+            # Search
+            search_engine = SearchInformation()
+            search_result = await search_engine.search_information(**request_search.dict())
+            
+            # Formatting result
+            format_result = await search_engine.format_search_results(search_result)
+            if search_cache is not None:
+                search_cache.store(cache_key, scope, format_result)
         
         # Log finish time to calculate execution time
         finish_time = time.time()
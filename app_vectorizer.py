@@ -1,20 +1,112 @@
+import os
+import time
+import asyncio
 import logging
 import uvicorn
 from pathlib import Path
+from functools import partial
+from contextlib import asynccontextmanager
+from concurrent.futures import ThreadPoolExecutor
 from fastapi import FastAPI, HTTPException
 from pydantic import BaseModel, Field
-from typing import Union, List
-from ManageEmbeddingModel import get_sentence_transformers_model
-from ManageEmbeddingRerankModel import get_reranker_model_model
+from typing import Union, List, Optional
+from ManageModelHost import get_model_backend
+from ManageMicroBatcher import MicroBatcher, BacklogFullError
+from ManageMetrics import get_metrics_registry
+from ManageCache import get_embedding_cache, get_rerank_score_cache
 
 # Logging Settings
 logging.basicConfig(level=logging.INFO)
 log = logging.getLogger(__name__)
 
+# Models loaded in this process, or a client of the model host pool (ManageModelHost.py) when MODEL_HOST_ADDRESS is set
+# Only the VECTORIZER_MODELS of this deployment are served, each loads on warm-up or on its first request
+models = get_model_backend()
+warm_up_enabled = os.getenv("VECTORIZER_WARMUP", "true").lower() == "true"
+models_ready = not warm_up_enabled
+# Batches in flight per executor: one for in-process models, up to MODEL_HOST_CONCURRENCY when the host pool runs them
+model_concurrency = int(os.getenv("MODEL_HOST_CONCURRENCY", 1)) if os.getenv("MODEL_HOST_ADDRESS") else 1
+
+# Encode thread(s): the model is CPU/GPU bound, so running it off the event loop is what matters
+encode_executor = ThreadPoolExecutor(max_workers=model_concurrency, thread_name_prefix="encode")
+
+def encode_query_batch(texts):
+    """Encode a coalesced batch of queries in one forward pass."""
+    return [vector.tolist() for vector in models.encode_queries(texts)]
+
+query_batcher = MicroBatcher(
+    name="vectorize_query",
+    batch_fn=encode_query_batch,
+    executor=encode_executor,
+    max_batch_size=int(os.getenv("QUERY_BATCH_MAX_SIZE", 32)),
+    max_wait_ms=float(os.getenv("QUERY_BATCH_MAX_WAIT_MS", 5)),
+    max_concurrency=model_concurrency
+)
+embedding_cache = get_embedding_cache()
+rerank_score_cache = get_rerank_score_cache()
+document_bucket_size = int(os.getenv("VECTORIZE_BUCKET_SIZE", 32))
+document_bucket_token_budget = int(os.getenv("VECTORIZE_BUCKET_TOKEN_BUDGET", 16384))
+
+# Reranker on its own thread, a long cross-encoder batch never delays query encodes
+rerank_executor = ThreadPoolExecutor(max_workers=model_concurrency, thread_name_prefix="rerank")
+rerank_bucket_size = int(os.getenv("RERANK_BUCKET_SIZE", 32))
+rerank_bucket_token_budget = int(os.getenv("RERANK_BUCKET_TOKEN_BUDGET", 16384))
+rerank_budget_batch_size = int(os.getenv("RERANK_BUDGET_BATCH_SIZE", 16))
+
+def score_pair_batch(pairs):
+    """Score (query, document) pairs packed from concurrent rerank requests."""
+    return models.score_pairs_bucketed(pairs, rerank_bucket_size, rerank_bucket_token_budget)
+
+def rank_documents(documents, scores, top_k):
+    """Scored documents by descending score, then the unscored (None) ones in their vector order."""
+    scored = sorted((index for index, score in enumerate(scores) if score is not None), key=lambda index: -scores[index])
+    order = scored + [index for index, score in enumerate(scores) if score is None]
+    return [{"text": documents[index], "score": scores[index], "index": index} for index in order[:top_k]]
+
+rerank_batcher = MicroBatcher(
+    name="rerank_documents",
+    batch_fn=score_pair_batch,
+    executor=rerank_executor,
+    max_batch_size=int(os.getenv("RERANK_BATCH_MAX_PAIRS", 128)),
+    max_wait_ms=float(os.getenv("RERANK_BATCH_MAX_WAIT_MS", 5)),
+    max_pending=int(os.getenv("RERANK_MAX_PENDING_PAIRS", 2048)),
+    max_concurrency=model_concurrency
+)
+truncated_documents = get_metrics_registry().counter("vectorize_documents_truncated", "Document chunks longer than the model max sequence length")
+
+async def warm_up_models():
+    """Load and warm up the served models off the event loop, /ready answers 200 once done."""
+    global models_ready
+    loop = asyncio.get_running_loop()
+    while True:
+        try:
+            await loop.run_in_executor(encode_executor, models.warm_up)
+            break
+        except Exception as e:
+            # The model host may still be starting, keep the readiness probe failing and retry
+            log.warning(f"Warm up models: {e}")
+            await asyncio.sleep(5)
+    models_ready = True
+    log.info(f"Warm up models: {', '.join(models.served)} ready")
+
+def require_model(model):
+    if model not in models.served:
+        raise HTTPException(status_code=503, detail=f"The {model} model is not served by this deployment")
+
+# App Lifespan: Query and Rerank Micro-Batchers, Model Warm-Up in the Background
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await query_batcher.start()
+    await rerank_batcher.start()
+    warm_up_task = asyncio.create_task(warm_up_models()) if warm_up_enabled else None
+    yield
+    if warm_up_task is not None:
+        warm_up_task.cancel()
+    await query_batcher.stop()
+    await rerank_batcher.stop()
+
 # Initialize the FastAPI app
-app = FastAPI()
-sentence_transformers_model = get_sentence_transformers_model()
-reranker_model = get_reranker_model_model()
+app = FastAPI(lifespan=lifespan)
 
 # Define request models
 class SingleTextRequest(BaseModel):
@@ -27,40 +119,100 @@ class RerankerRequest(BaseModel):
     query: str
     top_k: int
     documents: List[str]
+    budget_ms: Optional[float] = Field(None, description="Scoring time slice, documents left unscored keep their order")
 
 # Endpoint for encoding a single text
 @app.post("/vectorize-query")
 async def vectorize_query(request: SingleTextRequest):
+    require_model("embedding")
     text = request.text
     if not text:
         raise HTTPException(status_code=400, detail="No text provided")
 
-    # Vectorize the single text query
-    vector_query = sentence_transformers_model.encode_queries([text])
-    return {"vector": [vector_query[0].tolist()]}
+    # Repeated queries skip the model entirely
+    if embedding_cache is not None:
+        cached_vector = await embedding_cache.get(text)
+        if cached_vector is not None:
+            return {"vector": [cached_vector]}
+
+    # Vectorize the single text query, batched together with concurrent queries
+    vector_query = await query_batcher.submit(text)
+    if embedding_cache is not None:
+        await embedding_cache.set(text, vector_query)
+    return {"vector": [vector_query]}
 
 # Endpoint for encoding a list of texts (documents)
 @app.post("/vectorize-documents")
 async def vectorize_documents(request: TextListRequest):
+    require_model("embedding")
     texts = request.texts
     if not texts:
         raise HTTPException(status_code=400, detail="No texts provided")
 
-    # Vectorize the list of texts
-    vectors = sentence_transformers_model.encode_documents(texts)
-    return {"vectors": [vector.tolist() for vector in vectors]}
+    # Vectorize the list of texts on the encode thread, bucketed by token length and restored to input order
+    loop = asyncio.get_running_loop()
+    vectors, truncated = await loop.run_in_executor(
+        encode_executor,
+        partial(models.encode_documents_bucketed, texts, document_bucket_size, document_bucket_token_budget)
+    )
+    if truncated:
+        truncated_documents.inc(truncated)
+        log.warning(f"Vectorize documents: {truncated} of {len(texts)} texts truncated")
+    return {"vectors": [vector.tolist() for vector in vectors], "truncated": truncated}
 
 # Endpoint for Reranking Documents
 @app.post("/rerank-documents")
 async def rerank_documents(request: RerankerRequest):
-    # Rerank Documents
-    reranked_documents = reranker_model(query=request.query, documents=request.documents, top_k=request.top_k)
+    require_model("reranker")
+    if not request.documents:
+        return {"query": request.query, "reranked-documents": []}
+
+    # Pairs scored by earlier requests are served from the cache, only the others reach the model
+    scores = rerank_score_cache.get_many(request.query, request.documents) if rerank_score_cache is not None else [None] * len(request.documents)
+    uncached = [index for index, score in enumerate(scores) if score is None]
+    if uncached:
+        # With a time slice, the head of the list is always scored, then chunks of pairs until the deadline passes
+        # Pairs of a chunk still queued at the deadline or never submitted stay unscored and keep their vector order
+        deadline = time.perf_counter() + request.budget_ms / 1000 if request.budget_ms else None
+        chunk_size = rerank_budget_batch_size if deadline is not None else len(uncached)
+        uncached_scores = []
+        try:
+            for start in range(0, len(uncached), chunk_size):
+                if start and time.perf_counter() >= deadline:
+                    break
+                chunk = uncached[start:start + chunk_size]
+                # Rerank Documents in batches shared with concurrent requests, admission is bounded by the pair backlog
+                uncached_scores += await rerank_batcher.submit_many(
+                    [(request.query, request.documents[index]) for index in chunk],
+                    [deadline if start else None] * len(chunk)
+                )
+        except BacklogFullError as e:
+            log.warning(f"Rerank documents: {e}")
+            raise HTTPException(status_code=429, detail="Reranker backlog full", headers={"Retry-After": "1"})
+        uncached_scores += [None] * (len(uncached) - len(uncached_scores))
+        for index, score in zip(uncached, uncached_scores):
+            scores[index] = score
+        if rerank_score_cache is not None:
+            rerank_score_cache.set_many(request.query, [request.documents[index] for index in uncached], uncached_scores)
+    reranked_documents = rank_documents(request.documents, scores, request.top_k)
 
     return {
         "query": request.query,
         "reranked-documents": reranked_documents
     }
 
+# Endpoint for Readiness Probes: 503 until the served models are warmed up
+@app.get("/ready")
+async def ready():
+    if not models_ready:
+        raise HTTPException(status_code=503, detail="Models warming up")
+    return {"status": "ready", "models": list(models.served)}
+
+# Endpoint for Batching and Latency Metrics
+@app.get("/metrics")
+async def metrics():
+    return get_metrics_registry().snapshot()
+
 if __name__ == "__main__":    
     log.info(f"{Path(__file__).stem}:app")
     uvicorn.run(f"{Path(__file__).stem}:app", port=2025, host="0.0.0.0")
\ No newline at end of file
@@ -1,5 +1,7 @@
 
 from UtilityInsertInformation import InsertInformation
+from ManageCache import invalidate_shared_search_scope
+from ManageIngestionRegistry import CollectionFencedError
 from celery import Celery
 
 insert_app = Celery(
@@ -12,5 +14,12 @@ insert_app = Celery(
 def insert_information_worker(self, data):
     self.update_state(state="PROGRESS")
     insert_engine = InsertInformation()
-    result = insert_engine.insert_information(**data)
-    return result
\ No newline at end of file
+    try:
+        result = insert_engine.insert_information(**data)
+    except CollectionFencedError as e:
+        # Collection is being reindexed or migrated, the insert runs again once it is swapped
+        raise self.retry(exc=e, countdown=30, max_retries=240)
+    finally:
+        # Cached search results of this scope are stale once new chunks are inserted
+        invalidate_shared_search_scope((data["client_id"], data["project_id"], data["collection_name"]))
+    return result
@@ -0,0 +1,37 @@
+# Export the local models to ONNX and quantize them to dynamic INT8 for CPU inference (INFERENCE_BACKEND=onnx)
+# Run from models/ after the download scripts, needs torch, transformers, onnx and onnxruntime
+import os
+import torch
+from transformers import AutoTokenizer, AutoModel, AutoModelForSequenceClassification
+from onnxruntime.quantization import quantize_dynamic, QuantType
+
+# Embedding model exports its token embeddings (pooling runs outside the graph), the reranker its logits
+# Dynamic axes of each output: token embeddings follow the input sequence length, logits only the batch
+models = [
+    ("onprem-multilingual-e5-small", AutoModel, "last_hidden_state", {0: "batch", 1: "sequence"}),
+    ("onprem-bge-reranker-base", AutoModelForSequenceClassification, "logits", {0: "batch"}),
+]
+
+for models_path, model_class, output_name, output_axes in models:
+    tokenizer = AutoTokenizer.from_pretrained(models_path)
+    model = model_class.from_pretrained(models_path).eval()
+    sample = tokenizer(["Pasal 1"], ["Setiap orang berhak atas pelindungan data pribadi."], return_tensors="pt")
+    input_names = list(sample.keys())
+    os.makedirs(f"{models_path}/onnx", exist_ok=True)
+
+    # Batch and sequence length stay dynamic, inputs are passed by name whatever the forward() argument order
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            (dict(sample),),
+            f"{models_path}/onnx/model.onnx",
+            input_names=input_names,
+            output_names=[output_name],
+            dynamic_axes={**{name: {0: "batch", 1: "sequence"} for name in input_names}, output_name: output_axes},
+            opset_version=14
+        )
+
+    # Dynamic quantization: INT8 weights, activations quantized on the fly per batch
+    quantize_dynamic(f"{models_path}/onnx/model.onnx", f"{models_path}/onnx/model_int8.onnx", weight_type=QuantType.QInt8)
+    tokenizer.save_pretrained(models_path)
+    print(f"{models_path}: onnx/model.onnx, onnx/model_int8.onnx")
@@ -0,0 +1,59 @@
+# Run from the repository root: python -m project_docs.benchmarks.benchmark_bulk_import
+# Needs a running Milvus, the bulk mode also needs pymilvus[bulk_writer] and the MinIO port of milvus-services exposed
+import time
+import numpy as np
+from ManageVectorDB import ManageVectorDB
+
+collection_name = "benchmark_bulk_import"
+total_rows = 50000
+batch_rows = 1000  # INSERT_BATCH_ROWS of the insert pipeline
+
+# Synthetic chunks shaped like IndoLegalTextSplitter output, 20 files sharing their metadata
+rng = np.random.default_rng(0)
+vectors = rng.standard_normal((total_rows, 384), dtype=np.float32)
+vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+columns = {
+    "vector": vectors,
+    "text": [f"Pasal {i}\n" + "Setiap orang berhak atas pelindungan data pribadi. " * 20 for i in range(total_rows)],
+    "file_path": [f"uploaded_information_data/benchmark_{i % 20}.pdf" for i in range(total_rows)],
+    "title": ["benchmark"] * total_rows,
+    "total_pages": [100] * total_rows,
+    "format": ["PDF 1.7"] * total_rows,
+    "client_id": ["benchmark"] * total_rows,
+    "project_id": ["benchmark"] * total_rows,
+    "file_id": [f"benchmark-{i % 20}" for i in range(total_rows)],
+}
+
+def run(mode, insert):
+    db_engine = ManageVectorDB()
+    if db_engine.check_collection_exists(collection_name):
+        db_engine.drop_collection(collection_name)
+    db_engine.create_collection(collection_name, "HNSW")
+    start_time = time.perf_counter()
+    insert(db_engine)
+    elapsed = time.perf_counter() - start_time
+    print(f"{mode:8}: {total_rows / elapsed:10.0f} rows/sec ({elapsed:.1f}s)")
+    db_engine.drop_collection(collection_name)
+
+def insert_rows(db_engine):
+    # Previous path: list of per-row dicts per insert call
+    for start in range(0, total_rows, batch_rows):
+        rows = [
+            {key: (value[i].tolist() if key == "vector" else value[i]) for key, value in columns.items()}
+            for i in range(start, min(start + batch_rows, total_rows))
+        ]
+        db_engine.insert_into_collection(collection_name, rows)
+
+def insert_columns(db_engine):
+    # Column batches with a NumPy vector matrix, sliced by MILVUS_INSERT_MAX_BATCH_BYTES
+    db_engine.insert_columns_into_collection(collection_name, columns)
+
+def bulk_import(db_engine):
+    db_engine.bulk_import_into_collection(collection_name, columns)
+
+run("rows", insert_rows)
+run("columns", insert_columns)
+try:
+    run("bulk", bulk_import)
+except Exception as e:
+    print(f"bulk    : skipped ({e})")
@@ -0,0 +1,67 @@
+# Run from the repository root: python -m project_docs.benchmarks.benchmark_hybrid_search
+# Needs a running Milvus, queries are "Pasal N" references whose expected answer is the chunk starting with that article
+import re
+import numpy as np
+from pathlib import Path
+from UtilityInsertInformation import InsertInformation
+from ManageEmbeddingModel import get_sentence_transformers_model
+from ManageSparseEmbeddingModel import get_sparse_model
+from ManageVectorDB import ManageVectorDB
+
+collection_name = "benchmark_hybrid_search"
+files_path = sorted(Path("uploaded_information_data").glob("uu_*.pdf"))
+top_ks = (1, 3, 5, 10)
+sample_queries = 200
+
+# One project per file, so each query only searches the law it references
+insert_engine = InsertInformation()
+columns = {}
+queries = []
+for file_number, path in enumerate(files_path):
+    informations, metadata = insert_engine.parse_document(
+        path=str(path),
+        client_id="benchmark",
+        project_id=f"benchmark-{file_number}",
+        file_id=f"benchmark-{file_number}",
+        separator_type="IndoLegalTextSplitter",
+        separator=None,
+        chunk_size=None,
+        chunk_overlap=None
+    )
+    vectors = get_sentence_transformers_model().encode_documents(informations)
+    insert_engine.append_columns(columns, informations, [list(map(float, vector)) for vector in vectors], metadata)
+    for information in informations:
+        match = re.match(r"\s*(Pasal \d+)", information)
+        if match:
+            queries.append((file_number, match.group(1), information))
+queries = [queries[i] for i in np.random.default_rng(0).choice(len(queries), size=min(sample_queries, len(queries)), replace=False)]
+print(f"Corpus: {len(columns['vector'])} chunks from {len(files_path)} files, {len(queries)} article queries")
+
+db_engine = ManageVectorDB()
+if db_engine.check_collection_exists(collection_name):
+    db_engine.drop_collection(collection_name)
+db_engine.create_collection(collection_name, "HNSW", hybrid=True)
+db_engine.insert_columns_into_collection(collection_name, columns)
+query_vectors = get_sentence_transformers_model().encode_queries([query for _, query, _ in queries])
+
+def hit_rates(search):
+    hits = {k: 0 for k in top_ks}
+    for (file_number, query, expected), vector in zip(queries, query_vectors):
+        results = search(file_number, query, list(map(float, vector)))
+        texts = [hit.fields.get("text") for hit in results[0]]
+        for k in top_ks:
+            hits[k] += expected in texts[:k]
+    return " ".join(f"hit@{k}={hits[k] / len(queries):.3f}" for k in top_ks)
+
+def search(file_number, query, vector, hybrid):
+    sparse_query = get_sparse_model().encode_queries([query]) if hybrid else None
+    return db_engine.search_in_collection("benchmark", f"benchmark-{file_number}", collection_name, None, [vector], max(top_ks), sparse_query)
+
+try:
+    print(f"dense          : {hit_rates(lambda file_number, query, vector: search(file_number, query, vector, False))}")
+    config = db_engine.get_collection_config(collection_name)
+    for ranker in ("rrf", "weighted"):
+        db_engine.collection_config.save(collection_name, {**config, "hybrid": {**config["hybrid"], "ranker": ranker}})
+        print(f"hybrid {ranker:8}: {hit_rates(lambda file_number, query, vector: search(file_number, query, vector, True))}")
+finally:
+    db_engine.drop_collection(collection_name)
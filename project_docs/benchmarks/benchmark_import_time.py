@@ -0,0 +1,35 @@
+# Run from the repository root: python -m project_docs.benchmarks.benchmark_import_time
+# Cold import time of each entry point in a fresh interpreter, the heavy dependencies it pulled in, then warm-up time per model
+import sys
+import json
+import subprocess
+
+entry_points = ["app_vectorizer", "app_information_retrieval", "app_worker", "ManageModelHost"]
+heavy_modules = ["torch", "transformers", "onnxruntime", "sentence_transformers", "langchain", "langchain_community", "pymupdf"]
+repeats = 3
+
+import_script = """
+import sys, time, json
+start_time = time.perf_counter()
+import {module}
+print(json.dumps({{"seconds": time.perf_counter() - start_time, "loaded": [name for name in {heavy} if name in sys.modules]}}))
+"""
+warm_up_script = """
+import time, json
+from ManageModelHost import LocalModels
+start_time = time.perf_counter()
+LocalModels(served=("{model}",)).warm_up()
+print(json.dumps({{"seconds": time.perf_counter() - start_time}}))
+"""
+
+def run(script):
+    output = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+for module in entry_points:
+    results = [run(import_script.format(module=module, heavy=heavy_modules)) for _ in range(repeats)]
+    seconds = sorted(result["seconds"] for result in results)[len(results) // 2]
+    print(f"import {module:26}: {seconds * 1000:7.0f}ms median of {repeats}, heavy modules: {', '.join(results[0]['loaded']) or '-'}")
+
+for model in ["embedding", "reranker"]:
+    print(f"warm up {model:25}: {run(warm_up_script.format(model=model))['seconds'] * 1000:7.0f}ms")
@@ -0,0 +1,73 @@
+# Run from the repository root: python -m project_docs.benchmarks.benchmark_index_types
+# Needs a running Milvus (DISKANN needs a Milvus build with DiskANN enabled, failures are reported and skipped)
+import time
+from pathlib import Path
+from pymilvus import utility
+from UtilityInsertInformation import InsertInformation
+from ManageEmbeddingModel import get_sentence_transformers_model
+from ManageVectorDB import ManageVectorDB
+from ManageCollectionConfig import DEFAULT_INDEX_PARAMS
+from UtilityTuneIndex import TuneIndex
+
+files_path = sorted(Path("uploaded_information_data").glob("uu_*.pdf"))
+k = 10
+sample_queries = 200
+
+# Sample corpus: the PDFs split like an IndoLegalTextSplitter insert, embedded once for every index type
+insert_engine = InsertInformation()
+columns = {}
+for file_number, path in enumerate(files_path):
+    informations, metadata = insert_engine.parse_document(
+        path=str(path),
+        client_id="benchmark",
+        project_id="benchmark",
+        file_id=f"benchmark-{file_number}",
+        separator_type="IndoLegalTextSplitter",
+        separator=None,
+        chunk_size=None,
+        chunk_overlap=None
+    )
+    vectors = get_sentence_transformers_model().encode_documents(informations)
+    insert_engine.append_columns(columns, informations, [list(map(float, vector)) for vector in vectors], metadata)
+print(f"Corpus: {len(columns['vector'])} chunks from {len(files_path)} files, recall@{k} on {sample_queries} held-out chunks")
+
+def memory_bytes(collection_name):
+    # Memory of the loaded segments as reported by the query nodes
+    db_engine = ManageVectorDB()
+    segments = utility.get_query_segment_info(collection_name, using=db_engine.pool.get_connection())
+    return sum(segment.mem_size for segment in segments)
+
+db_engine = ManageVectorDB()
+for index_type in DEFAULT_INDEX_PARAMS:
+    collection_name = f"benchmark_index_{index_type.lower()}"
+    try:
+        if db_engine.check_collection_exists(collection_name):
+            db_engine.drop_collection(collection_name)
+        db_engine.create_collection(collection_name, index_type)
+        db_engine.insert_columns_into_collection(collection_name, columns)
+        # Seal and index the inserted rows so memory and recall reflect the index, not the growing segment
+        collection = db_engine.pool.get_collection(collection_name)
+        collection.flush()
+        utility.wait_for_index_building_complete(collection_name, using=db_engine.pool.get_connection())
+        collection.release()
+        collection.load()
+
+        tuner = TuneIndex(collection_name, k=k)
+        tuner.load_corpus()
+        tuner.load_queries(sample_queries=sample_queries)
+        search_candidates = [tuner.config["search_params"]]
+        if tuner.config["search_params"].get("refine_factor", 1) > 1:
+            search_candidates.insert(0, {**tuner.config["search_params"], "refine_factor": 1})
+        for search_params in search_candidates:
+            start_time = time.perf_counter()
+            result = tuner.measure(search_params)
+            qps = len(tuner.queries) / (time.perf_counter() - start_time)
+            print(
+                f"{index_type:8} search={search_params}: memory={memory_bytes(collection_name) / 1024 / 1024:.1f} MB "
+                f"qps={qps:.0f} recall={result['recall']:.4f} p50={result['p50_ms']:.2f}ms p99={result['p99_ms']:.2f}ms"
+            )
+    except Exception as e:
+        print(f"{index_type:8} skipped: {e}")
+    finally:
+        if db_engine.check_collection_exists(collection_name):
+            db_engine.drop_collection(collection_name)
@@ -0,0 +1,75 @@
+# Run from the repository root: python -m project_docs.benchmarks.benchmark_indo_legal_text_splitter
+# Checks that IndoLegalTextSplitter returns the same chunks as the original multi-pass splitter on the sample PDFs
+import re
+import time
+import pymupdf
+from UtilityIndoLegalTextSplitter import IndoLegalTextSplitter
+
+files_path = [
+    "uploaded_information_data/uu_pdp.pdf",
+    "uploaded_information_data/uu_tenagakerja.pdf",
+    "uploaded_information_data/uu_penerbangan.pdf",
+]
+rounds = 5
+
+def legacy_indonesia_legal_text_splitter(document_text):
+    # Original InsertInformation.indonesia_legal_text_splitter, kept as the golden reference
+    document_text = re.sub(r"([^\n]+?(?:\.\s*\.\s*\.\s*|…))", "", document_text)
+    bab_split_pattern = r'(BAB [IVXLCDM]+[\s\n]*[A-Z\s]+)(.*?)(?=BAB [IVXLCDM]+|$)'
+    matches = re.findall(bab_split_pattern, document_text, re.DOTALL)
+    pre_bab_content = re.split(r'BAB [IVXLCDM]+', document_text, maxsplit=1)[0].strip()
+    segments = [pre_bab_content] if pre_bab_content else []
+    segments.extend([f"{match[0].strip()}\n{match[1].strip()}" for match in matches])
+    segments_2 = []
+    for i, segment in enumerate(segments, start=1):
+        bab_pattern = r'BAB [IVXLCDM]+[\s\n]*[A-Z\s]+'
+        bab_header = re.findall(bab_pattern, segment)
+        if bab_header != []:
+            pasal_pattern = r'(?:\n{1,2})P(?:\\n|)asal \d+(?:\s*\n{1,2})'
+            split_segments = re.split(pasal_pattern, segment)
+            headers = re.findall(pasal_pattern, segment)
+            results = []
+            for i, segment in enumerate(split_segments):
+                if i == 0 and segment.strip():
+                    processed_segment = f"{segment.strip()}"
+                elif i > 0:
+                    header = headers[i - 1]
+                    processed_segment = f"{header.strip()}\n{segment.strip()}"
+                if re.findall(bab_pattern, processed_segment) == [] and True:
+                    processed_segment = f"{bab_header[0]}\n{processed_segment}"
+                results.append(processed_segment)
+            segments_2.extend(results)
+        else:
+            segments_2.append(segment)
+    return segments_2
+
+def load_pages(path):
+    with pymupdf.open(path) as document:
+        return [page.get_text() for page in document]
+
+splitter = IndoLegalTextSplitter()
+for path in files_path:
+    pages = load_pages(path)
+    document_text = "".join(pages)
+
+    # Golden output: whole document and streamed pages at several window sizes
+    expected = legacy_indonesia_legal_text_splitter(document_text)
+    assert splitter.split(document_text) == expected, f"{path}: split() differs from the original splitter"
+    for window_pages in (1, 3, 8):
+        splitter.window_pages = window_pages
+        assert list(splitter.split_stream(pages)) == expected, f"{path}: split_stream() differs with window_pages={window_pages}"
+
+    # Throughput
+    start_time = time.perf_counter()
+    for _ in range(rounds):
+        legacy_indonesia_legal_text_splitter(document_text)
+    legacy_time = (time.perf_counter() - start_time) / rounds
+    start_time = time.perf_counter()
+    for _ in range(rounds):
+        splitter.split(document_text)
+    engine_time = (time.perf_counter() - start_time) / rounds
+
+    megabytes = len(document_text.encode("utf-8")) / 1024 / 1024
+    print(f"{path}: {len(expected)} chunks, identical output")
+    print(f"  original splitter     : {megabytes / legacy_time:.2f} MB/sec")
+    print(f"  IndoLegalTextSplitter : {megabytes / engine_time:.2f} MB/sec ({legacy_time / engine_time:.2f}x)")
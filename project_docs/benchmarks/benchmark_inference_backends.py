@@ -0,0 +1,69 @@
+# Run from the repository root: python -m project_docs.benchmarks.benchmark_inference_backends
+# CPU only: PyTorch against the ONNX Runtime exports of models/export_onnx_models.py (fp32 and dynamic INT8)
+import time
+import numpy as np
+from pathlib import Path
+from pymilvus import model
+from UtilityInsertInformation import InsertInformation
+from ManageOnnxModel import OnnxEmbeddingFunction, OnnxRerankFunction
+
+embedding_path = "./models/onprem-multilingual-e5-small"
+reranker_path = "./models/onprem-bge-reranker-base"
+files_path = sorted(Path("uploaded_information_data").glob("uu_*.pdf"))
+query_requests = 200
+document_batch_size = 32
+rerank_pairs = 50
+rerank_requests = 20
+
+insert_engine = InsertInformation()
+texts = []
+for path in files_path:
+    informations, metadata = insert_engine.parse_document(
+        path=str(path),
+        client_id="benchmark",
+        project_id="benchmark",
+        file_id="benchmark",
+        separator_type="IndoLegalTextSplitter",
+        separator=None,
+        chunk_size=None,
+        chunk_overlap=None
+    )
+    texts.extend(informations)
+texts = texts[:640]
+queries = [f"sanksi pelanggaran data pribadi pasal {i}" for i in range(query_requests)]
+
+backends = [
+    ("torch", lambda: model.dense.SentenceTransformerEmbeddingFunction(model_name=embedding_path, device="cpu"),
+     lambda: model.reranker.BGERerankFunction(model_name=reranker_path, device="cpu", use_fp16=False)),
+    ("onnx fp32", lambda: OnnxEmbeddingFunction(embedding_path, "onnx/model.onnx"), lambda: OnnxRerankFunction(reranker_path, "onnx/model.onnx")),
+    ("onnx int8", lambda: OnnxEmbeddingFunction(embedding_path, "onnx/model_int8.onnx"), lambda: OnnxRerankFunction(reranker_path, "onnx/model_int8.onnx")),
+]
+
+def timed(calls):
+    latencies = []
+    for call in calls:
+        start_time = time.perf_counter()
+        call()
+        latencies.append((time.perf_counter() - start_time) * 1000)
+    return np.asarray(latencies)
+
+for backend, load_embedding, load_reranker in backends:
+    embedding = load_embedding()
+    reranker = load_reranker()
+    embedding.encode_queries(queries[:4])  # Warm up
+    reranker.reranker.compute_score([(queries[0], text) for text in texts[:4]])
+
+    query_latencies = timed([lambda query=query: embedding.encode_queries([query]) for query in queries])
+    document_latencies = timed([
+        lambda start=start: embedding.encode_documents(texts[start:start + document_batch_size])
+        for start in range(0, len(texts), document_batch_size)
+    ])
+    rerank_latencies = timed([
+        lambda i=i: reranker.reranker.compute_score([(queries[i], text) for text in texts[i * rerank_pairs % len(texts):][:rerank_pairs]], normalize=True)
+        for i in range(rerank_requests)
+    ])
+    print(
+        f"{backend:9}: query p50={np.percentile(query_latencies, 50):.1f}ms p99={np.percentile(query_latencies, 99):.1f}ms | "
+        f"documents {len(texts) / document_latencies.sum() * 1000:.0f} texts/sec p99={np.percentile(document_latencies, 99):.0f}ms/batch | "
+        f"rerank {rerank_requests * rerank_pairs / rerank_latencies.sum() * 1000:.0f} pairs/sec p99={np.percentile(rerank_latencies, 99):.0f}ms/request"
+    )
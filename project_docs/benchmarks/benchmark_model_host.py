@@ -0,0 +1,46 @@
+# Run from the repository root: python -m project_docs.benchmarks.benchmark_model_host
+# Starts ManageModelHost.py with 1..N processes, prints its memory (PSS, shared pages split between processes) and rerank throughput
+import os
+import sys
+import time
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from ManageModelHost import ModelHostClient
+
+address = "/tmp/benchmark_model_host.sock"
+process_counts = [1, 2, 4, os.cpu_count()]
+rerank_batches = 64
+pairs = [("sanksi pelanggaran data pribadi", f"Pasal {i}\nSetiap orang berhak atas pelindungan data pribadi yang dimaksud dalam ayat ({i % 5 + 1}).") for i in range(64)]
+
+def pss_mb(pid):
+    # Proportional set size of the host and its forked processes, in MB
+    pids = [pid] + [int(child) for child in open(f"/proc/{pid}/task/{pid}/children").read().split()]
+    total = 0
+    for process_id in pids:
+        for line in open(f"/proc/{process_id}/smaps_rollup"):
+            if line.startswith("Pss:"):
+                total += int(line.split()[1])
+    return total / 1024
+
+def wait_ready(client):
+    while True:
+        try:
+            return client.score_pairs_bucketed(pairs[:1], 32, 16384)
+        except (FileNotFoundError, ConnectionRefusedError):
+            time.sleep(0.5)
+
+for processes in sorted(set(process_counts)):
+    env = dict(os.environ, MODEL_HOST_ADDRESS=address, MODEL_HOST_PROCESSES=str(processes), MODEL_HOST_THREADS=str(max(1, os.cpu_count() // processes)))
+    host = subprocess.Popen([sys.executable, "ManageModelHost.py"], env=env)
+    client = ModelHostClient(address)
+    try:
+        wait_ready(client)
+        with ThreadPoolExecutor(max_workers=processes) as executor:
+            list(executor.map(lambda _: client.score_pairs_bucketed(pairs, 32, 16384), range(processes)))  # Warm up every process
+            start_time = time.perf_counter()
+            list(executor.map(lambda _: client.score_pairs_bucketed(pairs, 32, 16384), range(rerank_batches)))
+            elapsed = time.perf_counter() - start_time
+        print(f"{processes:3} processes: PSS={pss_mb(host.pid):.0f}MB rerank {rerank_batches * len(pairs) / elapsed:.0f} pairs/sec")
+    finally:
+        host.terminate()
+        host.wait()
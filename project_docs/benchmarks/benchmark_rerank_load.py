@@ -0,0 +1,56 @@
+# Run from the repository root: python -m project_docs.benchmarks.benchmark_rerank_load
+# Needs a running app_vectorizer, VECTOR_QUERY_URI and RERANK_DOCS_URI point at it
+# Every query and rerank request carries a unique text, so neither the embedding nor the rerank score cache answers them
+import os
+import time
+import asyncio
+import numpy as np
+from dotenv import load_dotenv
+load_dotenv()
+from ManageHttpClient import get_http_client
+
+query_requests = 500
+query_concurrency = 8
+rerank_concurrency = 8
+rerank_documents = 50
+documents = [f"Pasal {i}\nSetiap orang berhak atas pelindungan data pribadi yang dimaksud dalam ayat ({i % 5 + 1})." * 4 for i in range(rerank_documents)]
+
+async def encode_queries(latencies, tag):
+    http_client = get_http_client()
+    for i in range(query_requests // query_concurrency):
+        start_time = time.perf_counter()
+        response = await http_client.post(os.getenv("VECTOR_QUERY_URI"), json={"text": f"sanksi pelanggaran data pribadi {tag} {i}"}, timeout=60)
+        response.raise_for_status()
+        latencies.append((time.perf_counter() - start_time) * 1000)
+
+async def rerank_forever(stop, statuses, tag):
+    # Background cross-encoder load, 429 answers are counted as shed load
+    http_client = get_http_client()
+    i = 0
+    while not stop.is_set():
+        i += 1
+        response = await http_client.post(
+            os.getenv("RERANK_DOCS_URI"),
+            json={"query": f"sanksi pelanggaran data pribadi {tag} {i}", "documents": documents, "top_k": 5},
+            timeout=120
+        )
+        statuses.append(response.status_code)
+
+async def run(rerank_load):
+    latencies = []
+    statuses = []
+    stop = asyncio.Event()
+    run_id = time.time_ns()
+    background = [asyncio.create_task(rerank_forever(stop, statuses, f"{run_id}-{client}")) for client in range(rerank_concurrency if rerank_load else 0)]
+    await asyncio.gather(*(encode_queries(latencies, f"{run_id}-{client}") for client in range(query_concurrency)))
+    stop.set()
+    await asyncio.gather(*background)
+    label = f"with {rerank_concurrency} rerank clients" if rerank_load else "idle reranker"
+    shed = f", reranks ok={statuses.count(200)} rejected={statuses.count(429)}" if rerank_load else ""
+    print(f"vectorize-query {label:22}: p50={np.percentile(latencies, 50):.1f}ms p99={np.percentile(latencies, 99):.1f}ms{shed}")
+
+async def main():
+    await run(False)
+    await run(True)
+
+asyncio.run(main())
@@ -0,0 +1,72 @@
+# Run from the repository root: python -m project_docs.benchmarks.benchmark_scalar_indexes
+# Needs a running Milvus, collections use the filter tenant mode so every search filters on client_id and project_id
+import time
+import numpy as np
+from pymilvus import utility
+from ManageVectorDB import ManageVectorDB
+
+collection_name = "benchmark_scalar_indexes"
+collection_sizes = (10000, 100000, 300000)
+rows_per_file = 50
+tenants = 100
+sample_searches = 200
+sample_deletes = 50
+
+def build_columns(total_rows, rng):
+    # Synthetic chunks spread over tenants and files, one tenant owns 1% of the rows
+    vectors = rng.standard_normal((total_rows, 384), dtype=np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    file_numbers = np.arange(total_rows) // rows_per_file
+    return {
+        "vector": vectors,
+        "text": [f"Pasal {i}\nSetiap orang berhak atas pelindungan data pribadi." for i in range(total_rows)],
+        "file_path": [f"uploaded_information_data/benchmark_{file_number}.pdf" for file_number in file_numbers],
+        "title": ["benchmark"] * total_rows,
+        "total_pages": [100] * total_rows,
+        "format": ["PDF 1.7"] * total_rows,
+        "client_id": [f"client-{file_number % tenants}" for file_number in file_numbers],
+        "project_id": [f"project-{file_number % tenants}" for file_number in file_numbers],
+        "file_id": [f"file-{file_number}" for file_number in file_numbers],
+    }
+
+def percentiles(latencies):
+    return f"p50={np.percentile(latencies, 50):.2f}ms p99={np.percentile(latencies, 99):.2f}ms"
+
+def run(total_rows, scalar_indexes):
+    rng = np.random.default_rng(0)
+    columns = build_columns(total_rows, rng)
+    db_engine = ManageVectorDB()
+    if db_engine.check_collection_exists(collection_name):
+        db_engine.drop_collection(collection_name)
+    db_engine.create_collection(collection_name, "HNSW", tenant_mode="filter", scalar_indexes=scalar_indexes)
+    db_engine.insert_columns_into_collection(collection_name, columns)
+    # Seal the rows so both variants search indexed segments
+    collection = db_engine.pool.get_collection(collection_name)
+    collection.flush()
+    utility.wait_for_index_building_complete(collection_name, using=db_engine.pool.get_connection())
+    collection.release()
+    collection.load()
+
+    search_latencies = []
+    for i in range(sample_searches):
+        tenant = i % tenants
+        query = rng.standard_normal(384).astype(np.float32)
+        start_time = time.perf_counter()
+        db_engine.search_in_collection(f"client-{tenant}", f"project-{tenant}", collection_name, None, [query.tolist()], 10)
+        search_latencies.append((time.perf_counter() - start_time) * 1000)
+
+    delete_latencies = []
+    file_count = total_rows // rows_per_file
+    for file_number in rng.choice(file_count, size=min(sample_deletes, file_count), replace=False):
+        tenant = file_number % tenants
+        start_time = time.perf_counter()
+        db_engine.delete_in_collection(f"client-{tenant}", f"project-{tenant}", collection_name, f"file-{file_number}")
+        delete_latencies.append((time.perf_counter() - start_time) * 1000)
+
+    label = "indexed" if scalar_indexes else "no index"
+    print(f"{total_rows:7} rows {label:8}: search {percentiles(search_latencies)} | delete by file_id {percentiles(delete_latencies)}")
+    db_engine.drop_collection(collection_name)
+
+for total_rows in collection_sizes:
+    run(total_rows, scalar_indexes=False)
+    run(total_rows, scalar_indexes=True)
@@ -0,0 +1,45 @@
+# Run from the repository root: python -m project_docs.benchmarks.benchmark_vectorize_documents
+import time
+from pathlib import Path
+from UtilityInsertInformation import InsertInformation
+from ManageEmbeddingModel import get_sentence_transformers_model, encode_documents_bucketed
+
+files_path = sorted(Path("uploaded_information_data").glob("uu_*.pdf"))
+request_size = 64  # Chunks per /vectorize-documents request
+
+# Split the sample PDFs like an IndoLegalTextSplitter insert would
+insert_engine = InsertInformation()
+texts = []
+for path in files_path:
+    informations, metadata = insert_engine.parse_document(
+        path=str(path),
+        client_id="benchmark",
+        project_id="benchmark",
+        file_id="benchmark",
+        separator_type="IndoLegalTextSplitter",
+        separator=None,
+        chunk_size=None,
+        chunk_overlap=None
+    )
+    texts.extend(informations)
+print(f"Chunks: {len(texts)} from {len(files_path)} files")
+
+sentence_transformers_model = get_sentence_transformers_model()
+sentence_transformers_model.encode_documents(texts[:8])  # Warm up
+
+# Baseline: each request encoded as it arrives
+start_time = time.time()
+for i in range(0, len(texts), request_size):
+    sentence_transformers_model.encode_documents(texts[i:i + request_size])
+baseline_time = time.time() - start_time
+print(f"encode_documents          : {len(texts) / baseline_time:.1f} docs/sec")
+
+# Token length buckets per request
+start_time = time.time()
+truncated = 0
+for i in range(0, len(texts), request_size):
+    vectors, request_truncated = encode_documents_bucketed(texts[i:i + request_size])
+    truncated += request_truncated
+bucketed_time = time.time() - start_time
+print(f"encode_documents_bucketed : {len(texts) / bucketed_time:.1f} docs/sec ({truncated} truncated)")
+print(f"Speedup                   : {baseline_time / bucketed_time:.2f}x")
@@ -0,0 +1,43 @@
+# Run from the repository root with Milvus and app_vectorizer.py running: python -m project_docs.benchmarks.check_ingestion_dedup
+# Inserts the same PDF twice into a scratch collection, the second insert must add no rows and return the first file_id, exits 1 otherwise
+import os
+import sys
+import tempfile
+from pathlib import Path
+os.environ["INGESTION_REGISTRY_PATH"] = os.path.join(tempfile.mkdtemp(), "ingestion_registry.sqlite")
+os.environ["INGESTION_DEDUP_ENABLED"] = "true"
+from ManageVectorDB import ManageVectorDB
+from UtilityInsertInformation import InsertInformation
+
+collection_name = "check_ingestion_dedup"
+file_path = str(sorted(Path("uploaded_information_data").glob("uu_*.pdf"))[0])
+
+db_engine = ManageVectorDB()
+if db_engine.check_collection_exists(collection_name):
+    db_engine.drop_collection(collection_name)
+db_engine.create_collection(collection_name, "HNSW")
+insert_engine = InsertInformation()
+
+def insert():
+    status = insert_engine.insert_information(
+        client_id="check",
+        project_id="check",
+        collection_name=collection_name,
+        collection_index_type="HNSW",
+        files_path=[file_path],
+        separator_type="IndoLegalTextSplitter"
+    )[0]
+    return status, db_engine.count_rows(collection_name)
+
+try:
+    first, first_rows = insert()
+    second, second_rows = insert()
+finally:
+    db_engine.drop_collection(collection_name)
+
+passed = first_rows > 0 and second_rows == first_rows and second["chunks_inserted"] == 0 and second["file_id"] == first["file_id"]
+print(
+    f"{'ok  ' if passed else 'FAIL'} {Path(file_path).name}: first insert {first['chunks_inserted']} chunks ({first_rows} rows), "
+    f"second insert {second['chunks_inserted']} chunks ({second_rows} rows), file_id {'kept' if second['file_id'] == first['file_id'] else 'changed'}"
+)
+sys.exit(0 if passed else 1)
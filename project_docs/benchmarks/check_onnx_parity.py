@@ -0,0 +1,64 @@
+# Run from the repository root: python -m project_docs.benchmarks.check_onnx_parity
+# Compares the ONNX exports of models/export_onnx_models.py with the PyTorch models, exits 1 when a check fails
+import sys
+import numpy as np
+from pathlib import Path
+from pymilvus import model
+from UtilityInsertInformation import InsertInformation
+from ManageOnnxModel import OnnxEmbeddingFunction, OnnxRerankFunction
+
+embedding_path = "./models/onprem-multilingual-e5-small"
+reranker_path = "./models/onprem-bge-reranker-base"
+files_path = sorted(Path("uploaded_information_data").glob("uu_*.pdf"))
+queries = ["sanksi pelanggaran data pribadi", "hak subjek data pribadi", "Pasal 27", "kewajiban pengendali data", "ketentuan pidana"]
+# (onnx file, min cosine of embeddings, min Spearman correlation of rerank scores)
+thresholds = [("onnx/model.onnx", 0.9999, 0.999), ("onnx/model_int8.onnx", 0.98, 0.95)]
+
+insert_engine = InsertInformation()
+texts = []
+for path in files_path:
+    informations, metadata = insert_engine.parse_document(
+        path=str(path),
+        client_id="benchmark",
+        project_id="benchmark",
+        file_id="benchmark",
+        separator_type="IndoLegalTextSplitter",
+        separator=None,
+        chunk_size=None,
+        chunk_overlap=None
+    )
+    texts.extend(informations)
+texts = texts[:500]
+candidates = texts[:50]
+
+def ranks(values):
+    return np.argsort(np.argsort(values))
+
+reference_embedding = model.dense.SentenceTransformerEmbeddingFunction(model_name=embedding_path, device="cpu")
+reference_vectors = np.asarray(reference_embedding.encode_documents(texts))
+reference_reranker = model.reranker.BGERerankFunction(model_name=reranker_path, device="cpu", use_fp16=False)
+reference_scores = [
+    np.asarray(reference_reranker.reranker.compute_score([[query, text] for text in candidates], normalize=True))
+    for query in queries
+]
+
+failed = False
+for onnx_file, min_cosine, min_spearman in thresholds:
+    vectors = np.asarray(OnnxEmbeddingFunction(embedding_path, onnx_file).encode_documents(texts))
+    cosines = (vectors * reference_vectors).sum(axis=1) / np.linalg.norm(vectors, axis=1) / np.linalg.norm(reference_vectors, axis=1)
+    reranker = OnnxRerankFunction(reranker_path, onnx_file)
+    spearmans = []
+    top5_agreement = []
+    max_score_diff = 0.0
+    for query, expected in zip(queries, reference_scores):
+        scores = np.asarray(reranker.reranker.compute_score([(query, text) for text in candidates], normalize=True))
+        max_score_diff = max(max_score_diff, float(np.abs(scores - expected).max()))
+        spearmans.append(np.corrcoef(ranks(scores), ranks(expected))[0, 1])
+        top5_agreement.append(len(set(np.argsort(-scores)[:5]) & set(np.argsort(-expected)[:5])) / 5)
+    passed = cosines.min() >= min_cosine and min(spearmans) >= min_spearman
+    failed = failed or not passed
+    print(
+        f"{onnx_file:22} {'ok  ' if passed else 'FAIL'} embeddings: min cosine={cosines.min():.5f} mean={cosines.mean():.5f} | "
+        f"rerank: min spearman={min(spearmans):.4f} top5 agreement={np.mean(top5_agreement):.2f} max score diff={max_score_diff:.4f}"
+    )
+sys.exit(1 if failed else 0)